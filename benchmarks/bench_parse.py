@@ -0,0 +1,79 @@
+"""
+    Compare per-row Pydantic parsing against the batch row parser.
+
+    Usage:
+        python -m benchmarks.bench_parse [--pages 2000] [--rows 50]
+"""
+
+import argparse
+import random
+import timeit
+from typing import Any
+
+from chaoxing.models.record_model import RECORD_FIELDS
+from chaoxing.parser import parse_record, parse_record_rows
+
+
+def make_item(rng: random.Random, record_id: int) -> dict[str, Any]:
+    return {
+        "recordId": record_id,
+        "title": None if rng.random() < 0.02 else f"Title {record_id}",
+        "adstract": rng.choice([None, "An abstract " * 20]),
+        "author": f"Author {rng.randrange(1000)}",
+        "publisher": f"Publisher {rng.randrange(100)}",
+        "publishYear": str(rng.randrange(1900, 2025)),
+        "vol": rng.choice([None, 1, 2.0]),
+        "issue": rng.choice([None, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0, 9.0, "4"]),
+        "isbns": rng.choice([None, ["9787020002207", "7020002200"], "9787020002207"]),
+        "langCode": "chi",
+        "countryCode": "CN",
+        "eCount": rng.choice([0, 1]),
+        "pagesNum": rng.choice([None, 320]),
+        "doi": None,
+        "docName": "Book",
+        "subjectWord": "Literature",
+        "chiSubjectClass": rng.choice([None, [], ["I247", "I207"]]),
+        # Fields returned by the API but never stored.
+        "marcRecNo": str(record_id),
+        "callNo": ["I247.5/123"],
+        "physicalCount": 3,
+    }
+
+
+def parse_with_models(items: list[dict[str, Any]]) -> list[tuple[Any, ...]]:
+    rows = []
+    for item in items:
+        record = parse_record(item)
+        if record is not None:
+            data = record.model_dump()
+            rows.append(tuple(data[field] for field in RECORD_FIELDS))
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--rows", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    pages = [
+        [make_item(rng, page * args.rows + row) for row in range(args.rows)]
+        for page in range(args.pages)
+    ]
+
+    for page in pages:
+        assert parse_record_rows(page) == parse_with_models(page), "batch parser output differs"
+
+    results = {}
+    for name, parse in (("pydantic per row", parse_with_models), ("batch rows", parse_record_rows)):
+        seconds = min(timeit.repeat(lambda: [parse(page) for page in pages], number=1, repeat=3))
+        results[name] = seconds
+        records_per_sec = args.pages * args.rows / seconds
+        print(f"{name:>18}: {seconds:.3f}s  ({records_per_sec:,.0f} records/s)")
+
+    print(f"{'speedup':>18}: {results['pydantic per row'] / results['batch rows']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+    End-to-end scrape throughput against the mock LibSP backend.
+
+    Runs `scraper.scrape_institution` for one or more mock institutions, either in this
+    process or across spawned worker processes like `main.py`, and reports request
+    counts, latency percentiles, inserted rows per second and peak RSS. Records are
+    written to the database at `--db-url` (the configured one by default), which should
+    be a scratch database.
+
+    Usage:
+        python -m benchmarks.bench_scrape --institutions 4 --workers 4 --catalog-size 50000
+
+    With `PROFILE_DIR` set, every worker is profiled and a merged report is written there.
+"""
+
+import argparse
+import asyncio
+import multiprocessing as mp
+import resource
+import statistics
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from benchmarks.mock_libsp import CatalogOptions, MockCatalog, MockLibSP, ServerOptions
+from chaoxing.core.config import config
+from chaoxing.core.logging import setup_logging
+from chaoxing.core.profiling import clear_profiles, profile_section, write_profile_report
+from chaoxing.db.schema import Base, Record
+from chaoxing.runtime import open_runtime
+from main import create_rate_limiter, init_worker
+import scraper
+
+
+LOG_FILE = Path("logs/bench.log")
+
+
+def run_institution(
+    hostname: str,
+    db_url: str,
+    catalog_options: CatalogOptions,
+    server_options: ServerOptions,
+) -> dict[str, Any]:
+    server = MockLibSP(MockCatalog(hostname, catalog_options), server_options)
+
+    async def scrape() -> None:
+        async with open_runtime(db_url, transport=server.transport()) as runtime:
+            with profile_section(hostname):
+                await scraper.scrape_institution(hostname, runtime)
+
+    started = time.perf_counter()
+    asyncio.run(scrape())
+    elapsed = time.perf_counter() - started
+
+    return {
+        "hostname": hostname,
+        "elapsed": elapsed,
+        "counts": dict(server.stats.counts),
+        "errors": dict(server.stats.errors),
+        "probes": server.stats.probes,
+        "latencies": {endpoint: values for endpoint, values in server.stats.latencies.items()},
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+async def prepare_database(db_url: str, create_schema: bool) -> int:
+    engine = create_async_engine(db_url)
+    try:
+        async with engine.begin() as connection:
+            if create_schema:
+                await connection.run_sync(Base.metadata.create_all)
+            return (await connection.execute(select(func.count()).select_from(Record))).scalar_one()
+    finally:
+        await engine.dispose()
+
+
+def percentile(values: list[float], q: int) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+
+def report(results: list[dict[str, Any]], inserted: int, wall: float) -> None:
+    counts: Counter = Counter()
+    errors: Counter = Counter()
+    latencies: dict[str, list[float]] = {}
+    for result in results:
+        counts.update(result["counts"])
+        errors.update(result["errors"])
+        for endpoint, values in result["latencies"].items():
+            latencies.setdefault(endpoint, []).extend(values)
+
+    probes = sum(result["probes"] for result in results)
+    pages = counts["/find/unify/search"] - probes
+
+    print(f"\nInstitutions: {len(results)}   wall time: {wall:.1f}s")
+    print(f"{'endpoint':<28}{'requests':>10}{'errors':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for endpoint, values in sorted(latencies.items()):
+        print(
+            f"{endpoint:<28}{counts[endpoint]:>10}{errors[endpoint]:>8}"
+            f"{percentile(values, 50) * 1000:>9.1f}{percentile(values, 95) * 1000:>9.1f}"
+            f"{percentile(values, 99) * 1000:>9.1f}"
+        )
+    print(f"\ncount probes: {probes}   page requests: {pages}   pages/s: {pages / wall:,.1f}")
+    print(f"rows inserted: {inserted}   rows/s: {inserted / wall:,.1f}")
+
+    worker_rss = max(result["max_rss_kb"] for result in results)
+    own_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"peak RSS: {max(worker_rss, own_rss) / 1024:,.1f} MiB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--institutions", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=1, help="processes; 1 runs in this process")
+    parser.add_argument("--catalog-size", type=int, default=CatalogOptions.size)
+    parser.add_argument("--facet-values", type=int, default=CatalogOptions.facet_values)
+    parser.add_argument("--facet-skew", type=float, default=CatalogOptions.facet_skew)
+    parser.add_argument("--seed", type=int, default=CatalogOptions.seed)
+    parser.add_argument("--latency-ms", type=float, default=ServerOptions.latency_ms)
+    parser.add_argument("--error-rate", type=float, default=ServerOptions.error_rate)
+    parser.add_argument("--max-rows", type=int, default=ServerOptions.max_rows, help="largest page size served")
+    parser.add_argument("--max-pages", type=int, default=ServerOptions.max_pages, help="deepest page served")
+    parser.add_argument("--db-url", default=config.db_url)
+    parser.add_argument("--create-schema", action="store_true", help="create missing tables first")
+    args = parser.parse_args()
+
+    catalog_options = CatalogOptions(
+        size=args.catalog_size,
+        seed=args.seed,
+        facet_skew=args.facet_skew,
+        facet_values=args.facet_values,
+    )
+    server_options = ServerOptions(
+        latency_ms=args.latency_ms,
+        error_rate=args.error_rate,
+        max_rows=args.max_rows,
+        max_pages=args.max_pages,
+    )
+    hostnames = [f"findbench{index}.libsp.cn" for index in range(args.institutions)]
+
+    print(f"catalog: {asdict(catalog_options)}")
+    print(f"server: {asdict(server_options)}")
+
+    log_queue = mp.Queue()
+    setup_logging(log_level=config.log_level, log_file=LOG_FILE, log_queue=log_queue)
+
+    if config.profile_dir:
+        clear_profiles(config.profile_dir)
+
+    rows_before = asyncio.run(prepare_database(args.db_url, args.create_schema))
+    started = time.perf_counter()
+
+    if args.workers == 1:
+        init_worker(create_rate_limiter())
+        results = [
+            run_institution(hostname, args.db_url, catalog_options, server_options)
+            for hostname in hostnames
+        ]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=args.workers,
+            initializer=init_worker,
+            initargs=(create_rate_limiter(), log_queue),
+        ) as executor:
+            futures = [
+                executor.submit(run_institution, hostname, args.db_url, catalog_options, server_options)
+                for hostname in hostnames
+            ]
+            results = [future.result() for future in futures]
+
+    wall = time.perf_counter() - started
+    rows_after = asyncio.run(prepare_database(args.db_url, create_schema=False))
+    report(results, rows_after - rows_before, wall)
+
+    if config.profile_dir and (profile_report := write_profile_report(config.profile_dir, config.profile_top)):
+        print(f"profile report: {profile_report}")
+
+
+if __name__ == "__main__":
+    mp.set_start_method("spawn")
+    main()
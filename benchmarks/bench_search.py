@@ -0,0 +1,111 @@
+"""
+    Latency of `search_records` against the records in a database.
+
+    Query terms are sampled from stored titles, authors and subjects, so the benchmark
+    exercises selective and broad queries alike on whatever corpus is loaded. Reports
+    latency percentiles overall and by how many candidates the queries matched.
+
+    Queries matching more than `--window` records still rank all of their matches to
+    keep the best `--window`, so the `window+` row shows what broad queries cost.
+
+    Usage:
+        python -m benchmarks.bench_search [--queries 500] [--concurrency 4]
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from sqlalchemy import text
+
+from chaoxing.core.config import config
+from chaoxing.db.session import create_session_factory, get_db_session
+from chaoxing.services.search_service import search_records
+from chaoxing.text_search import tokenize
+
+
+async def sample_queries(db_factory, count: int, seed: int) -> list[str]:
+    async with get_db_session(db_factory) as db:
+        rows = (await db.execute(text(
+            "SELECT title, author, subject FROM records TABLESAMPLE SYSTEM (1) LIMIT :limit"
+        ), {"limit": count * 4})).all()
+
+    rng = random.Random(seed)
+    queries = []
+    for row in rows:
+        value = rng.choice([field for field in row if field]) if any(row) else None
+        tokens = list(tokenize(value)) if value else []
+        if tokens:
+            start = rng.randrange(len(tokens))
+            queries.append(" ".join(tokens[start:start + rng.randint(1, 3)]))
+    rng.shuffle(queries)
+    return queries[:count]
+
+
+def percentile(values: list[float], q: int) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100)[q - 1]
+
+
+async def run(db_url: str, num_queries: int, concurrency: int, window: int, seed: int) -> None:
+    db_factory = create_session_factory(db_url, pool_size=concurrency, max_overflow=0)
+    try:
+        queries = await sample_queries(db_factory, num_queries, seed)
+        if not queries:
+            print("No records to sample queries from.")
+            return
+
+        latencies: list[tuple[float, int]] = []
+        pending = iter(queries)
+
+        async def client() -> None:
+            async with get_db_session(db_factory) as db:
+                for query in pending:
+                    started = time.perf_counter()
+                    results = await search_records(db, query, window=window)
+                    latencies.append((time.perf_counter() - started, results.matched))
+
+        # Warm up connections and caches before measuring.
+        async with get_db_session(db_factory) as db:
+            await search_records(db, queries[0], window=window)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        wall = time.perf_counter() - started
+    finally:
+        await db_factory.kw["bind"].dispose()
+
+    print(f"queries: {len(latencies)}   concurrency: {concurrency}   window: {window}   qps: {len(latencies) / wall:,.1f}")
+    print(f"{'matched':<18}{'queries':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    buckets = [
+        ("all", lambda matched: True),
+        ("< 100", lambda matched: matched < 100),
+        ("100 - window", lambda matched: 100 <= matched < window),
+        ("window+", lambda matched: matched >= window),
+    ]
+    for label, include in buckets:
+        values = [latency for latency, matched in latencies if include(matched)]
+        if values:
+            print(
+                f"{label:<18}{len(values):>8}{percentile(values, 50) * 1000:>9.1f}"
+                f"{percentile(values, 95) * 1000:>9.1f}{percentile(values, 99) * 1000:>9.1f}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--window", type=int, default=5_000, help="candidates ranked per query")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--db-url", default=config.db_url)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.db_url, args.queries, args.concurrency, args.window, args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""
+    Deterministic in-process stand-in for the LibSP endpoints used by the scraper.
+
+    `MockLibSP` serves `/find/unify/search`, `/find/groupResource/dict` and
+    `/find/ePortfolio/itemList` through an `httpx.MockTransport`, so the real client,
+    retry and parsing code paths run unchanged. The catalog is generated from a seed
+    and the hostname, so every process that builds the same mock sees the same data.
+"""
+
+import asyncio
+import json
+import math
+import random
+import time
+import zlib
+from bisect import bisect_left, bisect_right
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any
+
+import httpx
+
+
+# Payload keys of facet filters, mapped to the item field they select on.
+FACET_FIELDS = {
+    "docCode": "docCode",
+    "resourceType": "resourceType",
+    "author": "author",
+    "publisher": "publisher",
+    "subject": "subjectWord",
+    "langCode": "langCode",
+}
+
+
+@dataclass(frozen=True)
+class CatalogOptions:
+    size: int = 100_000
+    seed: int = 0
+    # Zipf exponent of facet value popularity; higher means a few values dominate.
+    facet_skew: float = 1.1
+    facet_values: int = 200
+    # Share of records with no publication year or a year outside 1850-2025.
+    missing_year_rate: float = 0.01
+    outlier_year_rate: float = 0.01
+    ecopy_rate: float = 0.2
+
+
+@dataclass(frozen=True)
+class ServerOptions:
+    latency_ms: float = 50.0
+    # Log-normal spread of the latency around `latency_ms`.
+    latency_sigma: float = 0.5
+    error_rate: float = 0.0
+    max_rows: int = 50
+    max_pages: int = 200
+
+
+@dataclass
+class RequestStats:
+    counts: Counter = field(default_factory=Counter)
+    errors: Counter = field(default_factory=Counter)
+    probes: int = 0
+    latencies: dict[str, list[float]] = field(default_factory=lambda: defaultdict(list))
+
+
+class MockCatalog:
+    def __init__(self, hostname: str, options: CatalogOptions) -> None:
+        self.hostname = hostname
+        self.options = options
+        self.institution_id = zlib.crc32(hostname.encode("utf-8")) % 1_000_000
+        # Disjoint id ranges keep catalogs of different mock institutions apart.
+        self.id_offset = self.institution_id * 100_000_000
+
+        rng = random.Random(f"{options.seed}:{hostname}")
+        weights = [1 / (rank ** options.facet_skew) for rank in range(1, options.facet_values + 1)]
+
+        self.items: list[dict[str, Any]] = []
+        for index in range(options.size):
+            roll = rng.random()
+            if roll < options.missing_year_rate:
+                year = None
+            elif roll < options.missing_year_rate + options.outlier_year_rate:
+                year = rng.choice([rng.randrange(1500, 1850), rng.randrange(2026, 2030)])
+            else:
+                year = min(2025, max(1850, int(rng.gauss(1995, 25))))
+
+            self.items.append({
+                "recordId": self.id_offset + index + 1,
+                "title": f"Title {index}",
+                "adstract": f"Summary of record {index}" if rng.random() < 0.5 else None,
+                "author": f"author-{self._pick(rng, weights)}",
+                "publisher": f"publisher-{self._pick(rng, weights)}",
+                "publishYear": str(year) if year is not None else None,
+                "vol": None,
+                "issue": None,
+                "isbns": [f"978{rng.randrange(10 ** 9, 10 ** 10)}"],
+                "langCode": rng.choice(["chi", "chi", "chi", "eng", "jpn"]),
+                "countryCode": "CN",
+                "eCount": int(rng.random() < options.ecopy_rate),
+                "pagesNum": rng.randrange(50, 800),
+                "doi": None,
+                "docName": "Book",
+                "docCode": rng.choice(["1", "1", "1", "2", "3"]),
+                "resourceType": rng.choice(["1", "2"]),
+                "subjectWord": f"subject-{self._pick(rng, weights)}",
+                "chiSubjectClass": [f"I{rng.randrange(100, 999)}"],
+                "year": year,
+            })
+
+        self._by_id = {item["recordId"]: item for item in self.items}
+        self._undated = [i for i, item in enumerate(self.items) if item["year"] is None]
+        self._dated = sorted(
+            (i for i, item in enumerate(self.items) if item["year"] is not None),
+            key=lambda i: self.items[i]["year"],
+        )
+        self._years = [self.items[i]["year"] for i in self._dated]
+        self._facets: dict[str, dict[str, int]] | None = None
+        self._select = lru_cache(maxsize=4096)(self._select_uncached)
+
+    @staticmethod
+    def _pick(rng: random.Random, weights: list[float]) -> int:
+        return rng.choices(range(len(weights)), weights=weights)[0]
+
+    def search(
+        self,
+        filters: tuple[tuple[str, tuple[str, ...]], ...],
+        from_year: int | None,
+        to_year: int | None,
+        sort: tuple[str, str],
+    ) -> tuple[int, ...]:
+        return self._select(filters, from_year, to_year, sort)
+
+    def facets(self) -> dict[str, dict[str, int]]:
+        if self._facets is None:
+            counts: dict[str, Counter] = {key: Counter() for key in FACET_FIELDS}
+            for item in self.items:
+                for key, item_field in FACET_FIELDS.items():
+                    counts[key][item[item_field]] += 1
+            self._facets = {key: dict(counter) for key, counter in counts.items()}
+        return self._facets
+
+    def item(self, record_id: int) -> dict[str, Any] | None:
+        return self._by_id.get(record_id)
+
+    def _select_uncached(self, filters, from_year, to_year, sort) -> tuple[int, ...]:
+        if from_year is None and to_year is None:
+            indices = self._dated + self._undated
+        else:
+            lo = 0 if from_year is None else bisect_left(self._years, from_year)
+            hi = len(self._years) if to_year is None else bisect_right(self._years, to_year)
+            indices = self._dated[lo:hi]
+
+        for key, values in filters:
+            item_field = FACET_FIELDS[key]
+            allowed = set(values)
+            indices = [i for i in indices if self.items[i][item_field] in allowed]
+
+        sort_field, sort_clause = sort
+        if sort_field == "issued_sort":
+            ordered = sorted(indices, key=lambda i: (self.items[i]["year"] or 0, i))
+        elif sort_field == "class_no_sort_s":
+            ordered = sorted(indices, key=lambda i: self.items[i]["chiSubjectClass"][0])
+        else:
+            ordered = sorted(indices)
+
+        if sort_clause == "desc":
+            ordered.reverse()
+        return tuple(ordered)
+
+
+class MockLibSP:
+    """
+        Serve a `MockCatalog` with configurable latency and error rate.
+
+        Failed requests answer 503 so the client's retry path is exercised. Facet
+        counts are only computed for the unfiltered search, which is the one the
+        scraper reads them from.
+    """
+
+    def __init__(self, catalog: MockCatalog, options: ServerOptions) -> None:
+        self.catalog = catalog
+        self.options = options
+        self.stats = RequestStats()
+        self._rng = random.Random(f"server:{catalog.options.seed}:{catalog.hostname}")
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        endpoint = request.url.path
+        started = time.perf_counter()
+
+        if self.options.latency_ms > 0:
+            mu = math.log(self.options.latency_ms / 1000)
+            await asyncio.sleep(self._rng.lognormvariate(mu, self.options.latency_sigma))
+
+        self.stats.counts[endpoint] += 1
+        try:
+            if self._rng.random() < self.options.error_rate:
+                self.stats.errors[endpoint] += 1
+                return httpx.Response(503, json={"success": False, "message": "Service Unavailable"})
+
+            if endpoint == "/find/unify/search":
+                return self._search(json.loads(request.content))
+            if endpoint == "/find/groupResource/dict":
+                return self._institution()
+            if endpoint == "/find/ePortfolio/itemList":
+                return self._ebook(int(request.url.params["recordId"]))
+            return httpx.Response(404)
+        finally:
+            self.stats.latencies[endpoint].append(time.perf_counter() - started)
+
+    def _search(self, payload: dict[str, Any]) -> httpx.Response:
+        filters = tuple(
+            (key, tuple(payload[key]))
+            for key in FACET_FIELDS
+            if payload.get(key)
+        )
+        sort = (payload["sortField"], payload["sortClause"])
+        from_year, to_year = payload.get("publishBegin"), payload.get("publishEnd")
+        indices = self.catalog.search(filters, from_year, to_year, sort)
+
+        rows = min(payload["rows"], self.options.max_rows)
+        if not rows:
+            self.stats.probes += 1
+        page = payload["page"]
+        items = []
+        if rows and page <= self.options.max_pages:
+            start = (page - 1) * rows
+            items = [self._public(self.catalog.items[i]) for i in indices[start:start + rows]]
+
+        unfiltered = not filters and from_year is None and to_year is None
+        facets = self.catalog.facets() if unfiltered and not rows else {}
+
+        return httpx.Response(200, json={
+            "success": True,
+            "message": "",
+            "data": {"numFound": len(indices), "searchResult": items, "facetResult": facets},
+        })
+
+    def _institution(self) -> httpx.Response:
+        return httpx.Response(200, json={
+            "success": True,
+            "data": {
+                "libCode": [{"groupCode": str(self.catalog.institution_id), "name": self.catalog.hostname}],
+                "docCode": [{"code": code} for code in ("1", "2", "3")],
+                "resourceType": [{"code": code} for code in ("1", "2")],
+            },
+        })
+
+    def _ebook(self, record_id: int) -> httpx.Response:
+        item = self.catalog.item(record_id)
+        sources = [{"url": f"https://{self.catalog.hostname}/read/{record_id}"}] if item and item["eCount"] else []
+        return httpx.Response(200, json={"success": True, "data": {"list": sources}})
+
+    @staticmethod
+    def _public(item: dict[str, Any]) -> dict[str, Any]:
+        return {key: value for key, value in item.items() if key != "year"}
@@ -0,0 +1,218 @@
+import json
+import time
+import asyncio
+import argparse
+import sqlite3
+import threading
+from collections import OrderedDict
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any
+
+
+DELETE_ENTRY = "DELETE FROM responses WHERE endpoint = ? AND key = ?"
+
+
+class ResponseCache:
+    """
+        Persistent cache of slow-changing API results backed by a local SQLite file.
+
+        Entries are keyed by endpoint and a canonical request key, and carry a `scope`
+        (the institution they belong to) so one institution can be invalidated alone.
+        Each endpoint has its own TTL; endpoints without one are not cached. When the
+        cache grows past `max_entries`, the least recently used entries are evicted.
+        The file can be shared by several processes.
+
+        SQLite calls block, so they run in a worker thread, one at a time. The last
+        `memory_entries` entries read or written are also kept in process, and hits on
+        them skip SQLite altogether; an invalidation by another process therefore only
+        reaches them when they expire. Reads record their access time in memory, and
+        these are written back `touch_batch` at a time rather than on every hit; times
+        still pending at exit are lost, which only affects the eviction order.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        ttls: dict[str, float],
+        max_entries: int = 1_000_000,
+        memory_entries: int = 10_000,
+        touch_batch: int = 1_000,
+    ) -> None:
+        self.path = path
+        self.ttls = ttls
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.touch_batch = touch_batch
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30.0, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                endpoint TEXT NOT NULL,
+                key TEXT NOT NULL,
+                scope TEXT NOT NULL,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (endpoint, key)
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_scope ON responses (scope)")
+        self._lock = threading.Lock()
+        self._writes = 0
+        # (endpoint, key) -> (scope, JSON value, created_at), in least recently used order.
+        self._memory: OrderedDict[tuple[str, str], tuple[str, str, float]] = OrderedDict()
+        self._touched: dict[tuple[str, str], float] = {}
+
+    async def get(self, endpoint: str, key: str) -> Any | None:
+        ttl = self.ttls.get(endpoint)
+        if not ttl:
+            return None
+
+        now = time.time()
+        entry = self._memory.get((endpoint, key))
+        if entry is None:
+            entry = await asyncio.to_thread(self._read, endpoint, key)
+            if entry is None:
+                return None
+            self._remember(endpoint, key, entry)
+
+        scope, value, created_at = entry
+        if now - created_at > ttl:
+            self._memory.pop((endpoint, key), None)
+            await asyncio.to_thread(self._execute, DELETE_ENTRY, (endpoint, key))
+            return None
+
+        self._memory.move_to_end((endpoint, key))
+        self._touched[(endpoint, key)] = now
+        if len(self._touched) >= self.touch_batch:
+            await self.flush()
+        return json.loads(value)
+
+    async def set(self, endpoint: str, key: str, value: Any, scope: str = "") -> None:
+        if not self.ttls.get(endpoint) or value is None:
+            return
+
+        now = time.time()
+        data = json.dumps(value, ensure_ascii=False)
+        self._remember(endpoint, key, (scope, data, now))
+        self._touched.pop((endpoint, key), None)
+        await asyncio.to_thread(
+            self._execute,
+            "INSERT OR REPLACE INTO responses (endpoint, key, scope, value, created_at, accessed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (endpoint, key, scope, data, now, now),
+        )
+
+        self._writes += 1
+        if self._writes % 1_000 == 0:
+            await self.flush()
+            await asyncio.to_thread(self.evict)
+
+    async def flush(self) -> None:
+        """Write the access times recorded since the last flush."""
+
+        touched, self._touched = self._touched, {}
+        if touched:
+            await asyncio.to_thread(
+                self._execute_many,
+                "UPDATE responses SET accessed_at = ? WHERE endpoint = ? AND key = ?",
+                [(accessed_at, endpoint, key) for (endpoint, key), accessed_at in touched.items()],
+            )
+
+    def evict(self) -> int:
+        """Drop the least recently used entries above `max_entries`."""
+
+        with self._lock:
+            (count,) = self._db.execute("SELECT count(*) FROM responses").fetchone()
+            excess = count - self.max_entries
+            if excess <= 0:
+                return 0
+
+            self._db.execute(
+                "DELETE FROM responses WHERE rowid IN "
+                "(SELECT rowid FROM responses ORDER BY accessed_at LIMIT ?)",
+                (excess,),
+            )
+            return excess
+
+    async def invalidate(self, endpoint: str | None = None, scope: str | None = None) -> int:
+        """Delete every entry matching the given endpoint and/or scope; all entries by default."""
+
+        for entry_key, (entry_scope, _, _) in list(self._memory.items()):
+            if endpoint in (None, entry_key[0]) and scope in (None, entry_scope):
+                del self._memory[entry_key]
+                self._touched.pop(entry_key, None)
+
+        clauses, params = [], []
+        if endpoint is not None:
+            clauses.append("endpoint = ?")
+            params.append(endpoint)
+        if scope is not None:
+            clauses.append("scope = ?")
+            params.append(scope)
+
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return await asyncio.to_thread(self._execute, f"DELETE FROM responses{where}", params)
+
+    async def close(self) -> None:
+        await self.flush()
+        with self._lock:
+            self._db.close()
+
+    def _remember(self, endpoint: str, key: str, entry: tuple[str, str, float]) -> None:
+        self._memory[(endpoint, key)] = entry
+        self._memory.move_to_end((endpoint, key))
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _read(self, endpoint: str, key: str) -> tuple[str, str, float] | None:
+        with self._lock:
+            return self._db.execute(
+                "SELECT scope, value, created_at FROM responses WHERE endpoint = ? AND key = ?",
+                (endpoint, key),
+            ).fetchone()
+
+    def _execute(self, sql: str, params: Sequence[Any]) -> int:
+        with self._lock:
+            return self._db.execute(sql, params).rowcount
+
+    def _execute_many(self, sql: str, params: list[Sequence[Any]]) -> None:
+        with self._lock:
+            self._db.executemany(sql, params)
+
+
+_response_cache: ResponseCache | None = None
+
+
+def install_response_cache(response_cache: ResponseCache | None) -> None:
+    """Make a response cache the one used by the API helpers of this process."""
+    global _response_cache
+    _response_cache = response_cache
+
+
+def get_response_cache() -> ResponseCache | None:
+    return _response_cache
+
+
+if __name__ == "__main__":
+    from chaoxing.core.config import config
+
+    parser = argparse.ArgumentParser(description="Invalidate cached API responses.")
+    parser.add_argument("--endpoint", choices=["institution", "facets", "count"])
+    parser.add_argument("--scope", help="institution abbreviation, e.g. ecnu")
+    args = parser.parse_args()
+
+    async def invalidate() -> int:
+        response_cache = ResponseCache(config.cache_file, ttls={})
+        try:
+            return await response_cache.invalidate(args.endpoint, args.scope)
+        finally:
+            await response_cache.close()
+
+    removed = asyncio.run(invalidate())
+    print(f"Removed {removed} cached responses.")
@@ -1,13 +1,13 @@
 import httpx
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+
+from chaoxing.api.resilience import send
+from chaoxing.core.metrics import metrics
+
+
+class EbookError(Exception):
+    pass
 
 
-@retry(
-    stop=stop_after_attempt(5),
-    wait=wait_exponential(multiplier=1, min=1, max=10),
-    retry=retry_if_exception_type((httpx.RequestError, httpx.HTTPError)),
-    reraise=True
-)
 async def fetch_ebook_url(client: httpx.AsyncClient, hostname: str, record_id: int) -> str | None:
     url = f"https://{hostname}/find/ePortfolio/itemList"
     params = {
@@ -21,13 +21,14 @@ async def fetch_ebook_url(client: httpx.AsyncClient, hostname: str, record_id: i
         "Origin": f"https://{hostname}",
         "Referer": f"https://{hostname}/"
     }
-    response = await client.get(url, params=params, headers=headers)
-    response.raise_for_status()
+    response = await send(hostname, "ebook", lambda: client.get(url, params=params, headers=headers))
 
-    data = response.json()
+    with metrics.timer("json_decode_seconds", endpoint="ebook"):
+        data = response.json()
 
+    # A failed lookup says nothing about the record, unlike an empty list of sources.
     if not data["success"]:
-        return None
+        raise EbookError(f"Ebook lookup of {record_id} failed: {data.get('message')}")
 
     sources = data["data"]["list"]
     return sources[0]["url"] if sources else None
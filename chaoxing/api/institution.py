@@ -1,16 +1,16 @@
 import httpx
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
+from chaoxing.api.cache import get_response_cache
+from chaoxing.api.resilience import send
+from chaoxing.core.metrics import metrics
 from chaoxing.models.institution_model import Institution
 
 
-@retry(
-    stop=stop_after_attempt(5),
-    wait=wait_exponential(multiplier=1, min=1, max=10),
-    retry=retry_if_exception_type((httpx.RequestError, httpx.HTTPError)),
-    reraise=True
-)
 async def fetch_institution(client: httpx.AsyncClient, hostname: str) -> Institution | None:
+    cache = get_response_cache()
+    if cache and (cached := await cache.get("institution", hostname)) is not None:
+        return Institution.model_validate(cached)
+
     url = f"https://{hostname}/find/groupResource/dict"
     headers = {
         "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:144.0) Gecko/20100101 Firefox/144.0",
@@ -18,17 +18,17 @@ async def fetch_institution(client: httpx.AsyncClient, hostname: str) -> Institu
         "Origin": f"https://{hostname}",
         "Referer": f"https://{hostname}/"
     }
-    response = await client.post(url, headers=headers)
-    response.raise_for_status()
+    response = await send(hostname, "institution", lambda: client.post(url, headers=headers))
 
-    data = response.json()
+    with metrics.timer("json_decode_seconds", endpoint="institution"):
+        data = response.json()
 
     if not data["success"]:
         return None
 
     result = data["data"]
     institution_data = result["libCode"][0]
-    return Institution(
+    institution = Institution(
         id=int(institution_data["groupCode"]),
         name=institution_data["name"],
         hostname=hostname,
@@ -36,3 +36,7 @@ async def fetch_institution(client: httpx.AsyncClient, hostname: str) -> Institu
         resource_types=[resource_type["code"] for resource_type in result["resourceType"]]
     )
 
+    if cache:
+        await cache.set("institution", hostname, institution.model_dump(), scope=institution.abbrv)
+    return institution
+
@@ -0,0 +1,230 @@
+import time
+import random
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import httpx
+
+from chaoxing.api.throttle import throttle
+from chaoxing.core.config import config
+from chaoxing.core.metrics import metrics
+
+
+logger = logging.getLogger(__name__)
+
+
+RETRYABLE_STATUSES = frozenset({408, 429})
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request to a host that kept failing for too long."""
+
+
+@dataclass
+class HostState:
+    budget: float
+    failures: int = 0
+    # Monotonic time until which the circuit is open; None while it is closed.
+    open_until: float | None = None
+    open_seconds: float = 0.0
+    probing: bool = False
+
+
+class HostResilience:
+    """
+        Retries, retry budget and circuit breaker shared by every request to a host.
+
+        A request is retried on transport errors, 408, 429 and 5xx responses, after a
+        full-jitter exponential backoff or the server's `Retry-After`, whichever is longer.
+        Other 4xx responses fail at once. Each request adds `budget_ratio` to the host's
+        retry budget and each retry spends one, so a failing host gets a bounded share of
+        extra load instead of every in-flight request retrying in lockstep.
+
+        After `failure_threshold` consecutive failures the host's circuit opens and new
+        requests wait. When it is due, a single probe request is let through: success
+        closes the circuit, failure reopens it for twice as long. Requests that wait more
+        than `max_wait` raise `CircuitOpenError`.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 5,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        budget_ratio: float = 0.2,
+        budget_cap: float = 20.0,
+        failure_threshold: int = 5,
+        open_seconds: float = 30.0,
+        max_open_seconds: float = 600.0,
+        max_wait: float = 300.0,
+    ) -> None:
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget_ratio = budget_ratio
+        self.budget_cap = budget_cap
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.max_wait = max_wait
+        self._hosts: dict[str, HostState] = {}
+
+    def state(self, hostname: str) -> HostState:
+        state = self._hosts.get(hostname)
+        if state is None:
+            state = self._hosts[hostname] = HostState(budget=self.budget_cap)
+        return state
+
+    async def send(
+        self,
+        hostname: str,
+        endpoint: str,
+        request: Callable[[], Awaitable[httpx.Response]],
+    ) -> httpx.Response:
+        """Send `request` to `hostname` and return its successful response, retrying as allowed."""
+
+        state = self.state(hostname)
+        state.budget = min(self.budget_cap, state.budget + self.budget_ratio)
+
+        attempt = 1
+        while True:
+            probe = await self._admit(hostname, state)
+            with metrics.timer("rate_limit_wait_seconds", host=hostname):
+                await throttle(hostname)
+
+            response: httpx.Response | None = None
+            try:
+                with metrics.timer("http_request_seconds", endpoint=endpoint, host=hostname):
+                    response = await request()
+                metrics.inc("http_responses_total", endpoint=endpoint, host=hostname, status=str(response.status_code))
+                error: Exception | None = None
+                if is_retryable(response.status_code):
+                    error = httpx.HTTPStatusError(
+                        f"{response.status_code} from {hostname}", request=response.request, response=response
+                    )
+            except httpx.RequestError as e:
+                error = e
+            except BaseException:
+                # Let another request probe the host if this one was cancelled or broke.
+                if probe:
+                    state.probing = False
+                raise
+
+            if error is None:
+                self._record_success(state)
+                response.raise_for_status()
+                return response
+
+            self._record_failure(hostname, state, probe)
+
+            if attempt >= self.max_attempts:
+                raise error
+            if state.budget < 1:
+                metrics.inc("retry_budget_exhausted_total", endpoint=endpoint, host=hostname)
+                raise error
+
+            state.budget -= 1
+            metrics.inc("http_retries_total", endpoint=endpoint, reason=type(error).__name__)
+            await asyncio.sleep(self._backoff(attempt, response))
+            attempt += 1
+
+    async def _admit(self, hostname: str, state: HostState) -> bool:
+        """Wait until the host's circuit lets this request through; return whether it is the probe."""
+
+        started = time.monotonic()
+        while state.open_until is not None:
+            now = time.monotonic()
+            if now >= state.open_until and not state.probing:
+                state.probing = True
+                return True
+            if now - started > self.max_wait:
+                raise CircuitOpenError(f"Circuit for {hostname} has been open for over {self.max_wait:.0f}s.")
+            await asyncio.sleep(max(0.1, min(1.0, state.open_until - now)))
+        return False
+
+    def _record_success(self, state: HostState) -> None:
+        state.failures = 0
+        state.open_until = None
+        state.open_seconds = 0.0
+        state.probing = False
+
+    def _record_failure(self, hostname: str, state: HostState, probe: bool) -> None:
+        state.failures += 1
+        if probe:
+            state.probing = False
+            state.open_seconds = min(self.max_open_seconds, state.open_seconds * 2)
+        elif state.open_until is None and state.failures >= self.failure_threshold:
+            state.open_seconds = self.open_seconds
+        else:
+            return
+
+        state.open_until = time.monotonic() + state.open_seconds
+        metrics.inc("circuit_open_total", host=hostname)
+        logger.warning(f"Pausing requests to {hostname} for {state.open_seconds:.0f}s after {state.failures} failures.")
+
+    def _backoff(self, attempt: int, response: httpx.Response | None) -> float:
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        retry_after = parse_retry_after(response) if response is not None else None
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_open_seconds))
+        return delay
+
+
+def is_retryable(status_code: int) -> bool:
+    return status_code in RETRYABLE_STATUSES or status_code >= 500
+
+
+def parse_retry_after(response: httpx.Response) -> float | None:
+    """Seconds to wait according to a `Retry-After` header given in seconds or as an HTTP date."""
+
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def create_resilience() -> HostResilience:
+    return HostResilience(
+        max_attempts=config.retry_max_attempts,
+        base_delay=config.retry_base_delay,
+        max_delay=config.retry_max_delay,
+        budget_ratio=config.retry_budget_ratio,
+        failure_threshold=config.circuit_failure_threshold,
+        open_seconds=config.circuit_open_seconds,
+        max_wait=config.circuit_max_wait,
+    )
+
+
+_resilience: HostResilience | None = None
+
+
+def get_resilience() -> HostResilience:
+    """The resilience layer of this process, created from the config on first use."""
+    global _resilience
+    if _resilience is None:
+        _resilience = create_resilience()
+    return _resilience
+
+
+async def send(
+    hostname: str,
+    endpoint: str,
+    request: Callable[[], Awaitable[httpx.Response]],
+) -> httpx.Response:
+    return await get_resilience().send(hostname, endpoint, request)
@@ -1,8 +1,11 @@
-from dataclasses import dataclass, field, replace
+import json
+import hashlib
+from dataclasses import asdict, dataclass, field, replace
 
 import httpx
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
+from chaoxing.api.resilience import send
+from chaoxing.core.metrics import metrics
 from chaoxing.models.search_model import SearchResult
 
 
@@ -13,8 +16,8 @@ class SearchParams:
     query: str = "*"
     page: int = 1
     rows: int = 50
-    from_year: int = 1850
-    to_year: int = 2025
+    from_year: int | None = None
+    to_year: int | None = None
     sort_field: str = "relevance"
     sort_clause: str = "desc"
     doc_codes: list[str] = field(default_factory=list)
@@ -40,19 +43,27 @@ class SearchParams:
     def copy(self, **overrides):
         return replace(self, **overrides)
 
+    def canonical(self, *exclude: str) -> str:
+        """Serialize the params to a stable JSON string, leaving out the `exclude` fields."""
+        data = asdict(self)
+        for name in exclude:
+            del data[name]
+        return json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+
+    def partition_key(self) -> str:
+        """Stable signature of the result set these params page through, ignoring the page."""
+        canonical = self.canonical("page", "count_only")
+        return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).hexdigest()
+
 
 class SearchError(Exception):
     pass
 
 
-@retry(
-    stop=stop_after_attempt(5),
-    wait=wait_exponential(multiplier=1, min=1, max=10),
-    retry=retry_if_exception_type((httpx.RequestError, httpx.HTTPError)),
-    reraise=True
-)
 async def search_libsp(client: httpx.AsyncClient, params: SearchParams) -> SearchResult:
-    base_url = f"https://find{params.institution_abbrv}.libsp.cn"
+    hostname = f"find{params.institution_abbrv}.libsp.cn"
+    endpoint = "count" if params.count_only else "search"
+    base_url = f"https://{hostname}"
     url = f"{base_url}/find/unify/search"
     headers = {
         "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:144.0) Gecko/20100101 Firefox/144.0",
@@ -68,8 +79,6 @@ async def search_libsp(client: httpx.AsyncClient, params: SearchParams) -> Searc
         "rows": params.rows if not params.count_only else 0,
         "sortField": params.sort_field,
         "sortClause": params.sort_clause,
-        "publishBegin": params.from_year,
-        "publishEnd": params.to_year,
         "docCode": params.doc_codes,
         "resourceType": params.resource_types,
         "litCode": params.lit_codes,
@@ -88,9 +97,19 @@ async def search_libsp(client: httpx.AsyncClient, params: SearchParams) -> Searc
         "group": params.groups,
         "newCoreInclude": params.core_includes,
     }
-    response = await client.post(url, headers=headers, json=payload)
-    response.raise_for_status()
-    data = response.json()
+    # Open year bounds are left out rather than sent as null, like an unset filter in
+    # the web UI; only the mock backend is known to accept nulls.
+    if params.from_year is not None:
+        payload["publishBegin"] = params.from_year
+    if params.to_year is not None:
+        payload["publishEnd"] = params.to_year
+    # Latency grows with the page size, so each size is judged against its own baseline.
+    extensions = {"latency_class": f"{endpoint}:{payload['rows']}"}
+    response = await send(
+        hostname, endpoint, lambda: client.post(url, headers=headers, json=payload, extensions=extensions)
+    )
+    with metrics.timer("json_decode_seconds", endpoint=endpoint):
+        data = response.json()
 
     if not data["success"]:
         raise SearchError(f"An error occured: {data['message']}")
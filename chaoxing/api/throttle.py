@@ -0,0 +1,15 @@
+from tusk.rate_limit import SharedRateLimiter
+
+
+_rate_limiter: SharedRateLimiter | None = None
+
+
+def install_rate_limiter(rate_limiter: SharedRateLimiter | None) -> None:
+    """Make a shared rate limiter the request budget of this process."""
+    global _rate_limiter
+    _rate_limiter = rate_limiter
+
+
+async def throttle(hostname: str) -> None:
+    if _rate_limiter is not None:
+        await _rate_limiter.acquire(hostname)
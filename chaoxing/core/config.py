@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Literal
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -14,10 +15,60 @@ class Config(BaseSettings):
     postgres_db: str
     db_pool_size: int
     db_max_overflow: int
+    db_batch_size: int = 5_000
+    db_flush_interval: float = 5.0
+    sink: Literal["db", "spool"] = "db"
+    spool_dir: Path = BASE_DIR / "spool"
+    spool_segment_size: int = 64 * 1024 * 1024
+    spool_fsync_interval: float = 1.0
     concurrency_limit: int = 20
+    adaptive_concurrency: bool = False
+    min_concurrency: int = 2
+    max_concurrency: int = 100
+    planner_concurrency: int = 10
+    page_queue_size: int = 1_000
+    dedup_skip_after_pages: int = 0
+    probe_page_limits: bool = True
+    probe_max_rows: int = 500
+    probe_max_records: int = 100_000
+    page_limits_max_age: float = 30 * 24 * 3600
+    refresh: bool = False
+    ebook_concurrency: int = 20
+    ebook_batch_size: int = 1_000
     max_workers: int = 20
+    jobs_per_worker: int = 4
+    job_pages: int = 50
+    job_timeout: float = 1800.0
+    job_poll_interval: float = 5.0
+    job_max_attempts: int = 3
+    db_connection_budget: int = 80
+    retry_max_attempts: int = 5
+    retry_base_delay: float = 0.5
+    retry_max_delay: float = 30.0
+    retry_budget_ratio: float = 0.2
+    circuit_failure_threshold: int = 5
+    circuit_open_seconds: float = 30.0
+    circuit_max_wait: float = 300.0
+    global_rate_limit: float | None = None
+    host_rate_limit: float | None = None
+    response_cache: bool = True
+    cache_file: Path = BASE_DIR / ".cache" / "responses.sqlite3"
+    cache_max_entries: int = 1_000_000
+    cache_ttl_institution: float = 7 * 24 * 3600
+    cache_ttl_facets: float = 24 * 3600
+    cache_ttl_count: float = 24 * 3600
+    metrics_dir: Path | None = None
+    metrics_interval: float = 10.0
+    profile_dir: Path | None = None
+    profile_memory: bool = True
+    profile_lag_interval: float = 0.1
+    profile_top: int = 30
     debug: bool = False
     log_level: str = "INFO"
+    log_max_bytes: int = 100 * 1024 * 1024
+    log_backup_count: int = 5
+    log_rate_limit: float | None = 5.0
+    log_burst: int = 20
 
 
     model_config = SettingsConfigDict(
@@ -1,11 +1,64 @@
-import logging
 import sys
+import time
+import queue
+import atexit
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
+from typing import Any
 
+from chaoxing.core.config import config
+from chaoxing.core.metrics import metrics
 
-def setup_logging(log_level: str = "INFO", log_file: Path | None = None,) -> None:
-    root_logger = logging.getLogger()
-    root_logger.setLevel(log_level.upper())
+
+class RateLimitFilter(logging.Filter):
+    """
+        Token bucket per logging call site, so a hot-path line cannot flood the log.
+
+        Each call site (file and line) may log `burst` records at once and `rate` per
+        second after that; the rest are dropped. The next record that gets through
+        from that call site says how many were dropped in between.
+    """
+
+    def __init__(self, rate: float, burst: int) -> None:
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self._buckets: dict[tuple[str, int], list[float]] = {}
+        self._dropped: dict[tuple[str, int], int] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        site = (record.pathname, record.lineno)
+        now = time.monotonic()
+
+        with self._lock:
+            bucket = self._buckets.get(site)
+            if bucket is None:
+                bucket = self._buckets[site] = [float(self.burst), now]
+            tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if tokens < 1:
+                bucket[0] = tokens
+                self._dropped[site] = self._dropped.get(site, 0) + 1
+                metrics.inc("log_records_dropped_total", logger=record.name)
+                return False
+            bucket[0] = tokens - 1
+            dropped = self._dropped.pop(site, 0)
+
+        if dropped:
+            record.msg = f"{record.getMessage()} [{dropped} similar messages dropped]"
+            record.args = None
+        return True
+
+
+def create_handlers(
+    log_file: Path | None = None,
+    max_bytes: int | None = None,
+    backup_count: int | None = None,
+) -> list[logging.Handler]:
+    """Console handler, plus a size-bounded rotating file handler when `log_file` is given."""
 
     formatter = logging.Formatter(
         fmt="%(asctime)s [%(processName)s] [%(levelname)s] [%(name)s] %(message)s",
@@ -14,10 +67,60 @@ def setup_logging(log_level: str = "INFO", log_file: Path | None = None,) -> Non
 
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(formatter)
-    root_logger.addHandler(console_handler)
+    handlers: list[logging.Handler] = [console_handler]
 
     if log_file:
         log_file.parent.mkdir(parents=True, exist_ok=True)
-        file_handler = logging.FileHandler(log_file, encoding="utf-8")
+        file_handler = RotatingFileHandler(
+            log_file,
+            maxBytes=config.log_max_bytes if max_bytes is None else max_bytes,
+            backupCount=config.log_backup_count if backup_count is None else backup_count,
+            encoding="utf-8",
+        )
         file_handler.setFormatter(formatter)
-        root_logger.addHandler(file_handler)
+        handlers.append(file_handler)
+
+    return handlers
+
+
+def setup_worker_logging(log_queue: Any, log_level: str = "INFO") -> None:
+    """
+        Send this process's log records to `log_queue` instead of writing them.
+
+        Records are rate limited per call site before they are queued, and putting one
+        on the queue never waits on disk, so logging does not hold up the event loop.
+    """
+
+    root_logger = logging.getLogger()
+    root_logger.setLevel(log_level.upper())
+    for handler in list(root_logger.handlers):
+        root_logger.removeHandler(handler)
+
+    queue_handler = QueueHandler(log_queue)
+    if config.log_rate_limit:
+        queue_handler.addFilter(RateLimitFilter(config.log_rate_limit, config.log_burst))
+    root_logger.addHandler(queue_handler)
+
+
+def setup_logging(
+    log_level: str = "INFO",
+    log_file: Path | None = None,
+    log_queue: Any | None = None,
+) -> QueueListener:
+    """
+        Log this process through a queue drained by a background writer thread.
+
+        Pass a `multiprocessing` queue as `log_queue` and hand it to spawned workers,
+        which call `setup_worker_logging` with it; every process then logs through the
+        single writer of this one. The writer is flushed and stopped at exit.
+    """
+
+    if log_queue is None:
+        log_queue = queue.SimpleQueue()
+
+    listener = QueueListener(log_queue, *create_handlers(log_file), respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    setup_worker_logging(log_queue, log_level)
+    return listener
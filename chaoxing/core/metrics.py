@@ -0,0 +1,208 @@
+import os
+import json
+import time
+import asyncio
+import logging
+import threading
+from bisect import bisect_left
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+
+logger = logging.getLogger(__name__)
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+Labels = tuple[tuple[str, str], ...]
+
+
+class Metrics:
+    """
+        In-process registry of counters, gauges and latency histograms.
+
+        Series are keyed by metric name and a set of string labels. Histograms share
+        the fixed `LATENCY_BUCKETS`, so snapshots of several processes can be merged
+        by adding them up. Updates are cheap enough for the per-request hot path and
+        safe to read from another thread.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters: dict[tuple[str, Labels], float] = {}
+        self._gauges: dict[tuple[str, Labels], float] = {}
+        # Per series: bucket counts (plus one overflow bucket), sum and count.
+        self._histograms: dict[tuple[str, Labels], list] = {}
+
+    def inc(self, name: str, amount: float = 1, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def set(self, name: str, value: float, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._gauges[key] = value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            series = self._histograms.get(key)
+            if series is None:
+                series = self._histograms[key] = [[0] * (len(LATENCY_BUCKETS) + 1), 0.0, 0]
+            series[0][bisect_left(LATENCY_BUCKETS, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def merge(self, snapshot: dict[str, Any]) -> None:
+        """Add another snapshot's series to this registry; gauges are summed as well."""
+
+        for name, labels, value in snapshot["counters"]:
+            self.inc(name, value, **labels)
+
+        with self._lock:
+            for name, labels, value in snapshot["gauges"]:
+                key = (name, tuple(sorted(labels.items())))
+                self._gauges[key] = self._gauges.get(key, 0) + value
+
+            for name, labels, buckets, total, count in snapshot["histograms"]:
+                key = (name, tuple(sorted(labels.items())))
+                series = self._histograms.get(key)
+                if series is None:
+                    series = self._histograms[key] = [[0] * (len(LATENCY_BUCKETS) + 1), 0.0, 0]
+                series[0] = [a + b for a, b in zip(series[0], buckets)]
+                series[1] += total
+                series[2] += count
+
+    @contextmanager
+    def timer(self, name: str, **labels: str) -> Iterator[None]:
+        """Observe the duration of the block in the `name` histogram."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def snapshot(self) -> dict[str, Any]:
+        """JSON-serializable copy of every series."""
+
+        with self._lock:
+            return {
+                "counters": [[name, dict(labels), value] for (name, labels), value in self._counters.items()],
+                "gauges": [[name, dict(labels), value] for (name, labels), value in self._gauges.items()],
+                "histograms": [
+                    [name, dict(labels), list(buckets), total, count]
+                    for (name, labels), (buckets, total, count) in self._histograms.items()
+                ],
+            }
+
+
+def merge_snapshots(snapshots: list[dict[str, Any]]) -> dict[str, Any]:
+    merged = Metrics()
+    for snapshot in snapshots:
+        merged.merge(snapshot)
+    return merged.snapshot()
+
+
+def to_prometheus(snapshot: dict[str, Any]) -> str:
+    """Render a snapshot in the Prometheus text exposition format."""
+
+    def render_labels(labels: dict[str, str], **extra: str) -> str:
+        pairs = {**labels, **extra}
+        if not pairs:
+            return ""
+        escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"') for value in pairs.values())
+        return "{" + ",".join(f'{key}="{value}"' for key, value in zip(pairs, escaped)) + "}"
+
+    lines: list[str] = []
+    typed: set[str] = set()
+
+    def declare(name: str, kind: str) -> None:
+        if name not in typed:
+            typed.add(name)
+            lines.append(f"# TYPE {name} {kind}")
+
+    for name, labels, value in sorted(snapshot["counters"], key=lambda series: series[0]):
+        declare(name, "counter")
+        lines.append(f"{name}{render_labels(labels)} {value}")
+
+    for name, labels, value in sorted(snapshot["gauges"], key=lambda series: series[0]):
+        declare(name, "gauge")
+        lines.append(f"{name}{render_labels(labels)} {value}")
+
+    for name, labels, buckets, total, count in sorted(snapshot["histograms"], key=lambda series: series[0]):
+        declare(name, "histogram")
+        cumulative = 0
+        for bound, bucket in zip((*LATENCY_BUCKETS, "+Inf"), buckets):
+            cumulative += bucket
+            lines.append(f"{name}_bucket{render_labels(labels, le=str(bound))} {cumulative}")
+        lines.append(f"{name}_sum{render_labels(labels)} {total}")
+        lines.append(f"{name}_count{render_labels(labels)} {count}")
+
+    return "\n".join(lines) + "\n"
+
+
+def write_snapshot(snapshot: dict[str, Any], directory: Path, name: str) -> None:
+    """Write `<name>.json` and `<name>.prom` atomically, so readers never see partial files."""
+
+    directory.mkdir(parents=True, exist_ok=True)
+    for suffix, content in ((".json", json.dumps(snapshot)), (".prom", to_prometheus(snapshot))):
+        path = directory / f"{name}{suffix}"
+        tmp_path = path.with_suffix(f"{suffix}.tmp")
+        tmp_path.write_text(content, encoding="utf-8")
+        os.replace(tmp_path, path)
+
+
+def aggregate_worker_snapshots(directory: Path) -> dict[str, Any]:
+    """Merge the latest snapshot of every worker in `directory` into `metrics.json` and `metrics.prom`."""
+
+    snapshots = []
+    for path in directory.glob("worker-*.json"):
+        try:
+            snapshots.append(json.loads(path.read_text(encoding="utf-8")))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Skipping unreadable metrics snapshot {path}: {e}")
+
+    merged = merge_snapshots(snapshots)
+    write_snapshot(merged, directory, "metrics")
+    return merged
+
+
+class MetricsExporter:
+    """
+        Periodically write this process's metrics to `worker-<pid>` files in a directory.
+
+        Used as an async context manager around a scrape; a last snapshot is written on
+        exit. `main.py` merges the worker files into one aggregate.
+    """
+
+    def __init__(self, directory: Path, interval: float = 10.0) -> None:
+        self.directory = directory
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+
+    async def __aenter__(self) -> "MetricsExporter":
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self.export()
+
+    def export(self) -> None:
+        try:
+            write_snapshot(metrics.snapshot(), self.directory, f"worker-{os.getpid()}")
+        except OSError as e:
+            logger.warning(f"Failed to write metrics snapshot to {self.directory}: {e}")
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            self.export()
+
+
+metrics = Metrics()
@@ -0,0 +1,251 @@
+import io
+import os
+import json
+import time
+import pstats
+import asyncio
+import argparse
+import cProfile
+import logging
+import tracemalloc
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+from chaoxing.core.metrics import metrics
+
+
+logger = logging.getLogger(__name__)
+
+
+REPORT_FILE = "report.txt"
+
+
+@dataclass
+class SectionStats:
+    """Wall time, event loop lag and traced memory seen while one tag was being worked on."""
+
+    tag: str
+    runs: int = 0
+    seconds: float = 0.0
+    lag_samples: int = 0
+    lag_total: float = 0.0
+    lag_max: float = 0.0
+    peak_memory: int = 0
+
+    def merge(self, other: "SectionStats") -> None:
+        self.runs += other.runs
+        self.seconds += other.seconds
+        self.lag_samples += other.lag_samples
+        self.lag_total += other.lag_total
+        self.lag_max = max(self.lag_max, other.lag_max)
+        self.peak_memory = max(self.peak_memory, other.peak_memory)
+
+
+class WorkerProfiler:
+    """
+        Profile a worker process from entry to exit.
+
+        A deterministic `cProfile` profiler and, with `trace_memory`, `tracemalloc` run for
+        the whole worker, and a monitor task measures how late the event loop wakes up
+        every `lag_interval` seconds. Work wrapped in `profile_section(tag)` is charged
+        with the lag and traced memory sampled while it runs; several sections can be
+        active at once, as concurrent institutions share the loop. On exit the profile
+        and section stats are written as `profile-<pid>.prof` and `.json`.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        lag_interval: float = 0.1,
+        trace_memory: bool = True,
+        top: int = 30,
+    ) -> None:
+        self.directory = directory
+        self.lag_interval = lag_interval
+        self.trace_memory = trace_memory
+        self.top = top
+
+        self.sections: dict[str, SectionStats] = {}
+        self._active: dict[str, int] = {}
+        self._profile = cProfile.Profile()
+        self._monitor: asyncio.Task | None = None
+
+    async def __aenter__(self) -> "WorkerProfiler":
+        global _profiler
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self._monitor = asyncio.create_task(self._watch_loop())
+        self._profile.enable()
+        _profiler = self
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        global _profiler
+
+        _profiler = None
+        self._profile.disable()
+        if self._monitor is not None:
+            self._monitor.cancel()
+            self._monitor = None
+
+        try:
+            self.write()
+        except OSError as e:
+            logger.warning(f"Failed to write profile to {self.directory}: {e}")
+        finally:
+            if tracemalloc.is_tracing():
+                tracemalloc.stop()
+
+    @contextmanager
+    def section(self, tag: str) -> Iterator[None]:
+        stats = self.sections.get(tag)
+        if stats is None:
+            stats = self.sections[tag] = SectionStats(tag)
+
+        self._active[tag] = self._active.get(tag, 0) + 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            stats.runs += 1
+            stats.seconds += time.perf_counter() - started
+            self._active[tag] -= 1
+            if not self._active[tag]:
+                del self._active[tag]
+
+    def write(self) -> None:
+        name = f"profile-{os.getpid()}"
+        self._profile.dump_stats(self.directory / f"{name}.prof")
+
+        peak_memory = 0
+        allocations: list[list[Any]] = []
+        if tracemalloc.is_tracing():
+            peak_memory = tracemalloc.get_traced_memory()[1]
+            statistics = tracemalloc.take_snapshot().statistics("lineno")[:self.top]
+            allocations = [[str(stat.traceback), stat.size, stat.count] for stat in statistics]
+
+        data = {
+            "pid": os.getpid(),
+            "peak_memory": peak_memory,
+            "sections": [asdict(stats) for stats in self.sections.values()],
+            "allocations": allocations,
+        }
+        path = self.directory / f"{name}.json"
+        tmp = path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(data), encoding="utf-8")
+        os.replace(tmp, path)
+
+    async def _watch_loop(self) -> None:
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.lag_interval)
+            lag = max(0.0, time.monotonic() - started - self.lag_interval)
+            metrics.observe("event_loop_lag_seconds", lag)
+
+            memory = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+            for tag in self._active:
+                stats = self.sections[tag]
+                stats.lag_samples += 1
+                stats.lag_total += lag
+                stats.lag_max = max(stats.lag_max, lag)
+                stats.peak_memory = max(stats.peak_memory, memory)
+
+
+_profiler: WorkerProfiler | None = None
+
+
+@contextmanager
+def profile_section(tag: str) -> Iterator[None]:
+    """Charge the enclosed work to `tag` in this worker's profile; a no-op when profiling is off."""
+
+    if _profiler is None:
+        yield
+        return
+
+    with _profiler.section(tag):
+        yield
+
+
+def clear_profiles(directory: Path) -> None:
+    """Remove the per-worker files of an earlier run, so they are not merged into this one."""
+    for path in directory.glob("profile-*.*"):
+        path.unlink()
+
+
+def write_profile_report(directory: Path, top: int = 30) -> Path | None:
+    """
+        Merge the per-worker profiles in `directory` into one text report.
+
+        The report lists the top functions by cumulative and own time over all workers,
+        per-tag wall time, event loop lag and peak traced memory, and the largest
+        allocation sites. Returns its path, or None when no worker wrote a profile.
+    """
+
+    profiles = sorted(str(path) for path in directory.glob("profile-*.prof"))
+    if not profiles:
+        return None
+
+    sections: dict[str, SectionStats] = {}
+    allocations: dict[str, list[int]] = {}
+    workers: list[tuple[int, int]] = []
+    for path in sorted(directory.glob("profile-*.json")):
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Skipping unreadable profile {path.name}: {e}")
+            continue
+
+        workers.append((data["pid"], data["peak_memory"]))
+        for entry in data["sections"]:
+            stats = SectionStats(**entry)
+            sections.setdefault(stats.tag, SectionStats(stats.tag)).merge(stats)
+        for where, size, count in data["allocations"]:
+            total = allocations.setdefault(where, [0, 0])
+            total[0] += size
+            total[1] += count
+
+    out = io.StringIO()
+    out.write(f"Profiles merged from {len(profiles)} workers in {directory}\n\n")
+
+    out.write("Workers (pid, peak traced memory):\n")
+    for pid, peak_memory in workers:
+        out.write(f"  {pid:>8}  {peak_memory / 2 ** 20:>10.1f} MiB\n")
+
+    out.write("\nSections:\n")
+    out.write(f"  {'tag':<40}{'runs':>6}{'seconds':>11}{'lag mean':>11}{'lag max':>11}{'peak MiB':>11}\n")
+    for stats in sorted(sections.values(), key=lambda stats: stats.seconds, reverse=True):
+        lag_mean = stats.lag_total / stats.lag_samples if stats.lag_samples else 0.0
+        out.write(
+            f"  {stats.tag:<40}{stats.runs:>6}{stats.seconds:>11.1f}{lag_mean * 1000:>9.1f}ms"
+            f"{stats.lag_max * 1000:>9.1f}ms{stats.peak_memory / 2 ** 20:>11.1f}\n"
+        )
+
+    out.write("\nLargest allocation sites (summed over workers at exit):\n")
+    for where, (size, count) in sorted(allocations.items(), key=lambda item: item[1][0], reverse=True)[:top]:
+        out.write(f"  {size / 2 ** 20:>10.2f} MiB {count:>10} blocks  {where}\n")
+
+    stats = pstats.Stats(*profiles, stream=out)
+    stats.strip_dirs()
+    out.write("\nTop functions by cumulative time:\n")
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(top)
+    out.write("\nTop functions by own time:\n")
+    stats.sort_stats(pstats.SortKey.TIME).print_stats(top)
+
+    report = directory / REPORT_FILE
+    report.write_text(out.getvalue(), encoding="utf-8")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Merge per-worker profiles into one report.")
+    parser.add_argument("directory", type=Path)
+    parser.add_argument("--top", type=int, default=30)
+    args = parser.parse_args()
+
+    report_path = write_profile_report(args.directory, args.top)
+    print(report_path.read_text(encoding="utf-8") if report_path else f"No profiles found in {args.directory}.")
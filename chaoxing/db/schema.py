@@ -1,7 +1,14 @@
-from sqlalchemy import String, Text, Integer, BigInteger, Float, Boolean, DateTime, ForeignKey, func
+from sqlalchemy import (
+    String, Text, Integer, BigInteger, Float, Boolean, DateTime, ForeignKey, Index, UniqueConstraint, event, func, text
+)
+from sqlalchemy.dialects.postgresql import ARRAY, TSVECTOR
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 
+# Hash partitions of `records`; changing it requires repartitioning the table.
+RECORD_PARTITIONS = 16
+
+
 class Base(DeclarativeBase):
     pass
 
@@ -13,6 +20,7 @@ class Progress(Base):
         ForeignKey("institution.abbrv"),
         primary_key=True
     )
+    partition_key: Mapped[str] = mapped_column(String, primary_key=True)
     page_num: Mapped[int] = mapped_column(BigInteger, primary_key=True)
     scraped: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
     updated_at: Mapped[DateTime] = mapped_column(
@@ -23,18 +31,81 @@ class Progress(Base):
     )
 
 
+class PartitionCount(Base):
+    __tablename__ = "partition_counts"
+
+    institution_abbrv: Mapped[str] = mapped_column(
+        ForeignKey("institution.abbrv"),
+        primary_key=True
+    )
+    partition_key: Mapped[str] = mapped_column(String, primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, nullable=False)
+    pages: Mapped[int] = mapped_column(Integer, nullable=False)
+    complete: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    updated_at: Mapped[DateTime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False
+    )
+
+
+class ScrapeJob(Base):
+    __tablename__ = "scrape_jobs"
+    __table_args__ = (
+        UniqueConstraint("hostname", "kind", "partition_key", "first_page"),
+        # Claim order of idle workers.
+        Index("scrape_jobs_claim_idx", "status", "priority", "id"),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    kind: Mapped[str] = mapped_column(String, nullable=False)
+    hostname: Mapped[str] = mapped_column(String, nullable=False)
+    partition_key: Mapped[str] = mapped_column(String, nullable=False, default="")
+    params: Mapped[str] = mapped_column(Text, nullable=True)
+    first_page: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_page: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    priority: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    status: Mapped[str] = mapped_column(String, nullable=False, default="pending")
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    claimed_by: Mapped[str] = mapped_column(String, nullable=True)
+    claimed_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), nullable=True)
+    error: Mapped[str] = mapped_column(Text, nullable=True)
+    updated_at: Mapped[DateTime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False
+    )
+
+
 class Institution(Base):
     __tablename__ = "institution"
 
     id: Mapped[str] = mapped_column(Integer, primary_key=True)
     abbrv: Mapped[str] = mapped_column(String, unique=True, nullable=False)
     name: Mapped[str] = mapped_column(Text, nullable=False)
-    doc_codes: Mapped[str] = mapped_column(Text, nullable=False)
-    resource_types: Mapped[str] = mapped_column(Text, nullable=False)
+    doc_codes: Mapped[list[str]] = mapped_column(ARRAY(Text), nullable=False)
+    resource_types: Mapped[list[str]] = mapped_column(ARRAY(Text), nullable=False)
+    # Pagination window found by the page limit probe; null until probed.
+    max_rows: Mapped[int] = mapped_column(Integer, nullable=True)
+    max_pages: Mapped[int] = mapped_column(Integer, nullable=True)
+    limits_probed_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), nullable=True)
 
 
 class Record(Base):
     __tablename__ = "records"
+    __table_args__ = (
+        # Keyset order of incremental exports.
+        Index("records_updated_at_id_idx", "updated_at", "id"),
+        Index("records_search_vector_idx", "search_vector", postgresql_using="gin"),
+        # Containment and overlap lookups, e.g. `isbns && ARRAY[...]` for batch ISBN lookups.
+        Index("records_isbns_idx", "isbns", postgresql_using="gin"),
+        Index("records_tags_idx", "tags", postgresql_using="gin"),
+        # Concurrent loads spread over the partitions instead of contending on one heap
+        # and index, and vacuum, reindex and exports can work a partition at a time.
+        {"postgresql_partition_by": "HASH (id)"},
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     title: Mapped[str] = mapped_column(Text, nullable=False)
@@ -44,7 +115,8 @@ class Record(Base):
     year_published: Mapped[str] = mapped_column(String, nullable=True)
     volume: Mapped[float] = mapped_column(Float, nullable=True)
     issue: Mapped[float] = mapped_column(Float, nullable=True)
-    isbns: Mapped[str] = mapped_column(Text, nullable=True)
+    # Normalized by `chaoxing.utils.normalize_isbn`.
+    isbns: Mapped[list[str]] = mapped_column(ARRAY(Text), nullable=True)
     language: Mapped[str] = mapped_column(String, nullable=True)
     country: Mapped[str] = mapped_column(String, nullable=True)
     has_ecopy: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
@@ -52,11 +124,53 @@ class Record(Base):
     doi: Mapped[str] = mapped_column(String, nullable=True)
     doc_type: Mapped[str] = mapped_column(String, nullable=False)
     subject: Mapped[str] = mapped_column(Text, nullable=True)
-    tags: Mapped[str] = mapped_column(Text, nullable=True)
+    tags: Mapped[list[str]] = mapped_column(ARRAY(Text), nullable=True)
+    content_hash: Mapped[str] = mapped_column(String, nullable=True)
+    # Weighted lexemes built by `chaoxing.text_search.build_search_vector`.
+    search_vector: Mapped[str] = mapped_column(TSVECTOR, nullable=True)
+    updated_at: Mapped[DateTime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False
+    )
+
+
+class Holding(Base):
+    """Which institutions hold a record, i.e. which catalogs it was scraped from."""
+
+    __tablename__ = "holdings"
+    __table_args__ = (
+        Index("holdings_record_id_idx", "record_id"),
+        # One partition per institution, created when it is first planned, so an
+        # institution's holdings can be truncated and reloaded on their own.
+        {"postgresql_partition_by": "LIST (institution_id)"},
+    )
+
+    institution_id: Mapped[int] = mapped_column(ForeignKey("institution.id"), primary_key=True)
+    record_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    seen_at: Mapped[DateTime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False
+    )
 
 
 class Ebook(Base):
     __tablename__ = "ebooks"
 
     id: Mapped[int] = mapped_column(ForeignKey("records.id"), primary_key=True)
-    read_url: Mapped[str] = mapped_column(Text, nullable=True)
\ No newline at end of file
+    read_url: Mapped[str] = mapped_column(Text, nullable=True)
+
+
+@event.listens_for(Record.__table__, "after_create")
+def create_record_partitions(target, connection, **kw) -> None:
+    for remainder in range(RECORD_PARTITIONS):
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS records_p{remainder} PARTITION OF records "
+            f"FOR VALUES WITH (MODULUS {RECORD_PARTITIONS}, REMAINDER {remainder})"
+        ))
+
+
+@event.listens_for(Holding.__table__, "after_create")
+def create_default_holdings_partition(target, connection, **kw) -> None:
+    connection.execute(text("CREATE TABLE IF NOT EXISTS holdings_default PARTITION OF holdings DEFAULT"))
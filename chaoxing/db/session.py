@@ -6,11 +6,15 @@ from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
 from chaoxing.core.config import config
 
 
-def create_session_factory(db_url: str) -> async_sessionmaker[AsyncSession]:
+def create_session_factory(
+    db_url: str,
+    pool_size: int | None = None,
+    max_overflow: int | None = None,
+) -> async_sessionmaker[AsyncSession]:
     engine: AsyncEngine = create_async_engine(
         db_url,
-        pool_size=config.db_pool_size,
-        max_overflow=config.db_max_overflow,
+        pool_size=config.db_pool_size if pool_size is None else pool_size,
+        max_overflow=config.db_max_overflow if max_overflow is None else max_overflow,
         echo=config.debug,
     )
     return async_sessionmaker(engine, expire_on_commit=False)
@@ -0,0 +1,126 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any
+
+
+class SeenIds:
+    """
+        Exact set of non-negative record ids stored as roaring-style chunks.
+
+        Ids are grouped into chunks of `CHUNK_BITS` consecutive values. A chunk starts as
+        a small set of offsets and turns into a fixed 8 KiB bitmap once it holds more than
+        `SPARSE_LIMIT` ids, so dense id ranges cost one bit per id and scattered ids do
+        not each pay for a whole bitmap.
+    """
+
+    CHUNK_BITS = 1 << 16
+    SPARSE_LIMIT = 128
+
+    def __init__(self) -> None:
+        self._chunks: dict[int, set[int] | bytearray] = {}
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, record_id: int) -> bool:
+        index, offset = divmod(record_id, self.CHUNK_BITS)
+        chunk = self._chunks.get(index)
+        if chunk is None:
+            return False
+        if isinstance(chunk, set):
+            return offset in chunk
+        return bool(chunk[offset >> 3] & (1 << (offset & 7)))
+
+    def add(self, record_id: int) -> bool:
+        """Add an id and return whether it was not seen before."""
+
+        index, offset = divmod(record_id, self.CHUNK_BITS)
+        chunk = self._chunks.get(index)
+        if chunk is None:
+            chunk = self._chunks[index] = set()
+
+        if isinstance(chunk, set):
+            if offset in chunk:
+                return False
+            chunk.add(offset)
+            if len(chunk) > self.SPARSE_LIMIT:
+                self._chunks[index] = self._to_bitmap(chunk)
+        else:
+            mask = 1 << (offset & 7)
+            if chunk[offset >> 3] & mask:
+                return False
+            chunk[offset >> 3] |= mask
+
+        self._size += 1
+        return True
+
+    def _to_bitmap(self, offsets: set[int]) -> bytearray:
+        bitmap = bytearray(self.CHUNK_BITS // 8)
+        for offset in offsets:
+            bitmap[offset >> 3] |= 1 << (offset & 7)
+        return bitmap
+
+
+@dataclass
+class PartitionOverlap:
+    pages: int = 0
+    fetched: int = 0
+    new: int = 0
+    # Records the planner counted in the partition; None when unknown.
+    expected: int | None = None
+
+    @property
+    def overlap_rate(self) -> float:
+        return 1 - self.new / self.fetched if self.fetched else 0.0
+
+
+class RecordDeduplicator:
+    """
+        Drop records already seen during this run before they reach the writer.
+
+        Overlap is tracked per partition for logging and metrics. Overlap at the head
+        of a partition says nothing about its tail, so a partition only counts as
+        exhausted, and its remaining pages as skippable, once it has returned
+        `skip_after_pages` pages without a single new record and as many records as the
+        planner counted in it. Partitions without an `expect`ed count are never skipped,
+        and zero disables skipping altogether.
+    """
+
+    def __init__(self, skip_after_pages: int = 0) -> None:
+        self.skip_after_pages = skip_after_pages
+        self.seen = SeenIds()
+        self.partitions: dict[str, PartitionOverlap] = defaultdict(PartitionOverlap)
+        self.skipped_pages = 0
+
+    def expect(self, partition_key: str, count: int) -> None:
+        """Record how many records the planner counted in a partition."""
+        self.partitions[partition_key].expected = count
+
+    def filter(self, partition_key: str, records: list[tuple[Any, ...]]) -> list[tuple[Any, ...]]:
+        """Keep the record rows whose id (the first column) was not seen before."""
+        fresh = [record for record in records if self.seen.add(record[0])]
+
+        stats = self.partitions[partition_key]
+        stats.pages += 1
+        stats.fetched += len(records)
+        stats.new += len(fresh)
+        return fresh
+
+    def is_exhausted(self, partition_key: str) -> bool:
+        if not self.skip_after_pages:
+            return False
+
+        stats = self.partitions.get(partition_key)
+        return (
+            stats is not None
+            and stats.expected is not None
+            and stats.pages >= self.skip_after_pages
+            and stats.new == 0
+            and stats.fetched >= stats.expected
+        )
+
+    @property
+    def overlap_rate(self) -> float:
+        fetched = sum(stats.fetched for stats in self.partitions.values())
+        return 1 - len(self.seen) / fetched if fetched else 0.0
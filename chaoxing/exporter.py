@@ -0,0 +1,160 @@
+import os
+import gzip
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Any, BinaryIO
+
+from sqlalchemy import ARRAY, Boolean, DateTime, Float, Integer, Table
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+
+FORMATS = ("jsonl", "parquet")
+
+
+class ExportError(Exception):
+    pass
+
+
+class JsonlShard:
+    suffix = ".jsonl.gz"
+
+    def __init__(self, path: Path, columns: list[str], table: Table) -> None:
+        self._file = path.open("wb")
+        self._gzip = gzip.GzipFile(fileobj=self._file, mode="wb", compresslevel=6)
+        self.columns = columns
+
+    @property
+    def size(self) -> int:
+        return self._file.tell()
+
+    def write(self, rows: list[tuple[Any, ...]]) -> None:
+        lines = []
+        for row in rows:
+            record = {
+                column: value.isoformat() if isinstance(value, datetime) else value
+                for column, value in zip(self.columns, row)
+            }
+            lines.append(json.dumps(record, ensure_ascii=False))
+        lines.append("")
+        self._gzip.write("\n".join(lines).encode("utf-8"))
+
+    def close(self) -> None:
+        self._gzip.close()
+        self._file.close()
+
+
+class ParquetShard:
+    suffix = ".parquet"
+
+    def __init__(self, path: Path, columns: list[str], table: Table) -> None:
+        if pa is None:
+            raise ExportError("Parquet export requires pyarrow, install it with `pip install pyarrow`.")
+
+        self.columns = columns
+        self.schema = pa.schema([(column, _arrow_type(table.c[column].type)) for column in columns])
+        self._file: BinaryIO = path.open("wb")
+        self._writer = pq.ParquetWriter(self._file, self.schema, compression="zstd")
+
+    @property
+    def size(self) -> int:
+        return self._file.tell()
+
+    def write(self, rows: list[tuple[Any, ...]]) -> None:
+        arrays = [list(column) for column in zip(*rows)]
+        self._writer.write_table(pa.Table.from_arrays(arrays, schema=self.schema))
+
+    def close(self) -> None:
+        self._writer.close()
+        self._file.close()
+
+
+def _arrow_type(column_type: Any) -> "pa.DataType":
+    if isinstance(column_type, Boolean):
+        return pa.bool_()
+    if isinstance(column_type, Integer):
+        return pa.int64()
+    if isinstance(column_type, Float):
+        return pa.float64()
+    if isinstance(column_type, DateTime):
+        return pa.timestamp("us", tz="UTC")
+    if isinstance(column_type, ARRAY):
+        return pa.list_(_arrow_type(column_type.item_type))
+    return pa.string()
+
+
+class ShardedWriter:
+    """
+        Write rows to numbered shard files of one format, starting a new shard once the
+        current one reaches `shard_size` bytes on disk.
+
+        Shards are named `<prefix>-<number>` with the format's suffix. Sizes are checked
+        between batches, so a shard can exceed the bound by at most one batch.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        prefix: str,
+        file_format: str,
+        columns: list[str],
+        table: Table,
+        shard_size: int,
+    ) -> None:
+        self.directory = directory
+        self.prefix = prefix
+        self.shard_class = ParquetShard if file_format == "parquet" else JsonlShard
+        self.columns = columns
+        self.table = table
+        self.shard_size = shard_size
+
+        self.paths: list[Path] = []
+        self.rows = 0
+        self._shard: JsonlShard | ParquetShard | None = None
+
+    def write(self, rows: list[tuple[Any, ...]]) -> None:
+        if not rows:
+            return
+
+        if self._shard is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self.directory / f"{self.prefix}-{len(self.paths):05d}{self.shard_class.suffix}"
+            self._shard = self.shard_class(path, self.columns, self.table)
+            self.paths.append(path)
+
+        self._shard.write(rows)
+        self.rows += len(rows)
+
+        if self._shard.size >= self.shard_size:
+            self._shard.close()
+            self._shard = None
+
+    def close(self) -> None:
+        if self._shard is not None:
+            self._shard.close()
+            self._shard = None
+
+
+def read_watermark(path: Path) -> tuple[datetime, int] | None:
+    if not path.exists():
+        return None
+
+    state = json.loads(path.read_text(encoding="utf-8"))
+    return datetime.fromisoformat(state["updated_at"]), state["id"]
+
+
+def write_watermark(path: Path, updated_at: datetime, record_id: int) -> None:
+    """Replace the watermark file atomically, so an interrupted export keeps the previous one."""
+
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(
+        json.dumps({"updated_at": updated_at.isoformat(), "id": record_id}),
+        encoding="utf-8",
+    )
+    os.replace(tmp_path, path)
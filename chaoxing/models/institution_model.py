@@ -30,5 +30,5 @@ class InstitutionCreate(BaseModel):
     id: int
     abbrv: str
     name: str
-    doc_codes: str
-    resource_types: str
+    doc_codes: list[str]
+    resource_types: list[str]
@@ -12,7 +12,7 @@ class RecordCreate(BaseModel):
     year_published: str | None = None
     volume: float | None = None
     issue: float | None = None
-    isbns: str | None = None
+    isbns: list[str] | None = None
     language: str | None = None
     country: str | None = None
     has_ecopy: bool = False
@@ -20,4 +20,8 @@ class RecordCreate(BaseModel):
     doi: str | None = None
     doc_type: str
     subject: str | None = None
-    tags: str | None = None
+    tags: list[str] | None = None
+
+
+# Column order of the row tuples produced by the batch parser and loaded by the writer.
+RECORD_FIELDS = tuple(RecordCreate.model_fields)
@@ -29,6 +29,13 @@ class SearchStats(BaseModel):
             if value
         }
 
+    def to_count_dict(self) -> dict[str, dict[str, int]]:
+        return {
+            key: value
+            for key, value in self.model_dump().items()
+            if value
+        }
+
 
 class SearchResult(BaseModel):
     """Schema representing a LibSP search response."""
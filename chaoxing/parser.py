@@ -0,0 +1,107 @@
+import hashlib
+from types import NoneType
+from typing import Any
+
+from chaoxing.models.record_model import RecordCreate, RECORD_FIELDS
+from chaoxing.utils import normalize_isbns
+
+
+# Exact types each row column may hold without going through `RecordCreate`.
+_FIELD_TYPES: dict[str, frozenset[type]] = {
+    "id": frozenset({int}),
+    "title": frozenset({str}),
+    "volume": frozenset({float, NoneType}),
+    "issue": frozenset({float, NoneType}),
+    "has_ecopy": frozenset({bool}),
+    "num_pages": frozenset({int, NoneType}),
+    "doc_type": frozenset({str}),
+    "isbns": frozenset({list, NoneType}),
+    "tags": frozenset({list, NoneType}),
+}
+_ROW_TYPES = tuple(_FIELD_TYPES.get(field, frozenset({str, NoneType})) for field in RECORD_FIELDS)
+
+
+def parse_record(item: dict[str, Any]) -> RecordCreate | None:
+    title = item["title"]
+
+    if title is None:
+        return None
+
+    isbns = item.get("isbns")
+    tags = item.get("chiSubjectClass")
+    return RecordCreate(
+        id=item["recordId"],
+        title=item["title"],
+        summary=item.get("adstract"),
+        author=item.get("author"),
+        publisher=item.get("publisher"),
+        year_published=item.get("publishYear"),
+        volume=item.get("vol"),
+        issue=item.get("issue"),
+        isbns=normalize_isbns(isbns),
+        language=item.get("langCode"),
+        country=item.get("countryCode"),
+        has_ecopy=bool(item.get("eCount")),
+        num_pages=item.get("pagesNum"),
+        doi=item.get("doi"),
+        doc_type=item.get("docName"),
+        subject=item.get("subjectWord"),
+        tags=[tags] if isinstance(tags, str) else tags or None,
+    )
+
+
+def parse_record_rows(items: list[dict[str, Any]]) -> list[tuple[Any, ...]]:
+    """
+        Map a page of search results straight to row tuples ordered like `RECORD_FIELDS`.
+
+        Produces the same values as `parse_record(item).model_dump()` without building a
+        model per row. Column types are checked once for the whole page, and only rows
+        holding a value that needs coercion (or is invalid) go through `RecordCreate`.
+    """
+
+    kept = [item for item in items if item["title"] is not None]
+    rows = [_record_row(item) for item in kept]
+    if not rows:
+        return rows
+
+    invalid: set[int] = set()
+    for column, allowed in zip(zip(*rows), _ROW_TYPES):
+        if not set(map(type, column)) <= allowed:
+            invalid.update(index for index, value in enumerate(column) if type(value) not in allowed)
+
+    for index in invalid:
+        data = parse_record(kept[index]).model_dump()
+        rows[index] = tuple(data[field] for field in RECORD_FIELDS)
+
+    return rows
+
+
+def _record_row(item: dict[str, Any]) -> tuple[Any, ...]:
+    get = item.get
+    tags = get("chiSubjectClass")
+    volume = get("vol")
+    issue = get("issue")
+    return (
+        item["recordId"],
+        item["title"],
+        get("adstract"),
+        get("author"),
+        get("publisher"),
+        get("publishYear"),
+        float(volume) if type(volume) is int else volume,
+        float(issue) if type(issue) is int else issue,
+        normalize_isbns(get("isbns")),
+        get("langCode"),
+        get("countryCode"),
+        bool(get("eCount")),
+        get("pagesNum"),
+        get("doi"),
+        get("docName"),
+        get("subjectWord"),
+        tags or None,
+    )
+
+
+def record_hash(row: tuple[Any, ...]) -> str:
+    """Content hash of a record row, used to skip rewriting records that did not change."""
+    return hashlib.blake2b(repr(row).encode("utf-8"), digest_size=16).hexdigest()
@@ -0,0 +1,310 @@
+import math
+import asyncio
+import logging
+from datetime import date
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+import httpx
+
+from chaoxing.api.cache import get_response_cache
+from chaoxing.api.search import SearchError, SearchParams, search_libsp
+
+
+logger = logging.getLogger(__name__)
+
+
+SORT_FIELDS = ["relevance", "issued_sort", "class_no_sort_s"]
+YEAR_SORT_FIELD = "issued_sort"
+SORT_CLAUSES = ["asc", "desc"]
+
+FLOOR_YEAR = 1850
+CEILING_YEAR = date.today().year
+
+
+PartitionCallback = Callable[["Partition"], Awaitable[None]]
+
+
+@dataclass(frozen=True)
+class PageLimits:
+    """Pagination window served by a LibSP search endpoint."""
+
+    max_rows: int = 50
+    max_pages: int = 200
+
+    @property
+    def max_records(self) -> int:
+        return self.max_rows * self.max_pages
+
+
+@dataclass
+class Partition:
+    """A search slice whose results fit inside the pagination window."""
+
+    params: SearchParams
+    count: int
+
+    def pages(self, limits: PageLimits) -> list[SearchParams]:
+        total_pages = compute_total_pages(self.count, limits.max_rows, limits.max_pages)
+        return [self.params.copy(page=page) for page in range(1, total_pages + 1)]
+
+
+async def fetch_records_count(client: httpx.AsyncClient, params: SearchParams) -> int:
+    params = params.copy(count_only=True, page=1)
+
+    cache = get_response_cache()
+    key = params.canonical()
+    if cache and (count := await cache.get("count", key)) is not None:
+        return count
+
+    result = await search_libsp(client, params)
+    if cache:
+        await cache.set("count", key, result.count, scope=params.institution_abbrv)
+    return result.count
+
+
+def compute_total_pages(records_count: int, max_rows: int, max_pages: int) -> int:
+    return min(max_pages, math.ceil(records_count / max_rows))
+
+
+async def probe_page_limits(
+    client: httpx.AsyncClient,
+    base: SearchParams,
+    max_rows: int,
+    max_records: int,
+    default: PageLimits = PageLimits(),
+) -> PageLimits:
+    """
+        Find the largest page size and the deepest page an institution's search serves.
+
+        The page size is doubled from `default.max_rows` up to `max_rows` for as long as
+        full pages come back; a host that silently caps the page size is detected by
+        the short page it returns. The depth is then binary searched over the pages that
+        hold at most `max_records` records, counting a page as served only when it holds
+        every record it should. Catalogs too small to reach the window keep the default
+        depth, since nothing deeper can be observed.
+    """
+
+    count = await fetch_records_count(client, base)
+    if count <= default.max_rows:
+        return default
+
+    rows = default.max_rows
+    while rows < max_rows and rows < count:
+        candidate = min(rows * 2, max_rows)
+        served = await _served_rows(client, base.copy(rows=candidate, page=1))
+        if served >= min(candidate, count):
+            rows = candidate
+            continue
+        if served > rows:
+            rows = served
+        break
+
+    async def is_served(page: int) -> bool:
+        expected = min(rows, count - (page - 1) * rows)
+        return await _served_rows(client, base.copy(rows=rows, page=page)) >= expected
+
+    # Page 1 at `rows` was served above; find the last served page in `[low, high]`.
+    high = math.ceil(min(count, max_records) / rows)
+    low = 1
+    if await is_served(high):
+        low = high
+    else:
+        high -= 1
+    while low < high:
+        middle = (low + high + 1) // 2
+        if await is_served(middle):
+            low = middle
+        else:
+            high = middle - 1
+
+    if low * rows >= count:
+        # The whole catalog was served, so the window is at least as deep as assumed.
+        low = max(low, default.max_records // rows)
+    return PageLimits(max_rows=rows, max_pages=low)
+
+
+async def _served_rows(client: httpx.AsyncClient, params: SearchParams) -> int:
+    """Number of records a search page returned, or 0 when the host refused it."""
+
+    try:
+        result = await search_libsp(client, params)
+    except (SearchError, httpx.HTTPStatusError):
+        return 0
+    return len(result.items or [])
+
+
+def is_trusted_count(count: int | None, limits: PageLimits) -> bool:
+    """Whether a facet count can be paged directly without a live count probe."""
+    return isinstance(count, int) and 0 < count <= limits.max_records
+
+
+class PartitionPlanner:
+    """
+        Discover pageable partitions of an institution's catalog.
+
+        Facet counts come from the same unfiltered `count_only` search that produced the
+        filters, so a value with a count inside the pagination window is planned straight
+        from that count. Values above the window are split by publication year, and only
+        counts that cannot be trusted (missing or non-positive) are probed live. Records
+        without a publication year, which no year range selects, are paged from the end
+        of the year sort order a one record probe finds them at.
+
+        Facet values are planned concurrently, with at most `concurrency` count probes in
+        flight. Every partition found is handed to `on_partition` as soon as it is known,
+        and slices that still overflow at a single year are collected in `overflow`.
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        limits: PageLimits,
+        concurrency: int,
+        on_partition: PartitionCallback,
+    ) -> None:
+        self.client = client
+        self.limits = limits
+        self.on_partition = on_partition
+        self.overflow: list[Partition] = []
+
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def plan(self, base: SearchParams, facet_counts: dict[str, dict[str, int]]) -> None:
+        async with asyncio.TaskGroup() as group:
+            for filter_key, counts in facet_counts.items():
+                for filter_value, count in counts.items():
+                    params = base.copy(**{filter_key: [filter_value]})
+                    group.create_task(self._plan_value(params, count, f"{filter_key}={filter_value!r}"))
+
+    async def _plan_value(self, params: SearchParams, count: int | None, label: str) -> None:
+        try:
+            if is_trusted_count(count, self.limits):
+                await self.on_partition(Partition(params, count))
+                return
+
+            if not isinstance(count, int) or count <= 0:
+                count = await self._count(params)
+                if count == 0:
+                    return
+
+            await self._refine(params, count)
+        except Exception as e:
+            logger.exception(f"Failed to plan {label} for {params.institution_abbrv}: {e}")
+
+    async def _count(self, params: SearchParams) -> int:
+        async with self._semaphore:
+            return await fetch_records_count(self.client, params)
+
+    async def _refine(self, params: SearchParams, count: int) -> None:
+        if count <= self.limits.max_records:
+            await self.on_partition(Partition(params, count))
+            return
+
+        halves = split_year_range(params.from_year, params.to_year)
+
+        if halves is None:
+            # A single publication year still overflows the window. Each sort order
+            # exposes a different first window of the same result set.
+            logger.warning(
+                f"Cannot split {params.institution_abbrv} year {params.from_year} further: "
+                f"{count} records exceed the {self.limits.max_records} record window."
+            )
+            self.overflow.append(Partition(params, count))
+            for sort_field in SORT_FIELDS:
+                for sort_clause in SORT_CLAUSES:
+                    await self.on_partition(
+                        Partition(params.copy(sort_field=sort_field, sort_clause=sort_clause), count)
+                    )
+            return
+
+        (left_from, left_to), (right_from, right_to) = halves
+        left = params.copy(from_year=left_from, to_year=left_to)
+        right = params.copy(from_year=right_from, to_year=right_to)
+
+        # Both halves are probed: records without a publication year match an open range
+        # but no bounded one, so the parent's count cannot be split by subtraction.
+        left_count, right_count = await asyncio.gather(self._count(left), self._count(right))
+        missing = count - left_count - right_count
+
+        steps = [
+            self._refine(half, half_count)
+            for half, half_count in ((left, left_count), (right, right_count))
+            if half_count > 0
+        ]
+        if missing > 0:
+            steps.append(self._plan_missing_years(params, missing))
+        await asyncio.gather(*steps)
+
+    async def _plan_missing_years(self, params: SearchParams, missing: int) -> None:
+        """
+            Plan the `missing` records of a slice that fall in neither year half.
+
+            These have no publication year, and no filter selects them, but sorting by
+            year puts them together at one end of the slice. The first `missing` records
+            are paged from the end `_undated_end` finds them at. When it finds neither,
+            both ends are paged, and the dated records that end holds are dropped as
+            duplicates by the deduplicator.
+        """
+
+        if missing > self.limits.max_records:
+            logger.warning(
+                f"{missing} records of {params.institution_abbrv} without a publication year exceed "
+                f"the {self.limits.max_records} record window; only the first window is reachable."
+            )
+            self.overflow.append(Partition(params, missing))
+
+        sort_clause = await self._undated_end(params)
+        for sort_clause in [sort_clause] if sort_clause else SORT_CLAUSES:
+            sorted_params = params.copy(sort_field=YEAR_SORT_FIELD, sort_clause=sort_clause)
+            await self.on_partition(Partition(sorted_params, missing))
+
+    async def _undated_end(self, params: SearchParams) -> str | None:
+        """Sort clause of the year sort that lists a slice's records without a year first, if either does."""
+
+        for sort_clause in SORT_CLAUSES:
+            probe = params.copy(sort_field=YEAR_SORT_FIELD, sort_clause=sort_clause, rows=1, page=1, count_only=False)
+            try:
+                async with self._semaphore:
+                    result = await search_libsp(self.client, probe)
+            except (SearchError, httpx.HTTPError) as e:
+                logger.warning(f"Could not find where {params.institution_abbrv} sorts records without a year: {e}")
+                return None
+
+            items = result.items or []
+            if items and not items[0].get("publishYear"):
+                return sort_clause
+        return None
+
+
+def split_year_range(
+    from_year: int | None,
+    to_year: int | None,
+) -> tuple[tuple[int | None, int | None], tuple[int | None, int | None]] | None:
+    """
+        Split a publication year range in two, or return None for a single year.
+
+        Bounded ranges are halved. Open-ended ranges are first cut at `FLOOR_YEAR` or
+        `CEILING_YEAR`, and past those the bounded slice doubles in width at each split,
+        so sparse tails are still covered in a logarithmic number of probes.
+    """
+
+    if from_year is None and to_year is None:
+        return (None, CEILING_YEAR), (CEILING_YEAR + 1, None)
+
+    if from_year is None:
+        if to_year >= FLOOR_YEAR:
+            return (None, FLOOR_YEAR - 1), (FLOOR_YEAR, to_year)
+        width = max(1, FLOOR_YEAR - to_year)
+        return (None, to_year - width), (to_year - width + 1, to_year)
+
+    if to_year is None:
+        if from_year <= CEILING_YEAR:
+            return (from_year, CEILING_YEAR), (CEILING_YEAR + 1, None)
+        width = max(1, from_year - CEILING_YEAR)
+        return (from_year, from_year + width - 1), (from_year + width, None)
+
+    if from_year >= to_year:
+        return None
+
+    middle = (from_year + to_year) // 2
+    return (from_year, middle), (middle + 1, to_year)
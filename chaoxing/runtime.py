@@ -0,0 +1,103 @@
+import time
+from collections.abc import AsyncIterator
+from contextlib import AsyncExitStack, asynccontextmanager
+from dataclasses import dataclass, field
+
+import httpx
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from tusk.adaptive import AdaptiveLimit
+from chaoxing.core.config import config
+from chaoxing.core.metrics import MetricsExporter
+from chaoxing.core.profiling import WorkerProfiler
+from chaoxing.db.session import create_session_factory
+
+
+# Request extension naming the latency class of a request, e.g. `search:50`. Requests
+# without one are classed by their path.
+LATENCY_CLASS = "latency_class"
+
+
+class AdaptiveTransport(httpx.AsyncBaseTransport):
+    """
+        Transport that reports the outcome of every request to its host's adaptive limit.
+
+        Latency is timed around the request alone, so rate limit waits, retry backoff
+        and writer backpressure around it are not mistaken for a slow host. 429 and 5xx
+        responses are reported as overloads, transport errors as errors, and any other
+        response as a success with its latency and latency class, so count probes and
+        full pages are each judged against their own baseline.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, adaptive_limits: dict[str, AdaptiveLimit]) -> None:
+        self.transport = transport
+        self.adaptive_limits = adaptive_limits
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        adaptive = self.adaptive_limits.get(request.url.host)
+        if adaptive is None:
+            return await self.transport.handle_async_request(request)
+
+        started = time.monotonic()
+        try:
+            response = await self.transport.handle_async_request(request)
+        except httpx.TransportError:
+            adaptive.record_error()
+            raise
+
+        if response.status_code == 429 or response.status_code >= 500:
+            adaptive.record_overload()
+        else:
+            latency_class = request.extensions.get(LATENCY_CLASS, request.url.path)
+            adaptive.record_success(time.monotonic() - started, latency_class)
+        return response
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+@dataclass
+class Runtime:
+    """
+        Resources shared by every institution scraped in one worker process.
+
+        The HTTP client keeps its connection pool and TLS sessions across institutions,
+        and the session factory its database pool. Institutions scraped with an adaptive
+        limit register it under their hostname, so the client's transport can report
+        each request to the right one.
+    """
+
+    client: httpx.AsyncClient
+    db_factory: async_sessionmaker[AsyncSession]
+    adaptive_limits: dict[str, AdaptiveLimit] = field(default_factory=dict)
+
+
+@asynccontextmanager
+async def open_runtime(
+    db_url: str,
+    transport: httpx.AsyncBaseTransport | None = None,
+    pool_size: int | None = None,
+    max_overflow: int | None = None,
+) -> AsyncIterator[Runtime]:
+    """Create the client, database pool, metrics exporter and profiler of a worker, and close them on exit."""
+
+    limits = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=30.0)
+    timeout = httpx.Timeout(15.0, read=30.0, write=15.0, pool=10.0)
+    db_factory = create_session_factory(db_url, pool_size, max_overflow)
+
+    async with AsyncExitStack() as stack:
+        stack.push_async_callback(db_factory.kw["bind"].dispose)
+        if config.metrics_dir:
+            await stack.enter_async_context(MetricsExporter(config.metrics_dir, config.metrics_interval))
+        if config.profile_dir:
+            await stack.enter_async_context(WorkerProfiler(
+                config.profile_dir, config.profile_lag_interval, config.profile_memory, config.profile_top
+            ))
+
+        adaptive_limits: dict[str, AdaptiveLimit] = {}
+        transport = AdaptiveTransport(transport or httpx.AsyncHTTPTransport(http2=True, limits=limits), adaptive_limits)
+        client = httpx.AsyncClient(timeout=timeout, transport=transport)
+        runtime = Runtime(client, db_factory, adaptive_limits)
+
+        await stack.enter_async_context(client)
+        yield runtime
@@ -1,7 +1,11 @@
+from collections.abc import AsyncIterator
+
+from sqlalchemy import exists, select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from chaoxing.models.ebook_model import EbookCreate
-from chaoxing.db.schema import Ebook
+from chaoxing.db.schema import Ebook, Holding, Record
 
 
 async def create_ebook(session: AsyncSession, data: EbookCreate) -> Ebook:
@@ -9,4 +13,53 @@ async def create_ebook(session: AsyncSession, data: EbookCreate) -> Ebook:
     session.add(ebook)
     await session.commit()
     await session.refresh(ebook)
-    return ebook
\ No newline at end of file
+    return ebook
+
+
+async def create_ebooks(session: AsyncSession, ebooks: list[EbookCreate]) -> int:
+    """Upsert multiple ebooks in one statement; a stored read URL is never replaced by a missing one."""
+
+    if not ebooks:
+        return 0
+
+    values = [ebook.model_dump() for ebook in ebooks]
+    stmt = insert(Ebook).values(values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["id"],
+        set_={"read_url": stmt.excluded.read_url},
+        where=stmt.excluded.read_url.is_not(None) | Ebook.read_url.is_(None),
+    )
+    result = await session.execute(stmt)
+    await session.commit()
+    return result.rowcount
+
+
+async def stream_pending_ebook_ids(
+    session: AsyncSession,
+    institution_id: int | None = None,
+    chunk_size: int = 1_000,
+) -> AsyncIterator[list[int]]:
+    """
+        Yield ids of records that have an ecopy but no `ebooks` row yet, in chunks.
+
+        With `institution_id`, only records held by that institution are pending, so a
+        host's "no ebook" answer is only stored for records it holds. Records scraped
+        before holdings existed are picked up once a re-scrape records their holdings.
+        Ids are read in ascending order through a server-side cursor, so memory stays
+        flat however many records are pending. Records that gain an `ebooks` row are
+        excluded by the query itself, which makes an interrupted run resume where it
+        stopped. The session must not be used for writes while the stream is open.
+    """
+
+    stmt = select(Record.id).where(
+        Record.has_ecopy.is_(True),
+        ~exists().where(Ebook.id == Record.id),
+    )
+    if institution_id is not None:
+        stmt = stmt.where(
+            exists().where(Holding.record_id == Record.id, Holding.institution_id == institution_id)
+        )
+
+    result = await session.stream_scalars(stmt.order_by(Record.id).execution_options(yield_per=chunk_size))
+    async for chunk in result.partitions():
+        yield list(chunk)
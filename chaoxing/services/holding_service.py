@@ -0,0 +1,39 @@
+import logging
+
+from sqlalchemy import select, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from chaoxing.db.schema import Holding
+
+
+logger = logging.getLogger(__name__)
+
+
+def holdings_partition(institution_id: int) -> str:
+    return f"{Holding.__tablename__}_{int(institution_id)}"
+
+
+async def ensure_holdings_partition(session: AsyncSession, institution_id: int) -> None:
+    """
+        Create the holdings partition of an institution if it has none yet, and commit.
+
+        Creating a partition briefly locks the whole `holdings` table, so existence is
+        checked first. When another worker creates it at the same time, or holdings of
+        the institution already sit in the default partition, the error is logged and
+        its holdings keep going to the default partition.
+    """
+
+    partition = holdings_partition(institution_id)
+    if (await session.execute(select(text("to_regclass(:name)")), {"name": partition})).scalar() is not None:
+        return
+
+    try:
+        await session.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {partition} PARTITION OF {Holding.__tablename__} "
+            f"FOR VALUES IN ({int(institution_id)})"
+        ))
+        await session.commit()
+    except DBAPIError as e:
+        await session.rollback()
+        logger.warning(f"Could not create holdings partition {partition}: {e}")
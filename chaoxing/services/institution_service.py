@@ -1,3 +1,4 @@
+from sqlalchemy import func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from chaoxing.models.institution_model import InstitutionCreate
@@ -8,9 +9,25 @@ async def get_institution(session: AsyncSession, institution_id: int) -> Institu
     return await session.get(Institution, institution_id)
 
 
+async def get_institution_by_abbrv(session: AsyncSession, abbrv: str) -> Institution | None:
+    return (await session.execute(select(Institution).where(Institution.abbrv == abbrv))).scalar_one_or_none()
+
+
 async def create_institution(session: AsyncSession, data: InstitutionCreate) -> Institution:
     ebook = Institution(**data.model_dump())
     session.add(ebook)
     await session.commit()
     await session.refresh(ebook)
     return ebook
+
+
+async def set_page_limits(session: AsyncSession, institution_id: int, max_rows: int, max_pages: int) -> None:
+    """Store the pagination window probed for an institution."""
+
+    stmt = (
+        update(Institution)
+        .where(Institution.id == institution_id)
+        .values(max_rows=max_rows, max_pages=max_pages, limits_probed_at=func.now())
+    )
+    await session.execute(stmt)
+    await session.commit()
@@ -0,0 +1,194 @@
+from datetime import timedelta
+
+from sqlalchemy import case, exists, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from chaoxing.db.schema import ScrapeJob
+
+
+PLAN = "plan"
+PAGES = "pages"
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# Planning jobs go first, so page jobs of every institution are known early.
+PLAN_PRIORITY = 2 ** 62
+
+# (partition_key, params, first_page, last_page)
+PageRange = tuple[str, str, int, int]
+
+
+def chunk_page_ranges(pages: list[int], max_pages: int) -> list[tuple[int, int]]:
+    """Group sorted page numbers into contiguous `(first, last)` ranges of at most `max_pages`."""
+
+    ranges: list[tuple[int, int]] = []
+    for page in pages:
+        if ranges and page == ranges[-1][1] + 1 and page - ranges[-1][0] < max_pages:
+            ranges[-1] = (ranges[-1][0], page)
+        else:
+            ranges.append((page, page))
+    return ranges
+
+
+async def enqueue_institutions(session: AsyncSession, hostnames: list[str]) -> None:
+    """Add a planning job per institution and give failed jobs another round of attempts."""
+
+    if hostnames:
+        values = [{"kind": PLAN, "hostname": hostname, "priority": PLAN_PRIORITY} for hostname in hostnames]
+        await session.execute(insert(ScrapeJob).values(values).on_conflict_do_nothing())
+
+    await session.execute(
+        update(ScrapeJob)
+        .where(ScrapeJob.status == FAILED)
+        .values(status=PENDING, attempts=0, error=None)
+    )
+    await session.commit()
+
+
+async def restart_planning(session: AsyncSession, hostnames: list[str]) -> None:
+    """Queue finished institutions for planning again, e.g. for a refresh run."""
+
+    await session.execute(
+        update(ScrapeJob)
+        .where(ScrapeJob.kind == PLAN, ScrapeJob.hostname.in_(hostnames), ScrapeJob.status == DONE)
+        .values(status=PENDING, attempts=0)
+    )
+    await session.commit()
+
+
+async def add_page_jobs(session: AsyncSession, hostname: str, priority: int, ranges: list[PageRange]) -> None:
+    """Queue page range jobs without committing; finished ranges that come back are reopened."""
+
+    if not ranges:
+        return
+
+    values = [
+        {
+            "kind": PAGES,
+            "hostname": hostname,
+            "partition_key": partition_key,
+            "params": params,
+            "first_page": first_page,
+            "last_page": last_page,
+            "priority": priority,
+        }
+        for partition_key, params, first_page, last_page in ranges
+    ]
+    stmt = insert(ScrapeJob).values(values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["hostname", "kind", "partition_key", "first_page"],
+        set_={
+            "params": stmt.excluded.params,
+            "last_page": stmt.excluded.last_page,
+            "priority": stmt.excluded.priority,
+            "status": PENDING,
+            "attempts": 0,
+            "error": None,
+        },
+        where=ScrapeJob.status != RUNNING,
+    )
+    await session.execute(stmt)
+
+
+async def claim_job(session: AsyncSession, worker: str, timeout: timedelta) -> ScrapeJob | None:
+    """
+        Take the highest priority pending job, or one whose worker went silent for `timeout`.
+
+        Rows locked by other claims are skipped rather than waited on, so any number of
+        workers on any number of machines can claim concurrently.
+    """
+
+    candidate = (
+        select(ScrapeJob.id)
+        .where(
+            or_(
+                ScrapeJob.status == PENDING,
+                (ScrapeJob.status == RUNNING) & (ScrapeJob.claimed_at < func.now() - timeout),
+            )
+        )
+        .order_by(ScrapeJob.priority.desc(), ScrapeJob.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    stmt = (
+        update(ScrapeJob)
+        .where(ScrapeJob.id == candidate)
+        .values(
+            status=RUNNING,
+            claimed_by=worker,
+            claimed_at=func.now(),
+            attempts=ScrapeJob.attempts + 1,
+        )
+        .returning(ScrapeJob)
+    )
+    job = (await session.execute(stmt)).scalar_one_or_none()
+    await session.commit()
+    return job
+
+
+async def touch_job(session: AsyncSession, job_id: int, worker: str) -> bool:
+    """Refresh the claim on a running job, so it is not taken over as abandoned."""
+
+    stmt = update(ScrapeJob).where(*_claimed(job_id, worker)).values(claimed_at=func.now())
+    touched = (await session.execute(stmt)).rowcount == 1
+    await session.commit()
+    return touched
+
+
+async def finish_job(session: AsyncSession, job_id: int, worker: str) -> bool:
+    stmt = update(ScrapeJob).where(*_claimed(job_id, worker)).values(status=DONE, error=None)
+    finished = (await session.execute(stmt)).rowcount == 1
+    await session.commit()
+    return finished
+
+
+async def fail_job(session: AsyncSession, job_id: int, worker: str, error: str, max_attempts: int) -> bool:
+    """Put a failed job back in the queue, or mark it failed once it used up `max_attempts`."""
+
+    stmt = (
+        update(ScrapeJob)
+        .where(*_claimed(job_id, worker))
+        .values(
+            status=case((ScrapeJob.attempts >= max_attempts, FAILED), else_=PENDING),
+            error=error,
+        )
+    )
+    failed = (await session.execute(stmt)).rowcount == 1
+    await session.commit()
+    return failed
+
+
+async def has_open_jobs(session: AsyncSession) -> bool:
+    """Whether any job is still pending or running, so more work may still appear."""
+
+    stmt = select(exists().where(ScrapeJob.status.in_([PENDING, RUNNING])))
+    return (await session.execute(stmt)).scalar_one()
+
+
+async def count_jobs(session: AsyncSession) -> dict[tuple[str, str], int]:
+    """Number of jobs per `(kind, status)`."""
+
+    stmt = select(ScrapeJob.kind, ScrapeJob.status, func.count()).group_by(ScrapeJob.kind, ScrapeJob.status)
+    return {(kind, status): count for kind, status, count in (await session.execute(stmt)).all()}
+
+
+async def get_failed_jobs(session: AsyncSession) -> list[ScrapeJob]:
+    stmt = select(ScrapeJob).where(ScrapeJob.status == FAILED).order_by(ScrapeJob.hostname, ScrapeJob.id)
+    return list((await session.execute(stmt)).scalars().all())
+
+
+def _claimed(job_id: int, worker: str) -> tuple:
+    """
+        Conditions matching a job only while `worker` still holds its claim.
+
+        A worker that stalled past the claim timeout may find its job taken over; its
+        heartbeat, finish and failure updates then match nothing instead of clobbering
+        the new owner's run.
+    """
+
+    return ScrapeJob.id == job_id, ScrapeJob.claimed_by == worker, ScrapeJob.status == RUNNING
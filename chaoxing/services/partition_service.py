@@ -0,0 +1,94 @@
+from dataclasses import dataclass
+
+from sqlalchemy import select, update, func, and_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from chaoxing.db.schema import PartitionCount, Progress
+
+
+# (institution_abbrv, partition_key, count, pages)
+PartitionTotal = tuple[str, str, int, int]
+
+
+@dataclass
+class StoredCount:
+    count: int
+    complete: bool
+
+
+async def get_partition_counts(session: AsyncSession, institution_abbrv: str) -> dict[str, StoredCount]:
+    """Load the counts stored for every partition of an institution by the previous run."""
+
+    stmt = (
+        select(PartitionCount.partition_key, PartitionCount.count, PartitionCount.complete)
+        .where(PartitionCount.institution_abbrv == institution_abbrv)
+    )
+    result = await session.execute(stmt)
+    return {
+        partition_key: StoredCount(count, complete)
+        for partition_key, count, complete in result.all()
+    }
+
+
+async def add_partition_counts(session: AsyncSession, totals: list[PartitionTotal]) -> None:
+    """Store fresh partition counts as incomplete without committing."""
+
+    if not totals:
+        return
+
+    values = [
+        {
+            "institution_abbrv": institution_abbrv,
+            "partition_key": partition_key,
+            "count": count,
+            "pages": pages,
+            "complete": False,
+        }
+        for institution_abbrv, partition_key, count, pages in totals
+    ]
+    stmt = insert(PartitionCount).values(values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["institution_abbrv", "partition_key"],
+        set_={
+            "count": stmt.excluded.count,
+            "pages": stmt.excluded.pages,
+            "complete": False,
+            "updated_at": func.now(),
+        }
+    )
+    await session.execute(stmt)
+
+
+async def complete_partitions(
+    session: AsyncSession,
+    institution_abbrv: str,
+    partition_keys: list[str] | None = None,
+) -> int:
+    """Mark every partition (or only `partition_keys`) whose pages are all checkpointed as complete."""
+
+    scraped_pages = (
+        select(func.count())
+        .where(
+            Progress.institution_abbrv == PartitionCount.institution_abbrv,
+            Progress.partition_key == PartitionCount.partition_key,
+            Progress.scraped.is_(True)
+        )
+        .scalar_subquery()
+    )
+    stmt = (
+        update(PartitionCount)
+        .where(
+            and_(
+                PartitionCount.institution_abbrv == institution_abbrv,
+                PartitionCount.complete.is_(False),
+                scraped_pages >= PartitionCount.pages
+            )
+        )
+        .values(complete=True)
+    )
+    if partition_keys is not None:
+        stmt = stmt.where(PartitionCount.partition_key.in_(partition_keys))
+    result = await session.execute(stmt)
+    await session.commit()
+    return result.rowcount
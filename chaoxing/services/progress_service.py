@@ -1,14 +1,18 @@
-from sqlalchemy import exists, select, func, text, bindparam, BigInteger, String
+from sqlalchemy import delete, exists, select, func, text, bindparam, tuple_, BigInteger, String
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from chaoxing.db.schema import Progress
 
 
-async def is_page_scraped(session: AsyncSession, institution_abbrv: str, page_num: int) -> bool:
+PageCheckpoint = tuple[str, str, int]
+
+
+async def is_page_scraped(session: AsyncSession, institution_abbrv: str, partition_key: str, page_num: int) -> bool:
     stmt = select(
         exists().where(
             Progress.institution_abbrv == institution_abbrv,
+            Progress.partition_key == partition_key,
             Progress.page_num == page_num,
             Progress.scraped.is_(True),
         )
@@ -17,17 +21,78 @@ async def is_page_scraped(session: AsyncSession, institution_abbrv: str, page_nu
     return result.scalar()
 
 
-async def mark_page_scraped(session: AsyncSession, institution_abbrv: str, page_num: int) -> None:
+async def mark_page_scraped(session: AsyncSession, institution_abbrv: str, partition_key: str, page_num: int) -> None:
+    await add_page_checkpoints(session, [(institution_abbrv, partition_key, page_num)])
+    await session.commit()
+
+
+async def add_page_checkpoints(session: AsyncSession, checkpoints: list[PageCheckpoint]) -> None:
+    """Mark many pages as scraped without committing, so the caller can commit them with the page data."""
+
+    if not checkpoints:
+        return
+
+    values = [
+        {
+            "institution_abbrv": institution_abbrv,
+            "partition_key": partition_key,
+            "page_num": page_num,
+            "scraped": True,
+        }
+        for institution_abbrv, partition_key, page_num in checkpoints
+    ]
+    stmt = insert(Progress).values(values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["institution_abbrv", "partition_key", "page_num"],
+        set_={"scraped": True, "updated_at": func.now()}
+    )
+    await session.execute(stmt)
+
+
+async def delete_page_checkpoints(session: AsyncSession, partitions: list[tuple[str, str]]) -> None:
+    """Forget the scraped pages of `(institution_abbrv, partition_key)` partitions without committing."""
+
+    if not partitions:
+        return
+
+    stmt = delete(Progress).where(tuple_(Progress.institution_abbrv, Progress.partition_key).in_(partitions))
+    await session.execute(stmt)
+
+
+async def get_scraped_pages(session: AsyncSession, institution_abbrv: str) -> set[tuple[str, int]]:
+    """Load every completed `(partition_key, page_num)` of an institution in one query."""
+
+    stmt = (
+        select(Progress.partition_key, Progress.page_num)
+        .where(
+            Progress.institution_abbrv == institution_abbrv,
+            Progress.scraped.is_(True)
+        )
+    )
+    result = await session.execute(stmt)
+    return {(partition_key, page_num) for partition_key, page_num in result.all()}
+
+
+async def get_scraped_page_nums(
+    session: AsyncSession,
+    institution_abbrv: str,
+    partition_key: str,
+    first_page: int,
+    last_page: int,
+) -> set[int]:
+    """Load the completed page numbers of a partition between `first_page` and `last_page`."""
+
     stmt = (
-        insert(Progress)
-        .values(institution_abbrv=institution_abbrv, page_num=page_num, scraped=True)
-        .on_conflict_do_update(
-            index_elements=["institution_abbrv", "page_num"],
-            set_={"scraped": True}
+        select(Progress.page_num)
+        .where(
+            Progress.institution_abbrv == institution_abbrv,
+            Progress.partition_key == partition_key,
+            Progress.page_num.between(first_page, last_page),
+            Progress.scraped.is_(True)
         )
     )
-    await session.execute(stmt)
-    await session.commit()
+    result = await session.execute(stmt)
+    return set(result.scalars().all())
 
 
 async def get_scraped_count(session: AsyncSession, institution_abbrv: str) -> int:
@@ -42,17 +107,20 @@ async def get_scraped_count(session: AsyncSession, institution_abbrv: str) -> in
     return result.scalar_one()
 
 
-async def _get_max_scraped_page(session: AsyncSession, institution_abbrv: str) -> int:
+async def _get_max_scraped_page(session: AsyncSession, institution_abbrv: str, partition_key: str) -> int:
     result = await session.execute(
         select(func.coalesce(func.max(Progress.page_num), 0))
-        .where(Progress.institution_abbrv == institution_abbrv)
+        .where(
+            Progress.institution_abbrv == institution_abbrv,
+            Progress.partition_key == partition_key
+        )
     )
     return result.scalar_one()
 
 
-async def get_start_page(session: AsyncSession, institution_abbrv: str) -> int:
+async def get_start_page(session: AsyncSession, institution_abbrv: str, partition_key: str) -> int:
     """
-        Find the first missing (unscraped) page for the given institution.
+        Find the first missing (unscraped) page for the given institution partition.
 
         Uses PostgreSQL's `generate_series` to produce all page numbers up to the current
         maximum, then left joins them with the `progress` table to detect any gaps in
@@ -60,7 +128,7 @@ async def get_start_page(session: AsyncSession, institution_abbrv: str) -> int:
         if no gaps exist.
     """
 
-    max_page = await _get_max_scraped_page(session, institution_abbrv)
+    max_page = await _get_max_scraped_page(session, institution_abbrv, partition_key)
 
     if max_page == 0:
         return 1
@@ -70,6 +138,7 @@ async def get_start_page(session: AsyncSession, institution_abbrv: str) -> int:
         FROM generate_series(:start_val, :end_val) AS gs(page)
         LEFT OUTER JOIN progress 
             ON progress.institution_abbrv = :abbrv
+            AND progress.partition_key = :partition_key
             AND progress.page_num = gs.page
             AND progress.scraped IS true
         WHERE progress.page_num IS NULL
@@ -79,6 +148,7 @@ async def get_start_page(session: AsyncSession, institution_abbrv: str) -> int:
         bindparam("start_val", type_=BigInteger),
         bindparam("end_val", type_=BigInteger),
         bindparam("abbrv", type_=String),
+        bindparam("partition_key", type_=String),
         bindparam("limit", type_=BigInteger),
     )
 
@@ -86,6 +156,7 @@ async def get_start_page(session: AsyncSession, institution_abbrv: str) -> int:
         "start_val": 1,
         "end_val": max_page + 1,
         "abbrv": institution_abbrv,
+        "partition_key": partition_key,
         "limit": 1,
     }
 
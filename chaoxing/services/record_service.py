@@ -1,8 +1,43 @@
-from sqlalchemy.ext.asyncio import AsyncSession
+import asyncio
+import logging
+import time
+from collections.abc import AsyncIterator, Iterable
+from datetime import datetime
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import DateTime, Integer, literal, select, text, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.dialects.postgresql import insert
 
-from chaoxing.models.record_model import RecordCreate
-from chaoxing.db.schema import Record
+from chaoxing.models.record_model import RecordCreate, RECORD_FIELDS
+from chaoxing.db.schema import Holding, Institution, Record
+from chaoxing.db.session import get_db_session
+from chaoxing.core.metrics import metrics
+from chaoxing.parser import record_hash
+from chaoxing.text_search import build_search_vector
+from chaoxing.utils import normalize_isbn
+from chaoxing.services.progress_service import PageCheckpoint, add_page_checkpoints, delete_page_checkpoints
+from chaoxing.services.partition_service import PartitionTotal, add_partition_counts
+
+
+logger = logging.getLogger(__name__)
+
+
+RECORD_COLUMNS = RECORD_FIELDS
+STAGED_COLUMNS = (*RECORD_COLUMNS, "content_hash", "search_text", "institution_id")
+STAGING_TABLE = "records_staging"
+# Columns of the rows streamed out of `records`; search vectors are derived data.
+STREAMED_COLUMNS = tuple(column.name for column in Record.__table__.columns if column.name != "search_vector")
+
+
+class WriteError(Exception):
+    pass
+
+
+def stage_row(row: tuple[Any, ...], institution_id: int | None) -> tuple[Any, ...]:
+    """Extend a row ordered like `RECORD_COLUMNS` with the columns `copy_records` expects."""
+    return (*row, record_hash(row), build_search_vector(row), institution_id)
 
 
 async def create_records(session: AsyncSession, records: list[RecordCreate]) -> int:
@@ -22,4 +57,280 @@ async def create_records(session: AsyncSession, records: list[RecordCreate]) ->
     result = await session.execute(stmt)
     inserted = result.scalars().all()
     await session.commit()
-    return len(inserted)
\ No newline at end of file
+    return len(inserted)
+
+
+async def copy_records(session: AsyncSession, rows: list[tuple[Any, ...]], upsert: bool = False) -> int:
+    """
+        Bulk load record rows through `COPY` and merge them into `records` without committing.
+
+        Rows are tuples ordered like `STAGED_COLUMNS`, as built by `stage_row`. They are
+        copied into a temporary staging table that lives as long as the pooled
+        connection, then merged with `ON CONFLICT DO NOTHING`. With `upsert`, existing
+        records are overwritten instead, but only when their content hash changed.
+        Search vectors are staged as text and cast on the way in. Every row with an
+        institution id also records a holding, whether or not the record was new.
+        Returns the number of records inserted or updated.
+    """
+
+    if not rows:
+        return 0
+
+    await session.execute(text(
+        f"CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} "
+        f"(LIKE {Record.__tablename__} INCLUDING DEFAULTS, search_text text, institution_id integer) "
+        f"ON COMMIT DELETE ROWS"
+    ))
+
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    await raw_connection.driver_connection.copy_records_to_table(
+        STAGING_TABLE, records=rows, columns=STAGED_COLUMNS
+    )
+
+    merged_columns = (*RECORD_COLUMNS, "content_hash", "search_vector")
+    columns = ", ".join(merged_columns)
+    values = ", ".join((*RECORD_COLUMNS, "content_hash", "search_text::tsvector"))
+    if upsert:
+        assignments = ", ".join(f"{column} = excluded.{column}" for column in merged_columns if column != "id")
+        merge = (
+            f"INSERT INTO {Record.__tablename__} ({columns}) "
+            f"SELECT DISTINCT ON (id) {values} FROM {STAGING_TABLE} ORDER BY id "
+            f"ON CONFLICT (id) DO UPDATE SET {assignments}, updated_at = now() "
+            f"WHERE {Record.__tablename__}.content_hash IS DISTINCT FROM excluded.content_hash"
+        )
+    else:
+        merge = (
+            f"INSERT INTO {Record.__tablename__} ({columns}) "
+            f"SELECT {values} FROM {STAGING_TABLE} "
+            f"ON CONFLICT (id) DO NOTHING"
+        )
+
+    result = await session.execute(text(merge))
+    await session.execute(text(
+        f"INSERT INTO {Holding.__tablename__} (institution_id, record_id) "
+        f"SELECT DISTINCT institution_id, id FROM {STAGING_TABLE} WHERE institution_id IS NOT NULL "
+        f"ON CONFLICT (institution_id, record_id) DO UPDATE SET seen_at = now()"
+    ))
+    return result.rowcount
+
+
+async def write_batch(session: AsyncSession, batch: "RecordBatch", upsert: bool = False) -> int:
+    """
+        Write a batch and its bookkeeping in one transaction.
+
+        Progress of re-planned partitions is reset first, then their fresh counts are
+        stored, the records merged, and finally the page checkpoints recorded, so a page
+        is only marked scraped once its records are stored.
+    """
+
+    await delete_page_checkpoints(session, batch.resets)
+    await add_partition_counts(session, batch.partitions)
+    num_written = await copy_records(session, batch.rows, upsert)
+    await add_page_checkpoints(session, batch.checkpoints)
+    await session.commit()
+    return num_written
+
+
+async def stream_records(
+    session: AsyncSession,
+    after: tuple[datetime, int] | None = None,
+    until: datetime | None = None,
+    chunk_size: int = 10_000,
+    with_institution: bool = False,
+) -> AsyncIterator[list[tuple[Any, ...]]]:
+    """
+        Yield chunks of `records` rows, ordered like `STREAMED_COLUMNS`, in `(updated_at, id)` order.
+
+        Rows are read through a server-side cursor, so only one chunk is held in memory.
+        `after` skips rows up to and including a previous `(updated_at, id)` position,
+        and `until` leaves out rows changed at or after that time. With `with_institution`,
+        each row ends with the abbreviation of an institution holding it, so a record
+        held by several institutions comes once per institution, and once with None
+        when it has no holdings.
+    """
+
+    stmt = select(*(Record.__table__.c[name] for name in STREAMED_COLUMNS))
+    if with_institution:
+        stmt = (
+            stmt.add_columns(Institution.abbrv)
+            .outerjoin(Holding, Holding.record_id == Record.id)
+            .outerjoin(Institution, Institution.id == Holding.institution_id)
+        )
+    stmt = stmt.order_by(Record.updated_at, Record.id)
+    if after is not None:
+        updated_at, record_id = after
+        position = tuple_(literal(updated_at, DateTime(timezone=True)), literal(record_id, Integer))
+        stmt = stmt.where(tuple_(Record.updated_at, Record.id) > position)
+    if until is not None:
+        stmt = stmt.where(Record.updated_at < until)
+
+    result = await session.stream(stmt.execution_options(yield_per=chunk_size))
+    async for chunk in result.partitions():
+        yield [tuple(row) for row in chunk]
+
+
+async def find_records_by_isbns(session: AsyncSession, isbns: Iterable[str]) -> dict[str, list[int]]:
+    """
+        Map each of `isbns` to the ids of the records listing it.
+
+        ISBNs are normalized like stored ones, so ISBN-10s and hyphenated forms find
+        their ISBN-13 records. All of them are looked up in one query, an overlap
+        (`&&`) with the whole array that is answered from the GIN index on `isbns`.
+        ISBNs without records are left out of the result.
+    """
+
+    wanted: dict[str, list[str]] = {}
+    for value in isbns:
+        if isbn := normalize_isbn(value):
+            wanted.setdefault(isbn, []).append(value)
+    if not wanted:
+        return {}
+
+    stmt = select(Record.id, Record.isbns).where(Record.isbns.overlap(list(wanted))).order_by(Record.id)
+    found: dict[str, list[int]] = {}
+    for record_id, record_isbns in await session.execute(stmt):
+        for isbn in record_isbns:
+            for value in wanted.get(isbn, ()):
+                found.setdefault(value, []).append(record_id)
+    return found
+
+
+@dataclass
+class RecordBatch:
+    rows: list[tuple[Any, ...]] = field(default_factory=list)
+    checkpoints: list[PageCheckpoint] = field(default_factory=list)
+    partitions: list[PartitionTotal] = field(default_factory=list)
+    resets: list[tuple[str, str]] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.rows or self.checkpoints or self.partitions or self.resets)
+
+
+class RecordWriter:
+    """
+        Collect parsed records from page workers and write them in large batches.
+
+        Records accumulate in memory until `batch_size` rows are buffered or
+        `flush_interval` seconds pass, and the batch is then queued for a background
+        flusher that loads it with `copy_records`. The queue holds at most
+        `max_pending_batches`, so producers slow down when the database falls behind.
+        Page checkpoints passed to `add` are written in the same transaction as the
+        batch that carries the page's records. With `upsert`, changed records overwrite
+        the stored ones. Batches that fail to write are counted in `failed`, and `close`
+        raises `WriteError` when there were any.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        batch_size: int = 5_000,
+        flush_interval: float = 5.0,
+        max_pending_batches: int = 4,
+        upsert: bool = False,
+    ) -> None:
+        self.session_factory = session_factory
+        self.upsert = upsert
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self.inserted = 0
+        self.received = 0
+        self.failed = 0
+
+        self._batch = RecordBatch()
+        self._batches: asyncio.Queue[RecordBatch | None] = asyncio.Queue(maxsize=max_pending_batches)
+        self._last_flush = time.monotonic()
+        self._submitting = asyncio.Lock()
+        self._flusher: asyncio.Task | None = None
+        self._ticker: asyncio.Task | None = None
+
+    async def __aenter__(self) -> "RecordWriter":
+        self._flusher = asyncio.create_task(self._drain())
+        self._ticker = asyncio.create_task(self._tick())
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.close()
+
+    async def add(
+        self,
+        records: list[tuple[Any, ...]],
+        checkpoint: PageCheckpoint | None = None,
+        institution_id: int | None = None,
+    ) -> None:
+        """Buffer record rows ordered like `RECORD_COLUMNS`, as built by `parse_record_rows`, held by an institution."""
+
+        self._batch.rows.extend(stage_row(record, institution_id) for record in records)
+        if checkpoint is not None:
+            self._batch.checkpoints.append(checkpoint)
+
+        self.received += len(records)
+        if len(self._batch.rows) >= self.batch_size:
+            await self._submit()
+
+    def add_partition(self, total: PartitionTotal, reset: bool = False) -> None:
+        """Store a planned partition's count, optionally forgetting its scraped pages first."""
+
+        institution_abbrv, partition_key, _, _ = total
+        self._batch.partitions.append(total)
+        if reset:
+            self._batch.resets.append((institution_abbrv, partition_key))
+
+    async def close(self) -> None:
+        if self._ticker is not None:
+            # A submit the ticker is blocked in leaves its batch buffered when cancelled,
+            # so the final submit below still writes it.
+            self._ticker.cancel()
+            try:
+                await self._ticker
+            except asyncio.CancelledError:
+                pass
+            self._ticker = None
+
+        if self._flusher is not None:
+            await self._submit()
+            await self._batches.put(None)
+            await self._flusher
+            self._flusher = None
+
+        if self.failed:
+            raise WriteError(f"{self.failed} record batches failed to write")
+
+    async def _submit(self) -> None:
+        async with self._submitting:
+            self._last_flush = time.monotonic()
+            if not self._batch:
+                return
+
+            # The batch is only swapped out once it is queued; rows added while the
+            # queue is full join it, and a cancelled put leaves it buffered.
+            await self._batches.put(self._batch)
+            self._batch = RecordBatch()
+        metrics.set("db_pending_batches", self._batches.qsize())
+
+    async def _tick(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            if time.monotonic() - self._last_flush >= self.flush_interval:
+                await self._submit()
+
+    async def _drain(self) -> None:
+        while (batch := await self._batches.get()) is not None:
+            try:
+                async with get_db_session(self.session_factory) as db:
+                    with metrics.timer("db_connect_seconds"):
+                        await db.connection()
+                    with metrics.timer("db_batch_seconds"):
+                        num_written = await write_batch(db, batch, self.upsert)
+                self.inserted += num_written
+                metrics.inc("records_written_total", num_written)
+                metrics.inc("records_conflicting_total", len(batch.rows) - num_written)
+                logger.info(f"Wrote {num_written} of {len(batch.rows)} records to DB.")
+            except Exception as e:
+                self.failed += 1
+                metrics.inc("db_batches_failed_total")
+                logger.exception(
+                    f"Failed to write a batch of {len(batch.rows)} records "
+                    f"from {len(batch.checkpoints)} pages: {e}"
+                )
@@ -0,0 +1,137 @@
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import bindparam, cast, func, literal, select, update
+from sqlalchemy.dialects.postgresql import TSQUERY, TSVECTOR
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from chaoxing.db.schema import Record
+from chaoxing.models.record_model import RECORD_FIELDS
+from chaoxing.text_search import build_search_query, build_search_vector
+
+
+FACET_COLUMNS = ("doc_type", "language", "year_published")
+HIT_COLUMNS = ("id", "title", "author", "publisher", "year_published", "doc_type", "language", "subject")
+
+
+@dataclass
+class SearchHit:
+    rank: float
+    record: dict[str, Any]
+
+
+@dataclass
+class SearchResults:
+    """
+        A page of ranked hits and the facet counts of the matches they were ranked among.
+
+        `matched` counts those matches; when `truncated` is set the query matched more
+        records than the candidate window, and counts cover only the best ranked `matched`.
+    """
+
+    hits: list[SearchHit] = field(default_factory=list)
+    facets: dict[str, dict[str, int]] = field(default_factory=dict)
+    matched: int = 0
+    truncated: bool = False
+
+
+async def search_records(
+    session: AsyncSession,
+    query: str,
+    filters: dict[str, str] | None = None,
+    limit: int = 20,
+    offset: int = 0,
+    window: int = 5_000,
+) -> SearchResults:
+    """
+        Full-text search over titles, authors, subjects, publishers, tags and summaries.
+
+        Records must contain every token of `query`; `filters` narrows them down to
+        exact values of `FACET_COLUMNS`. The `window` best ranked matches are read with
+        their `ts_rank` and facet values and counted here, and only the requested page
+        of hits is then fetched in full. Broad queries still rank every match, but only
+        carry the facet values of the window out of Postgres.
+    """
+
+    tsquery_text = build_search_query(query)
+    if tsquery_text is None:
+        return SearchResults()
+
+    tsquery = cast(literal(tsquery_text), TSQUERY)
+    rank = func.ts_rank(Record.search_vector, tsquery)
+    stmt = (
+        select(Record.id, rank, *(Record.__table__.c[column] for column in FACET_COLUMNS))
+        .where(Record.search_vector.op("@@")(tsquery))
+        .order_by(rank.desc(), Record.id)
+        .limit(window)
+    )
+    for column, value in (filters or {}).items():
+        if column not in FACET_COLUMNS:
+            raise ValueError(f"Cannot filter search results by {column!r}.")
+        stmt = stmt.where(Record.__table__.c[column] == value)
+
+    candidates = (await session.execute(stmt)).all()
+
+    facets = {column: Counter() for column in FACET_COLUMNS}
+    for candidate in candidates:
+        for column, value in zip(FACET_COLUMNS, candidate[2:]):
+            if value is not None:
+                facets[column][value] += 1
+
+    ranks = {candidate[0]: candidate[1] for candidate in candidates[offset:offset + limit]}
+
+    hits: list[SearchHit] = []
+    if ranks:
+        rows_stmt = select(*(Record.__table__.c[column] for column in HIT_COLUMNS)).where(Record.id.in_(ranks))
+        rows = {row.id: row._asdict() for row in await session.execute(rows_stmt)}
+        hits = [SearchHit(ranks[record_id], rows[record_id]) for record_id in ranks if record_id in rows]
+
+    return SearchResults(
+        hits=hits,
+        facets={column: dict(counts.most_common()) for column, counts in facets.items()},
+        matched=len(candidates),
+        truncated=len(candidates) >= window,
+    )
+
+
+async def backfill_search_vectors(
+    session: AsyncSession,
+    after: int | None = None,
+    batch_size: int = 5_000,
+    rebuild: bool = False,
+) -> int | None:
+    """
+        Build the missing search vectors of the next `batch_size` records after id `after`, and commit.
+
+        With `rebuild`, existing vectors are rebuilt too, which picks up changes to how
+        text is tokenized. Returns the last id looked at, to pass as `after` to the next
+        call, or None once every record was covered. Records are walked by primary key,
+        so each batch is an index range scan however much of the table was already backfilled.
+    """
+
+    pending = literal(True) if rebuild else Record.search_vector.is_(None)
+    stmt = select(*(Record.__table__.c[name] for name in RECORD_FIELDS), pending)
+    if after is not None:
+        stmt = stmt.where(Record.id > after)
+    rows = [tuple(row) for row in await session.execute(stmt.order_by(Record.id).limit(batch_size))]
+    if not rows:
+        return None
+
+    id_index = RECORD_FIELDS.index("id")
+    # Records without searchable text get an empty vector, so they are not picked up again.
+    values = [
+        {"record_id": row[id_index], "vector": build_search_vector(row[:-1]) or ""}
+        for row in rows
+        if row[-1]
+    ]
+    if values:
+        table = Record.__table__
+        await session.execute(
+            update(table)
+            .where(table.c.id == bindparam("record_id"))
+            .values(search_vector=cast(bindparam("vector"), TSVECTOR)),
+            values,
+        )
+        await session.commit()
+    return rows[-1][id_index]
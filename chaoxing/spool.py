@@ -0,0 +1,273 @@
+import os
+import json
+import time
+import queue
+import asyncio
+import logging
+import threading
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from chaoxing.db.session import get_db_session
+from chaoxing.services.progress_service import PageCheckpoint
+from chaoxing.services.partition_service import PartitionTotal, complete_partitions
+from chaoxing.services.record_service import RECORD_COLUMNS, RecordBatch, stage_row, write_batch
+from chaoxing.utils import normalize_isbns
+
+
+logger = logging.getLogger(__name__)
+
+
+SEGMENT_SUFFIX = ".jsonl"
+OPEN_SUFFIX = ".open"
+
+ISBNS_INDEX = RECORD_COLUMNS.index("isbns")
+TAGS_INDEX = RECORD_COLUMNS.index("tags")
+
+
+class SpoolWriter:
+    """
+        Drop-in replacement for `RecordWriter` that appends to local segment files.
+
+        Every `add` and `add_partition` becomes one JSON line in the current segment of
+        this process. Lines are encoded on the event loop and handed to a writer thread,
+        which does all file I/O: it fsyncs every `fsync_interval` seconds rather than
+        line by line, and seals a segment (renames it to `.jsonl`) once it reaches
+        `segment_size` bytes or the writer closes. Only sealed segments are picked up
+        by `load_spool`. Page checkpoints travel with the records, so pages count as
+        scraped only once their segment is loaded. A failed write stops the thread and
+        is raised by the next `add` or by `close`.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        segment_size: int = 64 * 1024 * 1024,
+        fsync_interval: float = 1.0,
+        upsert: bool = False,
+    ) -> None:
+        self.directory = directory
+        self.segment_size = segment_size
+        self.fsync_interval = fsync_interval
+        self.upsert = upsert
+
+        self.inserted = 0
+        self.received = 0
+
+        self._lines: queue.SimpleQueue[bytes | None] = queue.SimpleQueue()
+        self._thread: threading.Thread | None = None
+        self._error: Exception | None = None
+
+        # Only touched by the writer thread.
+        self._file = None
+        self._path: Path | None = None
+        self._size = 0
+        self._dirty = False
+
+    async def __aenter__(self) -> "SpoolWriter":
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._thread = threading.Thread(target=self._write_lines, name="spool-writer", daemon=True)
+        self._thread.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.close()
+
+    async def add(
+        self,
+        records: list[tuple[Any, ...]],
+        checkpoint: PageCheckpoint | None = None,
+        institution_id: int | None = None,
+    ) -> None:
+        self._append({"rows": records, "checkpoint": checkpoint, "institution_id": institution_id})
+        self.received += len(records)
+        # Spooled records are only inserted by the loader; count them as accepted here.
+        self.inserted += len(records)
+
+    def add_partition(self, total: PartitionTotal, reset: bool = False) -> None:
+        self._append({"partition": total, "reset": reset})
+
+    async def close(self) -> None:
+        if self._thread is not None:
+            self._lines.put(None)
+            await asyncio.to_thread(self._thread.join)
+            self._thread = None
+
+        if self._error is not None:
+            raise self._error
+
+    def _append(self, entry: dict[str, Any]) -> None:
+        if self._error is not None:
+            raise self._error
+        self._lines.put(encode_entry(entry))
+
+    def _write_lines(self) -> None:
+        synced_at = time.monotonic()
+        try:
+            while True:
+                try:
+                    line = self._lines.get(timeout=max(0.0, synced_at + self.fsync_interval - time.monotonic()))
+                except queue.Empty:
+                    line = b""
+
+                if line is None:
+                    break
+                if line:
+                    self._write(line)
+                if time.monotonic() - synced_at >= self.fsync_interval:
+                    self._sync()
+                    synced_at = time.monotonic()
+
+            self._seal()
+        except Exception as e:
+            logger.exception(f"Failed to write to the spool in {self.directory}: {e}")
+            self._error = e
+
+    def _write(self, line: bytes) -> None:
+        if self._file is None:
+            self._open()
+
+        self._file.write(line)
+        self._size += len(line)
+        self._dirty = True
+
+        if self._size >= self.segment_size:
+            self._seal()
+
+    def _open(self) -> None:
+        name = f"segment-{time.time_ns()}-{os.getpid()}{SEGMENT_SUFFIX}{OPEN_SUFFIX}"
+        self._path = self.directory / name
+        self._file = self._path.open("ab")
+        header = encode_entry({"upsert": self.upsert})
+        self._file.write(header)
+        self._size = len(header)
+
+    def _sync(self) -> None:
+        if self._file is not None and self._dirty:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._dirty = False
+
+    def _seal(self) -> None:
+        if self._file is None:
+            return
+
+        self._sync()
+        self._file.close()
+        self._path.rename(self._path.with_suffix(""))
+        self._file = None
+        self._path = None
+
+
+def encode_entry(entry: dict[str, Any]) -> bytes:
+    return (json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def upgrade_row(row: list[Any]) -> tuple[Any, ...]:
+    """
+        Record row of a spooled entry, with ISBNs and tags as lists.
+
+        Segments spooled before they became arrays hold them as comma-joined strings;
+        those are converted the way migration 0009 converted stored records.
+    """
+
+    if isinstance(isbns := row[ISBNS_INDEX], str):
+        row[ISBNS_INDEX] = normalize_isbns(isbns)
+    if isinstance(tags := row[TAGS_INDEX], str):
+        row[TAGS_INDEX] = tags.split(", ") if tags else None
+    return tuple(row)
+
+
+def read_segment(path: Path) -> Iterator[dict[str, Any]]:
+    """Yield the entries of a segment, ignoring a last line cut short by a crash."""
+
+    with path.open("rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                logger.warning(f"Ignoring a truncated last entry in {path.name}.")
+                return
+            yield json.loads(line)
+
+
+async def load_segment(
+    session_factory: async_sessionmaker[AsyncSession],
+    path: Path,
+    batch_size: int = 5_000,
+) -> tuple[int, set[str]]:
+    """
+        Replay a segment through `write_batch` in batches of about `batch_size` records.
+
+        Entries are applied in the order they were spooled, and every write is an upsert
+        or a delete of checkpoints that are added again later in the segment, so loading
+        a segment twice leaves the database as loading it once. Returns the number of
+        records written and the institutions the segment touched.
+    """
+
+    entries = read_segment(path)
+    upsert = next(entries, {}).get("upsert", False)
+
+    written = 0
+    institutions: set[str] = set()
+    batch = RecordBatch()
+
+    async with get_db_session(session_factory) as db:
+        for entry in entries:
+            if "partition" in entry:
+                total = tuple(entry["partition"])
+                batch.partitions.append(total)
+                if entry["reset"]:
+                    batch.resets.append(total[:2])
+                institutions.add(total[0])
+                continue
+
+            # Segments spooled before holdings existed carry no institution id.
+            institution_id = entry.get("institution_id")
+            batch.rows.extend(stage_row(upgrade_row(row), institution_id) for row in entry["rows"])
+            if (checkpoint := entry["checkpoint"]) is not None:
+                batch.checkpoints.append(tuple(checkpoint))
+                institutions.add(checkpoint[0])
+
+            if len(batch.rows) >= batch_size:
+                written += await write_batch(db, batch, upsert)
+                batch = RecordBatch()
+
+        if batch:
+            written += await write_batch(db, batch, upsert)
+
+    return written, institutions
+
+
+async def load_spool(
+    session_factory: async_sessionmaker[AsyncSession],
+    directory: Path,
+    batch_size: int = 5_000,
+    include_open: bool = False,
+) -> int:
+    """
+        Load every sealed segment in `directory` into Postgres, oldest first, deleting
+        each one once it is committed. With `include_open`, segments left unsealed by a
+        crashed scraper are loaded too; only use it while no scraper is writing.
+    """
+
+    patterns = [f"segment-*{SEGMENT_SUFFIX}"]
+    if include_open:
+        patterns.append(f"segment-*{SEGMENT_SUFFIX}{OPEN_SUFFIX}")
+    segments = sorted(path for pattern in patterns for path in directory.glob(pattern))
+
+    written = 0
+    institutions: set[str] = set()
+    for path in segments:
+        segment_written, segment_institutions = await load_segment(session_factory, path, batch_size)
+        path.unlink()
+        written += segment_written
+        institutions |= segment_institutions
+        logger.info(f"Loaded {segment_written} records from {path.name}.")
+
+    async with get_db_session(session_factory) as db:
+        for institution_abbrv in sorted(institutions):
+            await complete_partitions(db, institution_abbrv)
+
+    return written
@@ -0,0 +1,102 @@
+import re
+import unicodedata
+from collections.abc import Iterator
+from typing import Any
+
+from chaoxing.models.record_model import RECORD_FIELDS
+
+
+# Hiragana, katakana, CJK ideographs and hangul. Runs of these are indexed as bigrams
+# and single characters, since none of Postgres' text search parsers can segment them
+# into words.
+CJK_RANGES = "぀-ヿ㐀-䶿一-鿿豈-﫿가-힯"
+TOKEN_PATTERN = re.compile(rf"(?P<cjk>[{CJK_RANGES}]+)|(?P<word>[^\W{CJK_RANGES}_]+)")
+
+# tsvector weight of each searchable field; ts_rank scores A highest and D lowest.
+SEARCH_WEIGHTS = {
+    "title": "A",
+    "author": "B",
+    "subject": "B",
+    "publisher": "C",
+    "tags": "C",
+    "summary": "D",
+}
+SEARCH_FIELD_INDEXES = [(RECORD_FIELDS.index(name), weight) for name, weight in SEARCH_WEIGHTS.items()]
+
+# Limits of the tsvector type.
+MAX_POSITION = 16_383
+MAX_POSITIONS_PER_LEXEME = 255
+MAX_LEXEME_BYTES = 2_046
+
+
+def tokenize(text: str, unigrams: bool = False) -> Iterator[str]:
+    """
+        Split text into search tokens.
+
+        Text is NFKC normalized, so full-width letters and digits match their ASCII
+        forms, and lowercased. Letters and digits outside CJK form one token per word.
+        CJK runs yield overlapping character bigrams, or the character itself for a
+        run of one, so `中国历史` becomes `中国 国历 历史`. With `unigrams`, every CJK
+        character is yielded on its own as well, before the bigram it starts.
+    """
+
+    text = unicodedata.normalize("NFKC", text).lower()
+    for match in TOKEN_PATTERN.finditer(text):
+        run = match.group()
+        if match.lastgroup == "word" or len(run) == 1:
+            yield run
+            continue
+        for index in range(len(run)):
+            if unigrams:
+                yield run[index]
+            if index < len(run) - 1:
+                yield run[index:index + 2]
+
+
+def build_search_vector(row: tuple[Any, ...]) -> str | None:
+    """
+        Weighted `tsvector` literal of a record row ordered like `RECORD_FIELDS`.
+
+        The literal is cast to `tsvector` as is, so the lexemes are exactly the tokens
+        produced here and no text search configuration gets to re-parse them. CJK
+        characters are indexed on their own too, so a one character query also finds
+        words that end with it.
+    """
+
+    positions: dict[str, list[str]] = {}
+    position = 0
+    for index, weight in SEARCH_FIELD_INDEXES:
+        value = row[index]
+        if not value:
+            continue
+        for token in tokenize(" ".join(value) if isinstance(value, list) else str(value), unigrams=True):
+            position = min(position + 1, MAX_POSITION)
+            lexeme_positions = positions.setdefault(token, [])
+            if len(lexeme_positions) < MAX_POSITIONS_PER_LEXEME:
+                lexeme_positions.append(f"{position}{weight}")
+
+    if not positions:
+        return None
+
+    return " ".join(
+        f"{_quote(token)}:{','.join(lexeme_positions)}"
+        for token, lexeme_positions in positions.items()
+        if len(token.encode("utf-8")) <= MAX_LEXEME_BYTES
+    )
+
+
+def build_search_query(text: str) -> str | None:
+    """
+        `tsquery` literal matching records that contain every token of `text`, or None
+        without tokens. A lone CJK character matches its unigram, so records with it
+        anywhere in a word are found.
+    """
+
+    tokens = list(dict.fromkeys(tokenize(text)))
+    if not tokens:
+        return None
+    return " & ".join(_quote(token) for token in tokens)
+
+
+def _quote(token: str) -> str:
+    return "'" + token.replace("\\", "\\\\").replace("'", "''") + "'"
@@ -1,3 +1,10 @@
+import re
+
+
+ISBN_PREFIX = re.compile(r"ISBN(?:1[03])?:?")
+ISBN_DIGITS = re.compile(r"[0-9]+X?")
+ISBN_SEPARATORS = re.compile(r"[,;]")
+ISBN_STRIP = re.compile(r"[\s-]")
 
 
 def between(text: str, left: str, right: str) -> str | None:
@@ -10,4 +17,49 @@ def between(text: str, left: str, right: str) -> str | None:
     if end_index == -1:
         return None
 
-    return text[start_index:end_index]
\ No newline at end of file
+    return text[start_index:end_index]
+
+
+def normalize_isbn(value: str) -> str | None:
+    """
+        Canonical form of an ISBN: its ISBN-13 digits, without hyphens or spaces.
+
+        An `ISBN` label and qualifiers after the number, as in `7-02-000220-X (pbk.)`,
+        are dropped, and ISBN-10s with a valid check digit become their 978 ISBN-13.
+        Values that are not recognizably an ISBN are kept with separators stripped,
+        so no data is lost. Returns None for blank values.
+    """
+
+    clean = ISBN_STRIP.sub("", value).upper()
+    if prefix := ISBN_PREFIX.match(clean):
+        clean = clean[prefix.end():]
+
+    digits = ISBN_DIGITS.match(clean)
+    isbn = digits.group() if digits else ""
+    if len(isbn) == 13 and isbn.isdigit():
+        return isbn
+    if len(isbn) == 10 and _isbn10_valid(isbn):
+        return _isbn13("978" + isbn[:9])
+    return clean or None
+
+
+def normalize_isbns(values: str | list[str] | None) -> list[str] | None:
+    """Normalize a list, or a comma or semicolon separated string, of ISBNs; duplicates are dropped."""
+
+    if not values:
+        return None
+    if isinstance(values, str):
+        values = ISBN_SEPARATORS.split(values)
+
+    isbns = dict.fromkeys(isbn for value in values if (isbn := normalize_isbn(value)))
+    return list(isbns) or None
+
+
+def _isbn10_valid(isbn: str) -> bool:
+    total = sum((10 - index) * (10 if char == "X" else int(char)) for index, char in enumerate(isbn))
+    return total % 11 == 0
+
+
+def _isbn13(first_twelve: str) -> str:
+    total = sum(int(char) * (3 if index % 2 else 1) for index, char in enumerate(first_twelve))
+    return first_twelve + str(-total % 10)
@@ -0,0 +1,119 @@
+import sys
+import asyncio
+import logging
+import argparse
+from pathlib import Path
+
+import httpx
+from tqdm import tqdm
+
+from tusk.task_pool import TaskPool
+from tusk.rate_limit import SharedRateLimiter
+from chaoxing.core.config import config
+from chaoxing.api.ebook import fetch_ebook_url
+from chaoxing.api.throttle import install_rate_limiter
+from chaoxing.models.ebook_model import EbookCreate
+from chaoxing.db.session import create_session_factory, get_db_session
+from chaoxing.services.ebook_service import create_ebooks, stream_pending_ebook_ids
+from chaoxing.services.institution_service import get_institution_by_abbrv
+from chaoxing.utils import between
+from chaoxing.core.logging import setup_logging
+
+
+LOG_FILE = Path("logs/enrich.log")
+logger = logging.getLogger("chaoxing")
+
+
+async def enrich_record(
+    client: httpx.AsyncClient,
+    hostname: str,
+    record_id: int,
+    results: list[EbookCreate],
+) -> None:
+    try:
+        read_url = await fetch_ebook_url(client, hostname, record_id)
+    except Exception as e:
+        # No row is written, so the record stays pending for the next run.
+        logger.warning(f"Failed to fetch ebook of {record_id=} from {hostname}: {e}")
+        return
+
+    results.append(EbookCreate(id=record_id, read_url=read_url))
+
+
+async def enrich_institution(
+    institution_hostname: str,
+    db_url: str,
+    transport: httpx.AsyncBaseTransport | None = None,
+) -> None:
+    """
+        Fill the `ebooks` table for every record of an institution with an ecopy that has no row yet.
+
+        Pending ids are streamed from the database while read URLs are fetched through
+        a pool of `ebook_concurrency` requests, and results are upserted every
+        `ebook_batch_size` records. Records the host lists no ebook for get a row with
+        an empty `read_url`, so only failed lookups, including ones the host answered
+        with `success: false`, are retried by the next run.
+
+        Records are picked through their holdings, so each one is looked up on a host
+        that actually holds it. Records scraped before holdings existed have none and
+        wait until a scrape of one of their institutions records a holding.
+    """
+
+    db_factory = create_session_factory(db_url)
+    limits = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=30.0)
+    timeout = httpx.Timeout(15.0, read=30.0, write=15.0, pool=10.0)
+
+    written = found = 0
+    results: list[EbookCreate] = []
+
+    async def flush() -> None:
+        nonlocal written, found
+        batch = results.copy()
+        results.clear()
+        written += await create_ebooks(db, batch)
+        found += sum(ebook.read_url is not None for ebook in batch)
+
+    async with get_db_session(db_factory) as db:
+        institution = await get_institution_by_abbrv(db, between(institution_hostname, "find", "."))
+    if institution is None:
+        logger.warning(f"{institution_hostname} was never scraped, so none of its records are pending.")
+        await db_factory.kw["bind"].dispose()
+        return
+
+    async with (
+        httpx.AsyncClient(http2=True, limits=limits, timeout=timeout, transport=transport) as client,
+        get_db_session(db_factory) as reader,
+        get_db_session(db_factory) as db,
+    ):
+        with tqdm(desc=f"Enriching {institution_hostname}", file=sys.stderr) as pbar:
+            async with TaskPool(config.ebook_concurrency, progress_callback=pbar.update) as pool:
+                async for record_ids in stream_pending_ebook_ids(reader, institution.id, config.ebook_batch_size):
+                    for record_id in record_ids:
+                        await pool.submit(enrich_record, client, institution_hostname, record_id, results)
+                    if len(results) >= config.ebook_batch_size:
+                        await flush()
+                await pool.join()
+            await flush()
+
+    logger.info(f"Enrichment completed for {institution_hostname}: {written} ebooks written, {found} with a read URL.")
+    engine = db_factory.kw["bind"]
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fetch read URLs of records that have an ecopy.")
+    parser.add_argument("hostname", help="institution hostname, e.g. findecnu.libsp.cn")
+    args = parser.parse_args()
+
+    setup_logging(log_level=config.log_level, log_file=LOG_FILE)
+    logging.getLogger("httpx").setLevel(logging.ERROR)
+
+    # Runs next to the scraper in its own process, so it keeps a host budget of its own.
+    if config.host_rate_limit is not None:
+        install_rate_limiter(SharedRateLimiter(rate=None, host_rate=config.host_rate_limit))
+
+    asyncio.run(enrich_institution(args.hostname, config.db_url))
+
+
+if __name__ == "__main__":
+    main()
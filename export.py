@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import argparse
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from chaoxing.core.config import config
+from chaoxing.db.schema import Record
+from chaoxing.db.session import create_session_factory, get_db_session
+from chaoxing.exporter import FORMATS, ShardedWriter, read_watermark, write_watermark
+from chaoxing.services.record_service import STREAMED_COLUMNS, stream_records
+from chaoxing.core.logging import setup_logging
+
+
+LOG_FILE = Path("logs/export.log")
+WATERMARK_FILE = "_watermark.json"
+# Rows written by transactions still open when the export starts may carry an older
+# `updated_at` than rows already exported; leaving out the last minute avoids skipping them.
+EXPORT_LAG = timedelta(minutes=1)
+
+logger = logging.getLogger("chaoxing")
+
+
+async def export_records(
+    db_url: str,
+    directory: Path,
+    file_format: str = "jsonl",
+    shard_size: int = 256 * 1024 * 1024,
+    split_by: str | None = None,
+    incremental: bool = False,
+    chunk_size: int = 10_000,
+) -> int:
+    """
+        Stream the `records` table into compressed shards under `directory`.
+
+        Shards of one run are named after its start time, and split into `<column>=<value>`
+        subdirectories when `split_by` is given. Splitting by `institution` follows the
+        holdings, so a record held by several institutions is exported under each of
+        them. Every run stores the position of its last row in the watermark file, and
+        an `incremental` run exports only the rows added or changed since. Returns the
+        number of exported rows.
+    """
+
+    db_factory = create_session_factory(db_url)
+    watermark_path = directory / WATERMARK_FILE
+    after = read_watermark(watermark_path) if incremental else None
+    until = datetime.now(timezone.utc) - EXPORT_LAG
+
+    columns = list(STREAMED_COLUMNS)
+    id_index, updated_at_index = columns.index("id"), columns.index("updated_at")
+    by_institution = split_by == "institution"
+    # Rows streamed with their institution carry it as an extra last column.
+    split_index = len(columns) if by_institution else columns.index(split_by) if split_by else None
+    prefix = f"records-{until:%Y%m%dT%H%M%S}"
+
+    writers: dict[str | None, ShardedWriter] = {}
+
+    def get_writer(value: str | None) -> ShardedWriter:
+        writer = writers.get(value)
+        if writer is None:
+            shard_directory = directory if split_by is None else directory / f"{split_by}={_path_safe(value)}"
+            writer = writers[value] = ShardedWriter(
+                shard_directory, prefix, file_format, columns, Record.__table__, shard_size
+            )
+        return writer
+
+    last_row = None
+    try:
+        async with get_db_session(db_factory) as db:
+            async for chunk in stream_records(db, after, until, chunk_size, with_institution=by_institution):
+                if split_index is None:
+                    get_writer(None).write(chunk)
+                else:
+                    groups = defaultdict(list)
+                    for row in chunk:
+                        groups[row[split_index]].append(row[:len(columns)])
+                    for value, rows in groups.items():
+                        get_writer(value).write(rows)
+                last_row = chunk[-1]
+    finally:
+        for writer in writers.values():
+            writer.close()
+        await db_factory.kw["bind"].dispose()
+
+    exported = sum(writer.rows for writer in writers.values())
+    shards = sum(len(writer.paths) for writer in writers.values())
+    if last_row is not None:
+        write_watermark(watermark_path, last_row[updated_at_index], last_row[id_index])
+
+    logger.info(f"Exported {exported} records into {shards} shards under {directory}.")
+    return exported
+
+
+def _path_safe(value: str | None) -> str:
+    if not value:
+        return "__empty__"
+    return value.replace("/", "_").replace("\\", "_")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export the records table to compressed shards.")
+    parser.add_argument("directory", type=Path)
+    parser.add_argument("--format", choices=FORMATS, default="jsonl")
+    parser.add_argument("--shard-size-mb", type=int, default=256)
+    parser.add_argument("--split-by", choices=["doc_type", "institution"])
+    parser.add_argument("--incremental", action="store_true", help="only rows changed since the last export")
+    parser.add_argument("--fetch-size", type=int, default=10_000, help="rows per cursor fetch")
+    args = parser.parse_args()
+
+    setup_logging(log_level=config.log_level, log_file=LOG_FILE)
+
+    asyncio.run(export_records(
+        config.db_url,
+        args.directory,
+        file_format=args.format,
+        shard_size=args.shard_size_mb * 1024 * 1024,
+        split_by=args.split_by,
+        incremental=args.incremental,
+        chunk_size=args.fetch_size,
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+import asyncio
+import logging
+import argparse
+from pathlib import Path
+
+from chaoxing.core.config import config
+from chaoxing.db.session import create_session_factory
+from chaoxing.spool import load_spool
+from chaoxing.core.logging import setup_logging
+
+
+LOG_FILE = Path("logs/load_spool.log")
+logger = logging.getLogger("chaoxing")
+
+
+async def run(db_url: str, directory: Path, include_open: bool) -> None:
+    db_factory = create_session_factory(db_url)
+    try:
+        written = await load_spool(db_factory, directory, config.db_batch_size, include_open)
+        logger.info(f"Spool load completed: {written} records written from {directory}.")
+    finally:
+        await db_factory.kw["bind"].dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load spooled scrape segments into Postgres.")
+    parser.add_argument("--directory", type=Path, default=config.spool_dir)
+    parser.add_argument(
+        "--include-open",
+        action="store_true",
+        help="also load segments left unsealed by a crashed scraper; only while no scraper runs",
+    )
+    args = parser.parse_args()
+
+    setup_logging(log_level=config.log_level, log_file=LOG_FILE)
+    asyncio.run(run(config.db_url, args.directory, args.include_open))
+
+
+if __name__ == "__main__":
+    main()
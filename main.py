@@ -1,14 +1,149 @@
+import os
+import socket
+import logging
 import asyncio
+import threading
 import multiprocessing as mp
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from collections.abc import Callable
 from pathlib import Path
+from typing import Any
 
 from chaoxing.core.config import config
+from chaoxing.api.cache import ResponseCache, install_response_cache
+from chaoxing.api.throttle import install_rate_limiter
+from chaoxing.core.metrics import aggregate_worker_snapshots
+from chaoxing.core.logging import setup_logging, setup_worker_logging
+from chaoxing.core.profiling import clear_profiles, write_profile_report
+from chaoxing.runtime import open_runtime
+from chaoxing.dedup import RecordDeduplicator
+from chaoxing.db.session import create_session_factory, get_db_session
+from chaoxing.services.job_service import count_jobs, enqueue_institutions, get_failed_jobs, restart_planning
+from tusk.rate_limit import SharedRateLimiter
 import scraper
 
 
-def scraper_process(institution_hostname: str, db_url: str) -> None:
-    asyncio.run(scraper.scrape_institution(institution_hostname, db_url))
+LOG_FILE = Path("logs/chaoxing.log")
+# Connections one job loop can hold at once: its writer's flusher, its heartbeat, and
+# the claim, checkpoint or completion query of the loop itself.
+DB_CONNECTIONS_PER_JOB_LOOP = 3
+
+logger = logging.getLogger("chaoxing")
+
+
+def worker_process(rate_limiter: SharedRateLimiter | None, db_connections: int, log_queue: Any) -> None:
+    init_worker(rate_limiter, log_queue)
+    asyncio.run(run_worker(db_connections))
+
+
+async def run_worker(db_connections: int) -> None:
+    """
+        Run `jobs_per_worker` job loops on one client and one database pool of `db_connections`.
+
+        Record ids seen by the loops are shared per institution, so duplicates across the
+        partitions scraped by this worker are dropped before they reach the database.
+        Each loop claims jobs under its own name, so loops never act on each other's jobs.
+    """
+
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    dedups: dict[str, RecordDeduplicator] = {}
+    async with open_runtime(config.db_url, pool_size=db_connections, max_overflow=0) as runtime:
+        async with asyncio.TaskGroup() as tg:
+            for index in range(config.jobs_per_worker):
+                tg.create_task(scraper.run_jobs(runtime, f"{worker}/{index}", dedups))
+
+
+async def seed_jobs(db_url: str, hostnames: list[str]) -> None:
+    db_factory = create_session_factory(db_url, pool_size=1, max_overflow=0)
+    try:
+        async with get_db_session(db_factory) as db:
+            await enqueue_institutions(db, hostnames)
+            if config.refresh:
+                await restart_planning(db, hostnames)
+    finally:
+        await db_factory.kw["bind"].dispose()
+
+
+async def report_jobs(db_url: str) -> None:
+    db_factory = create_session_factory(db_url, pool_size=1, max_overflow=0)
+    try:
+        async with get_db_session(db_factory) as db:
+            counts = await count_jobs(db)
+            failed = await get_failed_jobs(db)
+    finally:
+        await db_factory.kw["bind"].dispose()
+
+    for (kind, status), count in sorted(counts.items()):
+        print(f"{kind} jobs {status}: {count}")
+    for job in failed:
+        print(f"❌ Failed: {job.hostname} {job.kind} {job.first_page}-{job.last_page} — {job.error}")
+
+
+def create_rate_limiter() -> SharedRateLimiter | None:
+    if config.global_rate_limit is None and config.host_rate_limit is None:
+        return None
+    return SharedRateLimiter(rate=config.global_rate_limit, host_rate=config.host_rate_limit)
+
+
+def create_response_cache() -> ResponseCache | None:
+    if not config.response_cache:
+        return None
+
+    ttls = {
+        "institution": config.cache_ttl_institution,
+        "facets": config.cache_ttl_facets,
+        "count": config.cache_ttl_count,
+    }
+    return ResponseCache(config.cache_file, ttls, config.cache_max_entries)
+
+
+def init_worker(rate_limiter: SharedRateLimiter | None, log_queue: Any | None = None) -> None:
+    if log_queue is not None:
+        setup_worker_logging(log_queue, config.log_level)
+    install_rate_limiter(rate_limiter)
+    install_response_cache(create_response_cache())
+
+
+def start_metrics_aggregator(metrics_dir: Path, interval: float) -> Callable[[], None]:
+    """Merge worker snapshots every `interval` seconds; the returned function stops it after a last merge."""
+
+    # Snapshots of an earlier run would otherwise be added to this one's.
+    for path in metrics_dir.glob("worker-*.*"):
+        path.unlink()
+
+    stopped = threading.Event()
+
+    def run() -> None:
+        while not stopped.wait(interval):
+            aggregate_worker_snapshots(metrics_dir)
+        aggregate_worker_snapshots(metrics_dir)
+
+    thread = threading.Thread(target=run, name="metrics-aggregator", daemon=True)
+    thread.start()
+
+    def stop() -> None:
+        stopped.set()
+        thread.join()
+
+    return stop
+
+
+def plan_workers(max_workers: int, jobs_per_worker: int, connection_budget: int) -> tuple[int, int]:
+    """
+        Number of worker processes and the database pool size of each.
+
+        Every worker's pool covers all of its job loops at once, so loops never wait on
+        each other for connections. Workers are dropped until their pools fit in
+        `connection_budget`, keeping at least one.
+    """
+
+    db_connections = max(1, jobs_per_worker) * DB_CONNECTIONS_PER_JOB_LOOP
+    num_workers = max(1, min(max_workers, connection_budget // db_connections))
+    if num_workers < max_workers:
+        logger.warning(
+            f"A connection budget of {connection_budget} covers {num_workers} of {max_workers} workers "
+            f"with {db_connections} connections each for their {jobs_per_worker} job loops."
+        )
+    return num_workers, db_connections
 
 
 def read_institution_hostnames(file_path: Path) -> set[str]:
@@ -17,22 +152,43 @@ def read_institution_hostnames(file_path: Path) -> set[str]:
 
 
 def main() -> None:
+    # Workers queue their records to this process, which alone writes the log file.
+    log_queue = mp.Queue()
+    setup_logging(log_level=config.log_level, log_file=LOG_FILE, log_queue=log_queue)
+
     hostnames_file = Path("data/institution_hostnames.txt")
     institution_hostnames = read_institution_hostnames(hostnames_file)
 
-    with ProcessPoolExecutor(max_workers=config.max_workers) as executor:
-        futures = {
-            executor.submit(scraper_process, hostname, config.db_url): hostname
-            for hostname in institution_hostnames
-        }
-
-        for future in as_completed(futures):
-            hostname = futures[future]
-            try:
-                future.result()
-                print(f"✅ Completed: {hostname}")
-            except Exception as e:
-                print(f"❌ Failed: {hostname} — {e}")
+    # Jobs live in Postgres, so main.py can run on several machines against the same database;
+    # seeding is idempotent and every machine's workers claim from the same table.
+    asyncio.run(seed_jobs(config.db_url, sorted(institution_hostnames)))
+
+    # Workers inherit the limiter at startup, so every process draws from the same budget.
+    rate_limiter = create_rate_limiter()
+    stop_metrics = start_metrics_aggregator(config.metrics_dir, config.metrics_interval) if config.metrics_dir else None
+
+    if config.profile_dir:
+        clear_profiles(config.profile_dir)
+
+    num_workers, db_connections = plan_workers(
+        max(1, config.max_workers), config.jobs_per_worker, config.db_connection_budget
+    )
+
+    workers = [
+        mp.Process(target=worker_process, args=(rate_limiter, db_connections, log_queue), name=f"worker-{index}")
+        for index in range(num_workers)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    if stop_metrics:
+        stop_metrics()
+    if config.profile_dir and (report := write_profile_report(config.profile_dir, config.profile_top)):
+        logger.info(f"Profile report written to {report}.")
+
+    asyncio.run(report_jobs(config.db_url))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,74 @@
+"""Baseline schema
+
+Tables as `Base.metadata.create_all` created them from the original schema, before
+partition checkpoints, change tracking, the job table and every later revision.
+Databases created that way are brought under migrations with `alembic stamp 0001`
+and then upgraded to head.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0001"
+down_revision: str | None = None
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # Integer primary keys are serial, as `create_all` made them, although ids come
+    # from the API and the sequences are never used.
+    op.create_table(
+        "institution",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("abbrv", sa.String, nullable=False, unique=True),
+        sa.Column("name", sa.Text, nullable=False),
+        sa.Column("doc_codes", sa.Text, nullable=False),
+        sa.Column("resource_types", sa.Text, nullable=False),
+    )
+    op.create_table(
+        "records",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("title", sa.Text, nullable=False),
+        sa.Column("summary", sa.Text, nullable=True),
+        sa.Column("author", sa.Text, nullable=True),
+        sa.Column("publisher", sa.Text, nullable=True),
+        sa.Column("year_published", sa.String, nullable=True),
+        sa.Column("volume", sa.Float, nullable=True),
+        sa.Column("issue", sa.Float, nullable=True),
+        sa.Column("isbns", sa.Text, nullable=True),
+        sa.Column("language", sa.String, nullable=True),
+        sa.Column("country", sa.String, nullable=True),
+        sa.Column("has_ecopy", sa.Boolean, nullable=False),
+        sa.Column("num_pages", sa.Integer, nullable=True),
+        sa.Column("doi", sa.String, nullable=True),
+        sa.Column("doc_type", sa.String, nullable=False),
+        sa.Column("subject", sa.Text, nullable=True),
+        sa.Column("tags", sa.Text, nullable=True),
+    )
+    op.create_table(
+        "ebooks",
+        sa.Column("id", sa.Integer, sa.ForeignKey("records.id"), primary_key=True),
+        sa.Column("read_url", sa.Text, nullable=True),
+    )
+    op.create_table(
+        "progress",
+        sa.Column("institution_abbrv", sa.String, sa.ForeignKey("institution.abbrv"), primary_key=True),
+        sa.Column("page_num", sa.BigInteger, primary_key=True),
+        sa.Column("scraped", sa.Boolean, nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("progress")
+    op.drop_table("ebooks")
+    op.drop_table("records")
+    op.drop_table("institution")
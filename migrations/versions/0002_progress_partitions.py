@@ -0,0 +1,38 @@
+"""Page checkpoints per partition
+
+Adds `progress.partition_key` and makes it part of the primary key, which becomes
+`(institution_abbrv, partition_key, page_num)`. Checkpoints written before pages were
+counted per partition get an empty key. No planned partition has that key, so those
+pages are fetched again on the next run and their records are merged as duplicates.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0002"
+down_revision: str | None = "0001"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column("progress", sa.Column("partition_key", sa.String, nullable=False, server_default=""))
+    op.alter_column("progress", "partition_key", server_default=None)
+    op.drop_constraint("progress_pkey", "progress", type_="primary")
+    op.create_primary_key("progress_pkey", "progress", ["institution_abbrv", "partition_key", "page_num"])
+
+
+def downgrade() -> None:
+    # Page numbers of different partitions collide without their key; only the
+    # checkpoints of the old unpartitioned scrape are kept.
+    op.execute("DELETE FROM progress WHERE partition_key <> ''")
+    op.drop_constraint("progress_pkey", "progress", type_="primary")
+    op.drop_column("progress", "partition_key")
+    op.create_primary_key("progress_pkey", "progress", ["institution_abbrv", "page_num"])
@@ -0,0 +1,47 @@
+"""Record change tracking and stored partition counts
+
+Adds `records.content_hash` and `records.updated_at`, and the `partition_counts` table
+of every planned partition's record count, page total and completion. Existing
+records get no hash, so the next upsert of each rewrites it once, and an `updated_at`
+of the time of the migration. With no stored counts, the next run plans every
+partition as new.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0003"
+down_revision: str | None = "0002"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # now() is stable, so existing rows take the default without a table rewrite.
+    op.add_column("records", sa.Column("content_hash", sa.String, nullable=True))
+    op.add_column(
+        "records",
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_table(
+        "partition_counts",
+        sa.Column("institution_abbrv", sa.String, sa.ForeignKey("institution.abbrv"), primary_key=True),
+        sa.Column("partition_key", sa.String, primary_key=True),
+        sa.Column("count", sa.Integer, nullable=False),
+        sa.Column("pages", sa.Integer, nullable=False),
+        sa.Column("complete", sa.Boolean, nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("partition_counts")
+    op.drop_column("records", "updated_at")
+    op.drop_column("records", "content_hash")
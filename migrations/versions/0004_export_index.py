@@ -0,0 +1,35 @@
+"""Keyset index for incremental exports
+
+Adds the `(updated_at, id)` index that exports page through. Built concurrently, so
+writers are not blocked on a large table.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+
+revision: str = "0004"
+down_revision: str | None = "0003"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "records_updated_at_id_idx",
+            "records",
+            ["updated_at", "id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("records_updated_at_id_idx", "records", postgresql_concurrently=True, if_exists=True)
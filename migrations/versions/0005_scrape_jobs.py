@@ -0,0 +1,46 @@
+"""Shared job table
+
+Adds `scrape_jobs`, the planning and page range jobs that scraper workers claim, and
+the index idle workers claim them in order by.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0005"
+down_revision: str | None = "0004"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "scrape_jobs",
+        sa.Column("id", sa.BigInteger, primary_key=True, autoincrement=True),
+        sa.Column("kind", sa.String, nullable=False),
+        sa.Column("hostname", sa.String, nullable=False),
+        sa.Column("partition_key", sa.String, nullable=False),
+        sa.Column("params", sa.Text, nullable=True),
+        sa.Column("first_page", sa.Integer, nullable=False),
+        sa.Column("last_page", sa.Integer, nullable=False),
+        sa.Column("priority", sa.BigInteger, nullable=False),
+        sa.Column("status", sa.String, nullable=False),
+        sa.Column("attempts", sa.Integer, nullable=False),
+        sa.Column("claimed_by", sa.String, nullable=True),
+        sa.Column("claimed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("error", sa.Text, nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.UniqueConstraint("hostname", "kind", "partition_key", "first_page"),
+    )
+    op.create_index("scrape_jobs_claim_idx", "scrape_jobs", ["status", "priority", "id"])
+
+
+def downgrade() -> None:
+    op.drop_table("scrape_jobs")
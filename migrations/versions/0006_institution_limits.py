@@ -0,0 +1,32 @@
+"""Probed pagination limits of institutions
+
+Adds `institution.max_rows`, `max_pages` and `limits_probed_at`. They stay null until
+the next scrape probes each institution's page size and pagination depth.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0006"
+down_revision: str | None = "0005"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column("institution", sa.Column("max_rows", sa.Integer, nullable=True))
+    op.add_column("institution", sa.Column("max_pages", sa.Integer, nullable=True))
+    op.add_column("institution", sa.Column("limits_probed_at", sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("institution", "limits_probed_at")
+    op.drop_column("institution", "max_pages")
+    op.drop_column("institution", "max_rows")
@@ -0,0 +1,42 @@
+"""Full-text search vectors on records
+
+Adds `records.search_vector` and its GIN index. The index is built concurrently, so
+writers are not blocked on a large table. Vectors of existing records are filled in
+afterwards with `python search.py backfill`; new and updated records get theirs from
+the writer.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = "0007"
+down_revision: str | None = "0006"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column("records", sa.Column("search_vector", postgresql.TSVECTOR, nullable=True))
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "records_search_vector_idx",
+            "records",
+            ["search_vector"],
+            postgresql_using="gin",
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("records_search_vector_idx", "records", postgresql_concurrently=True, if_exists=True)
+    op.drop_column("records", "search_vector")
@@ -0,0 +1,85 @@
+"""Hash-partitioned records and per-institution holdings
+
+Rebuilds `records` as a table partitioned by `HASH (id)` into `records_p0` to
+`records_p15`, copying the existing rows over, and adds `holdings`, partitioned by
+`LIST (institution_id)` with a default partition. Per-institution partitions are
+created by the scraper when it first plans an institution.
+
+The copy rewrites the whole table inside this migration's transaction and holds an
+exclusive lock on `records` until it commits, so run it while no scraper is loading.
+Existing records get no holdings; re-scraping an institution links its records.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0008"
+down_revision: str | None = "0007"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+RECORD_PARTITIONS = 16
+
+
+def upgrade() -> None:
+    op.execute("LOCK TABLE records IN ACCESS EXCLUSIVE MODE")
+    op.execute("ALTER TABLE records RENAME TO records_unpartitioned")
+    op.execute("ALTER INDEX records_pkey RENAME TO records_unpartitioned_pkey")
+    op.execute("ALTER INDEX records_updated_at_id_idx RENAME TO records_unpartitioned_updated_at_id_idx")
+    op.execute("ALTER INDEX records_search_vector_idx RENAME TO records_unpartitioned_search_vector_idx")
+
+    op.execute(
+        "CREATE TABLE records (LIKE records_unpartitioned INCLUDING DEFAULTS, PRIMARY KEY (id)) "
+        "PARTITION BY HASH (id)"
+    )
+    for remainder in range(RECORD_PARTITIONS):
+        op.execute(
+            f"CREATE TABLE records_p{remainder} PARTITION OF records "
+            f"FOR VALUES WITH (MODULUS {RECORD_PARTITIONS}, REMAINDER {remainder})"
+        )
+    op.execute("INSERT INTO records SELECT * FROM records_unpartitioned")
+    op.create_index("records_updated_at_id_idx", "records", ["updated_at", "id"])
+    op.create_index("records_search_vector_idx", "records", ["search_vector"], postgresql_using="gin")
+
+    op.drop_constraint("ebooks_id_fkey", "ebooks", type_="foreignkey")
+    op.create_foreign_key("ebooks_id_fkey", "ebooks", "records", ["id"], ["id"])
+    # The copied id default still uses the serial sequence of the old table.
+    op.execute("ALTER SEQUENCE records_id_seq OWNED BY records.id")
+    op.drop_table("records_unpartitioned")
+
+    op.create_table(
+        "holdings",
+        sa.Column("institution_id", sa.Integer, sa.ForeignKey("institution.id"), primary_key=True),
+        sa.Column("record_id", sa.Integer, primary_key=True),
+        sa.Column("seen_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        postgresql_partition_by="LIST (institution_id)",
+    )
+    op.create_index("holdings_record_id_idx", "holdings", ["record_id"])
+    op.execute("CREATE TABLE holdings_default PARTITION OF holdings DEFAULT")
+
+
+def downgrade() -> None:
+    op.drop_table("holdings")
+
+    op.execute("ALTER TABLE records RENAME TO records_partitioned")
+    op.execute("ALTER INDEX records_pkey RENAME TO records_partitioned_pkey")
+    op.execute("ALTER INDEX records_updated_at_id_idx RENAME TO records_partitioned_updated_at_id_idx")
+    op.execute("ALTER INDEX records_search_vector_idx RENAME TO records_partitioned_search_vector_idx")
+
+    op.execute("CREATE TABLE records (LIKE records_partitioned INCLUDING DEFAULTS, PRIMARY KEY (id))")
+    op.execute("INSERT INTO records SELECT * FROM records_partitioned")
+    op.create_index("records_updated_at_id_idx", "records", ["updated_at", "id"])
+    op.create_index("records_search_vector_idx", "records", ["search_vector"], postgresql_using="gin")
+
+    op.drop_constraint("ebooks_id_fkey", "ebooks", type_="foreignkey")
+    op.create_foreign_key("ebooks_id_fkey", "ebooks", "records", ["id"], ["id"])
+    op.execute("ALTER SEQUENCE records_id_seq OWNED BY records.id")
+    op.drop_table("records_partitioned")
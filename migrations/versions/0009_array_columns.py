@@ -0,0 +1,100 @@
+"""Array columns for ISBNs, tags and institution facet lists
+
+Converts the comma-separated `records.isbns`, `records.tags`, `institution.doc_codes`
+and `institution.resource_types` to `text[]`, and adds GIN indexes on `records.isbns`
+and `records.tags`. Existing ISBNs are normalized on the way, the same way as
+`chaoxing.utils.normalize_isbns`: separators are stripped, ISBN-10s become ISBN-13s
+and duplicates are dropped.
+
+The conversion rewrites `records` in this migration's transaction, so run it while no
+scraper is loading. Stored content hashes were computed over the old strings, so the
+next upsert of each record rewrites it once.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+
+revision: str = "0009"
+down_revision: str | None = "0008"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+# Session-local copies of `normalize_isbn` and `normalize_isbns`, so the conversion
+# runs as one set-based rewrite instead of a round trip per batch of records.
+NORMALIZE_ISBN = r"""
+CREATE FUNCTION pg_temp.normalize_isbn(value text) RETURNS text LANGUAGE sql IMMUTABLE AS $$
+    SELECT CASE
+        WHEN isbn ~ '^[0-9]{13}$' THEN isbn
+        WHEN isbn ~ '^[0-9]{9}[0-9X]$' AND (
+            SELECT sum((11 - i) * CASE WHEN substr(isbn, i, 1) = 'X' THEN 10 ELSE substr(isbn, i, 1)::int END)
+            FROM generate_series(1, 10) AS i
+        ) % 11 = 0 THEN '978' || left(isbn, 9) || (
+            SELECT (10 - sum(substr('978' || left(isbn, 9), i, 1)::int * (3 - 2 * (i % 2))) % 10) % 10
+            FROM generate_series(1, 12) AS i
+        )
+        ELSE nullif(clean, '')
+    END
+    FROM (
+        SELECT clean, coalesce(substring(clean FROM '^[0-9]+X?'), '') AS isbn
+        FROM (SELECT regexp_replace(upper(regexp_replace(value, '[\s-]', '', 'g')), '^ISBN(1[03])?:?', '') AS clean) AS cleaned
+    ) AS parts
+$$
+"""
+
+NORMALIZE_ISBNS = r"""
+CREATE FUNCTION pg_temp.normalize_isbns(value text) RETURNS text[] LANGUAGE sql IMMUTABLE AS $$
+    SELECT array_agg(isbn ORDER BY position)
+    FROM (
+        SELECT isbn, min(position) AS position
+        FROM unnest(regexp_split_to_array(value, '[,;]')) WITH ORDINALITY AS parts(part, position),
+            pg_temp.normalize_isbn(part) AS isbn
+        WHERE isbn IS NOT NULL
+        GROUP BY isbn
+    ) AS isbns
+$$
+"""
+
+
+def upgrade() -> None:
+    op.execute(NORMALIZE_ISBN)
+    op.execute(NORMALIZE_ISBNS)
+    op.execute(
+        "ALTER TABLE records "
+        "ALTER COLUMN isbns TYPE text[] USING pg_temp.normalize_isbns(isbns), "
+        "ALTER COLUMN tags TYPE text[] USING string_to_array(tags, ', ')"
+    )
+    op.execute(
+        "ALTER TABLE institution "
+        "ALTER COLUMN doc_codes TYPE text[] USING string_to_array(doc_codes, ', '), "
+        "ALTER COLUMN resource_types TYPE text[] USING string_to_array(resource_types, ', ')"
+    )
+    op.execute("DROP FUNCTION pg_temp.normalize_isbns(text)")
+    op.execute("DROP FUNCTION pg_temp.normalize_isbn(text)")
+
+    # Indexes on a partitioned table cannot be built concurrently; the table was just
+    # rewritten under an exclusive lock anyway.
+    op.create_index("records_isbns_idx", "records", ["isbns"], postgresql_using="gin")
+    op.create_index("records_tags_idx", "records", ["tags"], postgresql_using="gin")
+
+
+def downgrade() -> None:
+    # ISBNs stay normalized; the original spellings are not kept.
+    op.drop_index("records_tags_idx", "records")
+    op.drop_index("records_isbns_idx", "records")
+    op.execute(
+        "ALTER TABLE institution "
+        "ALTER COLUMN doc_codes TYPE text USING array_to_string(doc_codes, ', '), "
+        "ALTER COLUMN resource_types TYPE text USING array_to_string(resource_types, ', ')"
+    )
+    op.execute(
+        "ALTER TABLE records "
+        "ALTER COLUMN isbns TYPE text USING array_to_string(isbns, ', '), "
+        "ALTER COLUMN tags TYPE text USING array_to_string(tags, ', ')"
+    )
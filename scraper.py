@@ -1,28 +1,43 @@
 import sys
-import math
+import asyncio
+import json
 import logging
-from pathlib import Path
-from typing import Any
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
 
 import httpx
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from tqdm import tqdm
 
 from tusk.task_pool import TaskPool
+from tusk.adaptive import AdaptiveLimit
 from chaoxing.core.config import config
+from chaoxing.api.cache import get_response_cache
 from chaoxing.api.institution import fetch_institution
 from chaoxing.api.search import SearchParams, search_libsp
-from chaoxing.models.institution_model import InstitutionCreate
+from chaoxing.dedup import RecordDeduplicator
+from chaoxing.parser import parse_record_rows
+from chaoxing.planner import PageLimits, Partition, PartitionPlanner, fetch_records_count, probe_page_limits
+from chaoxing.models.institution_model import Institution, InstitutionCreate
 from chaoxing.models.search_model import SearchStats
-from chaoxing.models.record_model import RecordCreate
-from chaoxing.db.session import create_session_factory, get_db_session
-from chaoxing.services.institution_service import get_institution, create_institution
-from chaoxing.services.record_service import create_records
-from chaoxing.core.logging import setup_logging
+from chaoxing.db.session import get_db_session
+from chaoxing.runtime import Runtime
+from chaoxing.services.institution_service import get_institution, create_institution, set_page_limits
+from chaoxing.services.holding_service import ensure_holdings_partition
+from chaoxing.services.record_service import RecordWriter
+from chaoxing.spool import SpoolWriter
+from chaoxing.db.schema import ScrapeJob
+from chaoxing.services.progress_service import get_scraped_pages, get_scraped_page_nums, delete_page_checkpoints
+from chaoxing.services.partition_service import (
+    PartitionTotal, StoredCount, get_partition_counts, add_partition_counts, complete_partitions
+)
+from chaoxing.services.job_service import (
+    PLAN, PageRange, chunk_page_ranges, add_page_jobs, claim_job, touch_job, finish_job, fail_job, has_open_jobs
+)
+from chaoxing.core.metrics import metrics
+from chaoxing.core.profiling import profile_section
 
 
-LOG_FILE = Path("logs/chaoxing.log")
-setup_logging(log_level=config.log_level, log_file=LOG_FILE)
 logging.getLogger("httpx").setLevel(logging.ERROR)
 logger = logging.getLogger("chaoxing")
 
@@ -31,87 +46,175 @@ async def fetch_search_filters(
     client: httpx.AsyncClient,
     institution_id: int,
     institution_abbrv: str
-) -> dict[str, list[str]] | None:
+) -> dict[str, dict[str, int]] | None:
+    """
+        Fetch the facet counts of an institution's whole catalog.
+
+        They are always fetched fresh, since they are how a changed catalog is noticed:
+        when they differ from the cached ones, the institution's cached record counts
+        are dropped, so partitions that grew are not planned with stale counts. Counts
+        are only reused while every facet count is unchanged.
+    """
+
     params = SearchParams(
         institution_abbrv=institution_abbrv,
         institution_id=institution_id,
         count_only=True,
     )
+
     result = await search_libsp(client, params)
     stats = result.stats
+    facet_counts = SearchStats.model_validate(stats).to_count_dict() if stats else None
 
-    if not stats:
-        return None
+    cache = get_response_cache()
+    key = params.canonical()
+    if cache and (facet_counts is None or await cache.get("facets", key) != facet_counts):
+        await cache.invalidate("count", institution_abbrv)
+        if facet_counts is not None:
+            await cache.set("facets", key, facet_counts, scope=institution_abbrv)
+    return facet_counts
 
-    search_stats = SearchStats.model_validate(stats)
-    return search_stats.to_filter_dict()
 
+async def scrape_page(
+    client: httpx.AsyncClient,
+    params: SearchParams,
+    partition_key: str,
+    writer: RecordWriter | SpoolWriter,
+    dedup: RecordDeduplicator,
+) -> bool:
+    """
+        Scrape one page into the writer, and return whether it succeeded.
+
+        Pages of a partition the deduplicator found exhausted are skipped without a
+        checkpoint, so the partition is not completed and a later run fetches them.
+    """
+
+    checkpoint = (params.institution_abbrv, partition_key, params.page)
+    if dedup.is_exhausted(partition_key):
+        dedup.skipped_pages += 1
+        return True
 
-async def fetch_records_count(client: httpx.AsyncClient, params: SearchParams) -> int:
-    result = await search_libsp(client, params.copy(count_only=True))
-    return result.count
+    try:
+        result = await search_libsp(client, params)
+        if not result.items:
+            await writer.add([], checkpoint)
+            return True
+        with metrics.timer("parse_seconds"):
+            parsed = parse_record_rows(result.items)
+        rows = dedup.filter(partition_key, parsed)
+        metrics.inc("records_fetched_total", len(parsed))
+        metrics.inc("records_duplicate_total", len(parsed) - len(rows))
+        await writer.add(rows, checkpoint, params.institution_id)
+        logger.info(f"Queued {len(rows)} records from {params.page=} for {params.institution_abbrv}.")
+        return True
+    except Exception as e:
+        logger.exception(f"Failed to scrape {params.page=} for {params.institution_abbrv}: {e}")
+        return False
 
 
-def parse_record(item: dict[str, Any]) -> RecordCreate | None:
-    title = item["title"]
+async def plan_pages(
+    planner: PartitionPlanner,
+    base: SearchParams,
+    facet_counts: dict[str, dict[str, int]],
+    pages: asyncio.Queue[tuple[SearchParams, str] | None],
+) -> None:
+    try:
+        await planner.plan(base, facet_counts)
+    finally:
+        # Sentinel telling the page consumer that no more pages will be planned.
+        await pages.put(None)
 
-    if title is None:
+
+def create_record_writer(db_factory: async_sessionmaker[AsyncSession]) -> RecordWriter | SpoolWriter:
+    if config.sink == "spool":
+        return SpoolWriter(
+            config.spool_dir, config.spool_segment_size, config.spool_fsync_interval, upsert=config.refresh
+        )
+
+    return RecordWriter(db_factory, config.db_batch_size, config.db_flush_interval, upsert=config.refresh)
+
+
+def create_adaptive_limit() -> AdaptiveLimit | None:
+    if not config.adaptive_concurrency:
         return None
 
-    isbns = item.get("isbns")
-    tags = item.get("chiSubjectClass")
-    return RecordCreate(
-        id=item["recordId"],
-        title=item["title"],
-        summary=item.get("adstract"),
-        author=item.get("author"),
-        publisher=item.get("publisher"),
-        year_published=item.get("publishYear"),
-        volume=item.get("vol"),
-        issue=item.get("issue"),
-        isbns=", ".join(isbns) if isinstance(isbns, list) else isbns,
-        language=item.get("langCode"),
-        country=item.get("countryCode"),
-        has_ecopy=bool(item.get("eCount")),
-        num_pages=item.get("pagesNum"),
-        doi=item.get("doi"),
-        doc_type=item.get("docName"),
-        subject=item.get("subjectWord"),
-        tags=", ".join(tags) if tags else None,
+    return AdaptiveLimit(
+        initial=config.concurrency_limit,
+        min_limit=config.min_concurrency,
+        max_limit=config.max_concurrency,
     )
 
 
-async def scrape_page(
-    client: httpx.AsyncClient, params: SearchParams, db_factory: async_sessionmaker[AsyncSession]
-) -> None:
-    try:
-        result = await search_libsp(client, params)
-        if not result.items:
-            return
-        records = [record for item in result.items if (record := parse_record(item)) is not None]
-        async with get_db_session(db_factory) as db:
-            num_inserted = await create_records(db, records)
-        logger.info(f"Added {num_inserted} records to DB.")
-    except Exception as e:
-        logger.exception(f"Failed to scrape {params.page=} for {params.institution_abbrv}: {e}")
+@dataclass
+class InstitutionContext:
+    """What a scrape of one institution starts from: its metadata, facets and stored progress."""
+
+    institution: Institution
+    facet_counts: dict[str, dict[str, int]]
+    page_limits: PageLimits
+    base: SearchParams
+    scraped_pages: set[tuple[str, int]]
+    stored_counts: dict[str, StoredCount]
+    unchanged_partitions: int = 0
 
+    def select_pages(self, partition: Partition) -> tuple[list[SearchParams], PartitionTotal | None, bool]:
+        """
+            Decide which pages of a planned partition still need scraping.
 
-def compute_total_pages(records_count: int, max_rows: int, max_pages: int) -> int:
-    return min(max_pages, math.ceil(records_count / max_rows))
+            Returns those pages, the partition total to store when its count is new or
+            changed (`None` otherwise), and whether its stored progress must be reset.
+            Unchanged partitions that were completed before yield no pages at all.
+        """
 
+        partition_key = partition.params.partition_key()
+        partition_pages = partition.pages(self.page_limits)
 
-async def scrape_institution(institution_hostname: str, db_url: str) -> None:
-    db_factory = create_session_factory(db_url)
-    limits = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=30.0)
-    timeout = httpx.Timeout(15.0, read=30.0, write=15.0, pool=10.0)
+        stored = self.stored_counts.get(partition_key)
+        changed = stored is None or stored.count != partition.count
+        if not changed and stored.complete:
+            self.unchanged_partitions += 1
+            return [], None, False
 
-    async with (
-        httpx.AsyncClient(http2=True, limits=limits, timeout=timeout) as client,
-        get_db_session(db_factory) as db,
-    ):
-        institution = await fetch_institution(client, institution_hostname)
+        reset = changed and stored is not None
+        total = (self.institution.abbrv, partition_key, partition.count, len(partition_pages)) if changed else None
+        pending = [
+            page_params for page_params in partition_pages
+            if reset or (partition_key, page_params.page) not in self.scraped_pages
+        ]
+        return pending, total, reset
 
+
+async def probe_institution_limits(institution: Institution, runtime: Runtime) -> PageLimits:
+    """Probe an institution's pagination window and store it, falling back to the defaults on failure."""
+
+    base = SearchParams(institution_abbrv=institution.abbrv, institution_id=institution.id, match_all=True)
+    try:
+        page_limits = await probe_page_limits(runtime.client, base, config.probe_max_rows, config.probe_max_records)
+    except Exception as e:
+        logger.warning(f"Could not probe the page limits of {institution.abbrv}, using the defaults: {e}")
+        return PageLimits()
+
+    async with get_db_session(runtime.db_factory) as db:
+        await set_page_limits(db, institution.id, page_limits.max_rows, page_limits.max_pages)
+    logger.info(
+        f"{institution.abbrv} serves {page_limits.max_rows} rows per page "
+        f"up to page {page_limits.max_pages}."
+    )
+    return page_limits
+
+
+async def prepare_institution(institution_hostname: str, runtime: Runtime) -> InstitutionContext:
+    client, db_factory = runtime.client, runtime.db_factory
+    institution = await fetch_institution(client, institution_hostname)
+    stored_limits: PageLimits | None = None
+
+    # Sessions are only held while needed, so concurrent scrapes can share a small pool.
+    async with get_db_session(db_factory) as db:
         existing = await get_institution(db, institution.id)
+        if existing is not None and existing.max_rows and existing.max_pages:
+            probed_age = datetime.now(timezone.utc) - existing.limits_probed_at
+            if not config.probe_page_limits or probed_age.total_seconds() < config.page_limits_max_age:
+                stored_limits = PageLimits(existing.max_rows, existing.max_pages)
         if existing is None:
             await create_institution(
                 db,
@@ -119,86 +222,254 @@ async def scrape_institution(institution_hostname: str, db_url: str) -> None:
                     id=institution.id,
                     abbrv=institution.abbrv,
                     name=institution.name,
-                    doc_codes=", ".join(institution.doc_codes),
-                    resource_types=", ".join(institution.resource_types),
+                    doc_codes=institution.doc_codes,
+                    resource_types=institution.resource_types,
                 ),
             )
 
-        filters = await fetch_search_filters(client, institution.id, institution.abbrv)
-
-        sort_fields = ["relevance", "issued_sort", "class_no_sort_s"]
-        sort_clauses = ["asc", "desc"]
-        max_rows = 50
-        max_pages = 200
-        max_records = 10_000
-        start_year, end_year = 1850, 2025
-
-        with tqdm(desc=f"Scraping {institution.abbrv}", file=sys.stderr) as pbar:
-            async with TaskPool(config.concurrency_limit, progress_callback=pbar.update) as pool:
-                for filter_key, filter_values in filters.items():
-                    for filter_value in filter_values:
-                        base = SearchParams(
-                            institution_abbrv=institution.abbrv,
-                            institution_id=institution.id,
-                            rows=max_rows,
-                            match_all=True,
-                        )
-                        setattr(base, filter_key, [filter_value])
-
-                        total = await fetch_records_count(client, base)
-                        if total == 0:
-                            continue
-
-                        # base case — small enough, scrape directly
-                        if total <= max_records:
-                            total_pages = compute_total_pages(total, max_rows, max_pages)
-                            for page in range(1, total_pages + 1):
-                                await pool.submit(scrape_page, client, base.copy(page=page), db_factory)
-                            continue
-
-                        # refine by year
-                        for year in range(start_year, end_year + 1):
-                            year_params = base.copy(from_year=year, to_year=year)
-                            count_year = await fetch_records_count(client, year_params)
-                            if count_year == 0:
-                                continue
-
-                            # if small enough now → scrape directly
-                            if count_year <= max_records:
-                                pages = compute_total_pages(count_year, max_rows, max_pages)
-                                for page in range(1, pages + 1):
-                                    await pool.submit(scrape_page, client, year_params.copy(page=page), db_factory)
-                                continue
-
-                            # refine by sort_field
-                            for sort_field in sort_fields:
-                                field_params = year_params.copy(sort_field=sort_field)
-                                count_field = await fetch_records_count(client, field_params)
-                                if count_field == 0:
-                                    continue
-
-                                # if small enough after sort_field → scrape
-                                if count_field <= max_records:
-                                    pages = compute_total_pages(count_field, max_rows, max_pages)
-                                    for page in range(1, pages + 1):
-                                        await pool.submit(
-                                            scrape_page, client, field_params.copy(page=page), db_factory
-                                        )
-                                    continue
-
-                                # still too large → refine by sort_clause
-                                for sort_clause in sort_clauses:
-                                    clause_params = field_params.copy(sort_clause=sort_clause)
-                                    count_clause = await fetch_records_count(client, clause_params)
-                                    if count_clause == 0:
-                                        continue
-                                    pages = compute_total_pages(count_clause, max_rows, max_pages)
-                                    for page in range(1, pages + 1):
-                                        await pool.submit(
-                                            scrape_page, client, clause_params.copy(page=page), db_factory
-                                        )
-                await pool.join()
-
-        logger.info(f"Scrape completed for {institution.abbrv}")
-        engine = db_factory.kw["bind"]
-        await engine.dispose()
+        await ensure_holdings_partition(db, institution.id)
+        scraped_pages = await get_scraped_pages(db, institution.abbrv)
+        stored_counts = await get_partition_counts(db, institution.abbrv)
+        if scraped_pages:
+            logger.info(f"Resuming {institution.abbrv}: {len(scraped_pages)} pages already scraped.")
+
+    cache = get_response_cache()
+    if config.refresh and cache:
+        # Counts must be fresh for changed partitions to be detected.
+        await cache.invalidate("count", institution.abbrv)
+
+    facet_counts = await fetch_search_filters(client, institution.id, institution.abbrv)
+
+    page_limits = stored_limits
+    if page_limits is None:
+        page_limits = await probe_institution_limits(institution, runtime) if config.probe_page_limits else PageLimits()
+
+    base = SearchParams(
+        institution_abbrv=institution.abbrv,
+        institution_id=institution.id,
+        rows=page_limits.max_rows,
+        match_all=True,
+    )
+    return InstitutionContext(institution, facet_counts or {}, page_limits, base, scraped_pages, stored_counts)
+
+
+def get_adaptive_limit(runtime: Runtime, hostname: str) -> AdaptiveLimit | None:
+    """The adaptive limit shared by every scrape of `hostname` in this worker, if enabled."""
+
+    adaptive = runtime.adaptive_limits.get(hostname)
+    if adaptive is None:
+        adaptive = create_adaptive_limit()
+        if adaptive:
+            runtime.adaptive_limits[hostname] = adaptive
+    return adaptive
+
+
+async def scrape_institution(institution_hostname: str, runtime: Runtime) -> None:
+    client, db_factory = runtime.client, runtime.db_factory
+    context = await prepare_institution(institution_hostname, runtime)
+    institution = context.institution
+
+    pages: asyncio.Queue[tuple[SearchParams, str] | None] = asyncio.Queue(maxsize=config.page_queue_size)
+
+    async def enqueue_pages(partition: Partition) -> None:
+        pending, total, reset = context.select_pages(partition)
+        if total:
+            writer.add_partition(total, reset=reset)
+
+        partition_key = partition.params.partition_key()
+        dedup.expect(partition_key, partition.count)
+        for page_params in pending:
+            await pages.put((page_params, partition_key))
+
+    planner = PartitionPlanner(client, context.page_limits, config.planner_concurrency, enqueue_pages)
+    dedup = RecordDeduplicator(config.dedup_skip_after_pages)
+    adaptive = get_adaptive_limit(runtime, institution_hostname)
+
+    with tqdm(desc=f"Scraping {institution.abbrv}", file=sys.stderr) as pbar:
+        def on_progress() -> None:
+            pbar.update()
+            metrics.inc("pages_scraped_total")
+            metrics.set("task_pool_in_flight", pool.in_flight, institution=institution.abbrv)
+            if adaptive:
+                pbar.set_postfix(limit=adaptive.limit, refresh=False)
+
+        async with (
+            create_record_writer(db_factory) as writer,
+            TaskPool(config.concurrency_limit, progress_callback=on_progress, adaptive=adaptive) as pool,
+        ):
+            planning = asyncio.create_task(plan_pages(planner, context.base, context.facet_counts, pages))
+            while (page := await pages.get()) is not None:
+                page_params, partition_key = page
+                await pool.submit(scrape_page, client, page_params, partition_key, writer, dedup)
+                metrics.set("task_pool_in_flight", pool.in_flight, institution=institution.abbrv)
+                metrics.set("task_pool_limit", pool.limit, institution=institution.abbrv)
+                metrics.set("page_queue_depth", pages.qsize(), institution=institution.abbrv)
+            await planning
+            await pool.join()
+
+    async with get_db_session(db_factory) as db:
+        completed = await complete_partitions(db, institution.abbrv)
+    logger.info(
+        f"{context.unchanged_partitions} partitions of {institution.abbrv} were unchanged and skipped; "
+        f"{completed} partitions completed in this run."
+    )
+
+    if planner.overflow:
+        logger.warning(
+            f"{len(planner.overflow)} single-year slices of {institution.abbrv} exceed the pagination window "
+            f"and were only covered through sort order fallbacks."
+        )
+
+    redundant = sum(bool(stats.pages and not stats.new) for stats in dedup.partitions.values())
+    logger.info(
+        f"Dropped {dedup.overlap_rate:.1%} of fetched records of {institution.abbrv} as duplicates; "
+        f"{redundant} partitions returned nothing new and {dedup.skipped_pages} pages were skipped."
+    )
+    logger.info(f"Scrape completed for {institution.abbrv}: {writer.inserted} of {writer.received} records added.")
+    if adaptive:
+        logger.info(f"Adaptive concurrency for {institution.abbrv} settled at {adaptive.limit}.")
+
+
+class JobError(Exception):
+    pass
+
+
+async def plan_institution(institution_hostname: str, runtime: Runtime) -> int:
+    """
+        Plan an institution's partitions and queue their unscraped pages as page range jobs.
+
+        Partition totals, progress resets and the jobs are written in one transaction at
+        the end, so a planning job that dies halfway leaves nothing behind and can simply
+        run again. Page jobs are prioritized by the institution's record count, which makes
+        idle workers help with the biggest catalogs first. Returns the number of jobs queued.
+    """
+
+    context = await prepare_institution(institution_hostname, runtime)
+    institution = context.institution
+    priority = await fetch_records_count(runtime.client, context.base)
+
+    totals: list[PartitionTotal] = []
+    resets: list[tuple[str, str]] = []
+    ranges: list[PageRange] = []
+
+    async def queue_partition(partition: Partition) -> None:
+        pending, total, reset = context.select_pages(partition)
+        partition_key = partition.params.partition_key()
+        if total:
+            totals.append(total)
+        if reset:
+            resets.append((institution.abbrv, partition_key))
+
+        params = partition.params.canonical("page")
+        for first_page, last_page in chunk_page_ranges([page.page for page in pending], config.job_pages):
+            ranges.append((partition_key, params, first_page, last_page))
+
+    planner = PartitionPlanner(runtime.client, context.page_limits, config.planner_concurrency, queue_partition)
+    await planner.plan(context.base, context.facet_counts)
+
+    async with get_db_session(runtime.db_factory) as db:
+        # Statements are split so their bind parameters stay within asyncpg's limit.
+        for start in range(0, max(len(totals), len(resets), len(ranges)), 1_000):
+            await delete_page_checkpoints(db, resets[start:start + 1_000])
+            await add_partition_counts(db, totals[start:start + 1_000])
+            await add_page_jobs(db, institution_hostname, priority, ranges[start:start + 1_000])
+        await db.commit()
+
+    logger.info(
+        f"Planned {institution.abbrv}: {len(ranges)} page jobs queued, "
+        f"{context.unchanged_partitions} unchanged partitions skipped."
+    )
+    return len(ranges)
+
+
+async def scrape_job_pages(job: ScrapeJob, runtime: Runtime, dedups: dict[str, RecordDeduplicator]) -> None:
+    """
+        Scrape the page range of a job, raising `JobError` when any of its pages failed.
+
+        Pages checkpointed by an earlier attempt are skipped, so a retried job only
+        fetches what is missing. When a batch fails to write, the writer raises and the
+        institution's deduplicator is dropped, since it already counts the lost records
+        as seen and would filter them out of the retry.
+    """
+
+    params = SearchParams(**json.loads(job.params))
+    institution_abbrv = params.institution_abbrv
+    dedup = dedups.setdefault(institution_abbrv, RecordDeduplicator(config.dedup_skip_after_pages))
+    adaptive = get_adaptive_limit(runtime, job.hostname)
+
+    async with get_db_session(runtime.db_factory) as db:
+        scraped = await get_scraped_page_nums(
+            db, institution_abbrv, job.partition_key, job.first_page, job.last_page
+        )
+    pending = [page for page in range(job.first_page, job.last_page + 1) if page not in scraped]
+
+    try:
+        async with (
+            create_record_writer(runtime.db_factory) as writer,
+            TaskPool(config.concurrency_limit, adaptive=adaptive) as pool,
+        ):
+            tasks = [
+                await pool.submit(scrape_page, runtime.client, params.copy(page=page), job.partition_key, writer, dedup)
+                for page in pending
+            ]
+    except Exception:
+        dedups.pop(institution_abbrv, None)
+        raise
+
+    async with get_db_session(runtime.db_factory) as db:
+        await complete_partitions(db, institution_abbrv, [job.partition_key])
+
+    failed = sum(not task.result() for task in tasks)
+    if failed:
+        raise JobError(f"{failed} of {len(tasks)} pages failed")
+
+
+async def run_jobs(runtime: Runtime, worker: str, dedups: dict[str, RecordDeduplicator]) -> None:
+    """
+        Claim and run jobs from the job table until none are pending or running.
+
+        While a job runs its claim is refreshed, so only jobs of workers that died are
+        taken over after `job_timeout`. A worker that stalled longer than that loses its
+        claim; its updates of the job then match nothing and the lost claim is logged.
+        When every pending job is claimed but some are still running, the loop polls,
+        since a running planning job may queue more.
+    """
+
+    timeout = timedelta(seconds=config.job_timeout)
+
+    async def heartbeat(job_id: int) -> None:
+        while True:
+            await asyncio.sleep(config.job_timeout / 3)
+            async with get_db_session(runtime.db_factory) as db:
+                if not await touch_job(db, job_id, worker):
+                    logger.warning(f"Lost the claim on job {job_id} to another worker.")
+                    return
+
+    while True:
+        async with get_db_session(runtime.db_factory) as db:
+            job = await claim_job(db, worker, timeout)
+            if job is None:
+                if not await has_open_jobs(db):
+                    return
+        if job is None:
+            await asyncio.sleep(config.job_poll_interval)
+            continue
+
+        beating = asyncio.create_task(heartbeat(job.id))
+        try:
+            with profile_section(job.hostname):
+                if job.kind == PLAN:
+                    await plan_institution(job.hostname, runtime)
+                else:
+                    await scrape_job_pages(job, runtime, dedups)
+        except Exception as e:
+            logger.exception(f"Job {job.id} ({job.kind} of {job.hostname}) failed: {e}")
+            async with get_db_session(runtime.db_factory) as db:
+                if not await fail_job(db, job.id, worker, f"{type(e).__name__}: {e}", config.job_max_attempts):
+                    logger.warning(f"Job {job.id} was taken over by another worker; its failure is not recorded.")
+        else:
+            async with get_db_session(runtime.db_factory) as db:
+                if not await finish_job(db, job.id, worker):
+                    logger.warning(f"Job {job.id} was taken over by another worker; it stays with its new owner.")
+        finally:
+            beating.cancel()
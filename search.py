@@ -0,0 +1,78 @@
+import asyncio
+import logging
+import argparse
+from pathlib import Path
+
+from chaoxing.core.config import config
+from chaoxing.db.session import create_session_factory, get_db_session
+from chaoxing.services.search_service import FACET_COLUMNS, backfill_search_vectors, search_records
+from chaoxing.core.logging import setup_logging
+
+
+LOG_FILE = Path("logs/search.log")
+logger = logging.getLogger("chaoxing")
+
+
+async def query(db_url: str, text: str, filters: dict[str, str], limit: int) -> None:
+    db_factory = create_session_factory(db_url, pool_size=1, max_overflow=0)
+    try:
+        async with get_db_session(db_factory) as db:
+            results = await search_records(db, text, filters, limit=limit)
+    finally:
+        await db_factory.kw["bind"].dispose()
+
+    if not results.truncated:
+        print(f"{results.matched} matches")
+    else:
+        print(f"{results.matched}+ matches, facets counted over the best {results.matched}")
+    for hit in results.hits:
+        record = hit.record
+        print(f"{hit.rank:8.4f}  {record['id']}  {record['title']} / {record['author'] or '-'} ({record['year_published'] or '-'})")
+    for column, counts in results.facets.items():
+        top = ", ".join(f"{value} {count}" for value, count in list(counts.items())[:10])
+        print(f"{column}: {top}")
+
+
+async def backfill(db_url: str, batch_size: int, rebuild: bool) -> None:
+    db_factory = create_session_factory(db_url, pool_size=1, max_overflow=0)
+    after = None
+    batches = 0
+    try:
+        async with get_db_session(db_factory) as db:
+            while (after := await backfill_search_vectors(db, after, batch_size, rebuild)) is not None:
+                batches += 1
+                if batches % 100 == 0:
+                    logger.info(f"Backfilled search vectors up to record {after}.")
+    finally:
+        await db_factory.kw["bind"].dispose()
+    logger.info("Search vectors backfilled.")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Full-text search over scraped records.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    query_parser = subparsers.add_parser("query", help="search records")
+    query_parser.add_argument("text")
+    query_parser.add_argument("--limit", type=int, default=20)
+    for column in FACET_COLUMNS:
+        query_parser.add_argument(f"--{column.replace('_', '-')}", dest=column, help=f"only records with this {column}")
+
+    backfill_parser = subparsers.add_parser("backfill", help="build search vectors of records that have none")
+    backfill_parser.add_argument("--batch-size", type=int, default=5_000)
+    backfill_parser.add_argument(
+        "--rebuild", action="store_true", help="rebuild existing vectors too, after tokenizing changed"
+    )
+    args = parser.parse_args()
+
+    setup_logging(log_level=config.log_level, log_file=LOG_FILE)
+
+    if args.command == "query":
+        filters = {column: getattr(args, column) for column in FACET_COLUMNS if getattr(args, column)}
+        asyncio.run(query(config.db_url, args.text, filters, args.limit))
+    else:
+        asyncio.run(backfill(config.db_url, args.batch_size, args.rebuild))
+
+
+if __name__ == "__main__":
+    main()
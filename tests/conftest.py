@@ -0,0 +1,15 @@
+import os
+
+
+# Settings without defaults; nothing under test connects to the database.
+for name, value in {
+    "POSTGRES_HOST": "localhost",
+    "POSTGRES_PORT": "5432",
+    "POSTGRES_USER": "chaoxing",
+    "POSTGRES_PASSWORD": "chaoxing",
+    "POSTGRES_DB": "chaoxing",
+    "DB_POOL_SIZE": "1",
+    "DB_MAX_OVERFLOW": "0",
+    "RESPONSE_CACHE": "false",
+}.items():
+    os.environ.setdefault(name, value)
@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+
+from tusk.adaptive import AdaptiveLimit
+
+
+def test_successes_grow_limit_additively():
+    adaptive = AdaptiveLimit(initial=10, max_limit=100)
+    for _ in range(10):
+        adaptive.record_success(0.1)
+    # A round of `limit` successes adds just under one slot.
+    assert adaptive.limit == 10
+    adaptive.record_success(0.1)
+    assert adaptive.limit == 11
+
+
+def test_limit_stays_within_bounds():
+    adaptive = AdaptiveLimit(initial=4, min_limit=2, max_limit=5, cooldown=0)
+    for _ in range(100):
+        adaptive.record_success(0.1)
+    assert adaptive.limit == 5
+    for _ in range(10):
+        adaptive.record_overload()
+    assert adaptive.limit == 2
+
+
+def test_slow_success_decreases_limit():
+    adaptive = AdaptiveLimit(initial=20, latency_tolerance=3.0)
+    adaptive.record_success(0.1)
+    adaptive.record_success(0.31)
+    assert adaptive.limit == 10
+
+
+def test_latency_classes_have_separate_baselines():
+    adaptive = AdaptiveLimit(initial=10, max_limit=100, cooldown=0)
+    # Fast count probes interleaved with full pages ten times slower.
+    for _ in range(50):
+        adaptive.record_success(0.02, "count:0")
+        adaptive.record_success(0.2, "search:50")
+        adaptive.record_success(0.3, "search:50")
+    assert adaptive.limit > 10
+
+
+def test_unclassed_latencies_collapse_the_limit():
+    adaptive = AdaptiveLimit(initial=10, max_limit=100, cooldown=0)
+    for _ in range(50):
+        adaptive.record_success(0.02)
+        adaptive.record_success(0.2)
+    assert adaptive.limit == 1
+
+
+def test_baseline_expires_after_latency_window():
+    adaptive = AdaptiveLimit(initial=20, latency_window=5, cooldown=0)
+    adaptive.record_success(0.01)
+    for _ in range(4):
+        adaptive.record_success(0.02)
+    adaptive.record_success(0.05)
+    # 0.01 fell out of the window, so 0.05 is within three times the 0.02 baseline.
+    assert adaptive.limit == 20
+
+
+def test_latency_target_overrides_tolerance():
+    adaptive = AdaptiveLimit(initial=20, latency_target=1.0)
+    adaptive.record_success(0.01)
+    adaptive.record_success(0.5)
+    assert adaptive.limit == 20
+    adaptive.record_success(1.5)
+    assert adaptive.limit == 10
+
+
+def test_decreases_are_spaced_by_cooldown():
+    adaptive = AdaptiveLimit(initial=32, cooldown=60.0)
+    adaptive.record_overload()
+    adaptive.record_overload()
+    assert adaptive.limit == 16
+
+
+def test_error_rate_decreases_limit_after_sample():
+    adaptive = AdaptiveLimit(initial=20, window=20, error_threshold=0.1)
+    for _ in range(8):
+        adaptive.record_success(0.1)
+    adaptive.record_error()
+    assert adaptive.limit == 20  # not enough outcomes yet
+    adaptive.record_error()
+    assert adaptive.limit == 10
+
+
+def test_decrease_must_be_a_fraction():
+    with pytest.raises(ValueError):
+        AdaptiveLimit(initial=1, decrease=1.0)
+
+
+def test_acquire_waits_for_a_free_slot():
+    async def run() -> list[str]:
+        adaptive = AdaptiveLimit(initial=1)
+        events = []
+
+        async def worker(name: str) -> None:
+            await adaptive.acquire()
+            events.append(f"start {name}")
+            await asyncio.sleep(0.01)
+            events.append(f"end {name}")
+            adaptive.release()
+
+        await asyncio.gather(worker("a"), worker("b"))
+        return events
+
+    assert asyncio.run(run()) == ["start a", "end a", "start b", "end b"]
+
+
+def test_cancelled_waiter_passes_its_slot_on():
+    async def run() -> int:
+        adaptive = AdaptiveLimit(initial=1)
+        await adaptive.acquire()
+        cancelled = asyncio.create_task(adaptive.acquire())
+        waiting = asyncio.create_task(adaptive.acquire())
+        await asyncio.sleep(0)
+
+        adaptive.release()
+        cancelled.cancel()
+        await asyncio.gather(cancelled, return_exceptions=True)
+        await asyncio.wait_for(waiting, timeout=1)
+        return adaptive.in_flight
+
+    assert asyncio.run(run()) == 1
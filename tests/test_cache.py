@@ -0,0 +1,99 @@
+import asyncio
+import sqlite3
+
+from chaoxing.api.cache import ResponseCache
+
+
+def accessed_at(path, endpoint: str, key: str) -> float:
+    with sqlite3.connect(path) as db:
+        return db.execute(
+            "SELECT accessed_at FROM responses WHERE endpoint = ? AND key = ?", (endpoint, key)
+        ).fetchone()[0]
+
+
+def test_values_round_trip_through_sqlite(tmp_path):
+    async def run():
+        cache = ResponseCache(tmp_path / "cache.sqlite3", {"count": 60})
+        await cache.set("count", "a", {"value": 1}, scope="ecnu")
+        await cache.close()
+
+        reopened = ResponseCache(tmp_path / "cache.sqlite3", {"count": 60})
+        try:
+            return await reopened.get("count", "a"), await reopened.get("count", "b")
+        finally:
+            await reopened.close()
+
+    assert asyncio.run(run()) == ({"value": 1}, None)
+
+
+def test_endpoints_without_ttl_are_not_cached(tmp_path):
+    async def run():
+        cache = ResponseCache(tmp_path / "cache.sqlite3", {"count": 60})
+        await cache.set("facets", "a", {"value": 1})
+        return await cache.get("facets", "a")
+
+    assert asyncio.run(run()) is None
+
+
+def test_expired_entries_are_dropped(tmp_path):
+    async def run():
+        cache = ResponseCache(tmp_path / "cache.sqlite3", {"count": 1e-9})
+        await cache.set("count", "a", 1)
+        await asyncio.sleep(0.01)
+        return await cache.get("count", "a")
+
+    assert asyncio.run(run()) is None
+
+
+def test_hits_are_served_from_memory(tmp_path):
+    async def run():
+        cache = ResponseCache(tmp_path / "cache.sqlite3", {"count": 60})
+        await cache.set("count", "a", 1)
+        cache._db.execute("DELETE FROM responses")
+        return await cache.get("count", "a")
+
+    assert asyncio.run(run()) == 1
+
+
+def test_memory_is_bounded_and_falls_back_to_sqlite(tmp_path):
+    async def run():
+        cache = ResponseCache(tmp_path / "cache.sqlite3", {"count": 60}, memory_entries=2)
+        for key in "abc":
+            await cache.set("count", key, key)
+        return list(cache._memory), await cache.get("count", "a")
+
+    memory, value = asyncio.run(run())
+    assert memory == [("count", "b"), ("count", "c")]
+    assert value == "a"
+
+
+def test_access_times_are_written_in_batches(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+
+    async def run():
+        cache = ResponseCache(path, {"count": 60}, touch_batch=3)
+        for key in "abc":
+            await cache.set("count", key, key)
+        written = accessed_at(path, "count", "a")
+
+        await cache.get("count", "a")
+        await cache.get("count", "b")
+        await cache.get("count", "a")
+        unchanged = accessed_at(path, "count", "a") == written
+        await cache.get("count", "c")
+        return unchanged, accessed_at(path, "count", "a") > written
+
+    assert asyncio.run(run()) == (True, True)
+
+
+def test_invalidate_by_scope_clears_memory_and_sqlite(tmp_path):
+    async def run():
+        cache = ResponseCache(tmp_path / "cache.sqlite3", {"count": 60, "facets": 60})
+        await cache.set("count", "a", 1, scope="ecnu")
+        await cache.set("facets", "a", 2, scope="ecnu")
+        await cache.set("count", "b", 3, scope="pku")
+        removed = await cache.invalidate("count", "ecnu")
+        values = [await cache.get(*entry) for entry in (("count", "a"), ("facets", "a"), ("count", "b"))]
+        return removed, values
+
+    assert asyncio.run(run()) == (1, [None, 2, 3])
@@ -0,0 +1,94 @@
+import random
+
+from chaoxing.dedup import RecordDeduplicator, SeenIds
+
+
+def test_seen_ids_add_reports_new_ids_only():
+    seen = SeenIds()
+    assert seen.add(5)
+    assert not seen.add(5)
+    assert 5 in seen and 6 not in seen
+    assert len(seen) == 1
+
+
+def test_seen_ids_match_a_set_across_sparse_and_dense_chunks():
+    rng = random.Random(0)
+    # A dense run that turns its chunk into a bitmap, and ids scattered over many chunks.
+    ids = list(range(1_000, 1_000 + SeenIds.SPARSE_LIMIT * 4)) + [rng.randrange(10 ** 9) for _ in range(2_000)]
+    ids += ids[:500]
+
+    seen = SeenIds()
+    expected: set[int] = set()
+    for record_id in ids:
+        assert seen.add(record_id) == (record_id not in expected)
+        expected.add(record_id)
+
+    assert len(seen) == len(expected)
+    assert all(record_id in seen for record_id in expected)
+    assert not any(record_id in seen for record_id in range(10 ** 9 + 1, 10 ** 9 + 100))
+    assert any(isinstance(chunk, bytearray) for chunk in seen._chunks.values())
+
+
+def test_seen_ids_chunk_boundaries():
+    seen = SeenIds()
+    edge = SeenIds.CHUNK_BITS
+    for record_id in (0, edge - 1, edge, 2 * edge - 1):
+        assert seen.add(record_id)
+    assert (edge - 2) not in seen and (edge + 1) not in seen
+
+
+def rows(*ids: int) -> list[tuple[int, str]]:
+    return [(record_id, f"title {record_id}") for record_id in ids]
+
+
+def test_filter_drops_records_seen_in_any_partition():
+    dedup = RecordDeduplicator()
+    assert dedup.filter("a", rows(1, 2, 3)) == rows(1, 2, 3)
+    assert dedup.filter("b", rows(2, 3, 4)) == rows(4)
+
+    assert dedup.partitions["b"].fetched == 3
+    assert dedup.partitions["b"].new == 1
+    assert dedup.overlap_rate == 1 - 4 / 6
+
+
+def test_skipping_is_off_by_default():
+    dedup = RecordDeduplicator()
+    dedup.expect("b", 3)
+    dedup.filter("a", rows(1, 2, 3))
+    for _ in range(10):
+        dedup.filter("b", rows(1, 2, 3))
+    assert not dedup.is_exhausted("b")
+
+
+def test_overlap_at_head_does_not_exhaust_a_partition():
+    dedup = RecordDeduplicator(skip_after_pages=2)
+    dedup.expect("b", 100)
+    dedup.filter("a", rows(*range(10)))
+    dedup.filter("b", rows(0, 1, 2, 3, 4))
+    dedup.filter("b", rows(5, 6, 7, 8, 9))
+    assert not dedup.is_exhausted("b")
+
+
+def test_partition_without_expected_count_is_never_exhausted():
+    dedup = RecordDeduplicator(skip_after_pages=1)
+    dedup.filter("a", rows(1, 2))
+    dedup.filter("b", rows(1, 2))
+    assert not dedup.is_exhausted("b")
+
+
+def test_covered_partition_without_new_records_is_exhausted():
+    dedup = RecordDeduplicator(skip_after_pages=2)
+    dedup.expect("b", 4)
+    dedup.filter("a", rows(1, 2, 3, 4))
+    dedup.filter("b", rows(1, 2))
+    assert not dedup.is_exhausted("b")
+    dedup.filter("b", rows(3, 4))
+    assert dedup.is_exhausted("b")
+
+
+def test_new_records_keep_a_partition_alive():
+    dedup = RecordDeduplicator(skip_after_pages=1)
+    dedup.expect("b", 2)
+    dedup.filter("a", rows(1))
+    dedup.filter("b", rows(1, 2))
+    assert not dedup.is_exhausted("b")
@@ -0,0 +1,21 @@
+from chaoxing.services.job_service import chunk_page_ranges
+
+
+def test_contiguous_pages_form_one_range():
+    assert chunk_page_ranges([1, 2, 3, 4], 10) == [(1, 4)]
+
+
+def test_ranges_are_capped_at_max_pages():
+    assert chunk_page_ranges(list(range(1, 8)), 3) == [(1, 3), (4, 6), (7, 7)]
+
+
+def test_gaps_start_a_new_range():
+    assert chunk_page_ranges([1, 2, 4, 5, 9], 10) == [(1, 2), (4, 5), (9, 9)]
+
+
+def test_no_pages_give_no_ranges():
+    assert chunk_page_ranges([], 10) == []
+
+
+def test_single_page_ranges():
+    assert chunk_page_ranges([3, 4, 5], 1) == [(3, 3), (4, 4), (5, 5)]
@@ -0,0 +1,15 @@
+from main import DB_CONNECTIONS_PER_JOB_LOOP, plan_workers
+
+
+def test_pools_cover_every_job_loop():
+    assert plan_workers(4, 4, 1_000) == (4, 4 * DB_CONNECTIONS_PER_JOB_LOOP)
+
+
+def test_workers_are_reduced_to_fit_the_budget():
+    num_workers, db_connections = plan_workers(20, 4, 80)
+    assert num_workers * db_connections <= 80
+    assert db_connections == 4 * DB_CONNECTIONS_PER_JOB_LOOP
+
+
+def test_one_worker_is_kept_below_the_budget():
+    assert plan_workers(3, 10, 5) == (1, 10 * DB_CONNECTIONS_PER_JOB_LOOP)
@@ -0,0 +1,16 @@
+from pathlib import Path
+
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+
+
+ROOT = Path(__file__).parent.parent
+
+
+def test_revisions_form_one_ordered_chain():
+    scripts = ScriptDirectory.from_config(Config(ROOT / "alembic.ini"))
+    revisions = list(scripts.walk_revisions())
+
+    assert len(scripts.get_heads()) == 1 and len(scripts.get_bases()) == 1
+    assert [revision.revision for revision in revisions] == sorted((r.revision for r in revisions), reverse=True)
+    assert all(Path(revision.path).name.startswith(f"{revision.revision}_") for revision in revisions)
@@ -0,0 +1,84 @@
+import random
+from typing import Any
+
+import pytest
+from pydantic import ValidationError
+
+from chaoxing.models.record_model import RECORD_FIELDS
+from chaoxing.parser import parse_record, parse_record_rows, record_hash
+
+
+def make_item(rng: random.Random, record_id: int) -> dict[str, Any]:
+    return {
+        "recordId": record_id,
+        "title": None if rng.random() < 0.05 else f"Title {record_id}",
+        "adstract": rng.choice([None, "An abstract"]),
+        "author": rng.choice([None, f"Author {record_id}"]),
+        "publisher": f"Publisher {rng.randrange(10)}",
+        "publishYear": rng.choice([None, "1999"]),
+        "vol": rng.choice([None, 1, 2.5, "3"]),
+        "issue": rng.choice([None, 4, 5.0, "6"]),
+        "isbns": rng.choice([None, [], ["978-7-02-000220-7", "7-02-000220-X"], "0-306-40615-2; 9780306406157"]),
+        "langCode": "chi",
+        "countryCode": rng.choice([None, "CN"]),
+        "eCount": rng.choice([None, 0, 2]),
+        "pagesNum": rng.choice([None, 320, "320"]),
+        "doi": None,
+        "docName": "Book",
+        "subjectWord": "Literature",
+        "chiSubjectClass": rng.choice([None, [], ["I247", "I207"], "I247"]),
+        "callNo": ["I247.5/123"],
+    }
+
+
+def model_rows(items: list[dict[str, Any]]) -> list[tuple[Any, ...]]:
+    rows = []
+    for item in items:
+        record = parse_record(item)
+        if record is not None:
+            data = record.model_dump()
+            rows.append(tuple(data[field] for field in RECORD_FIELDS))
+    return rows
+
+
+def typed(rows: list[tuple[Any, ...]]) -> list[list[tuple[type, Any]]]:
+    # `1 == 1.0` and `True == 1`, so types are compared as well as values.
+    return [[(type(value), value) for value in row] for row in rows]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_batch_rows_match_model_rows(seed):
+    rng = random.Random(seed)
+    items = [make_item(rng, record_id) for record_id in range(500)]
+    assert typed(parse_record_rows(items)) == typed(model_rows(items))
+
+
+def test_rows_are_ordered_like_record_fields():
+    item = make_item(random.Random(0), 7) | {"title": "A title", "vol": 1, "isbns": ["0-306-40615-2"]}
+    [row] = parse_record_rows([item])
+    values = dict(zip(RECORD_FIELDS, row))
+    assert values["id"] == 7
+    assert values["title"] == "A title"
+    assert values["volume"] == 1.0 and type(values["volume"]) is float
+    assert values["isbns"] == ["9780306406157"]
+
+
+def test_records_without_title_are_dropped():
+    item = make_item(random.Random(0), 1) | {"title": None}
+    assert parse_record_rows([item]) == []
+    assert parse_record(item) is None
+
+
+def test_invalid_values_raise_like_the_model():
+    item = make_item(random.Random(0), 1) | {"title": "A title", "pagesNum": "many"}
+    with pytest.raises(ValidationError):
+        parse_record_rows([item])
+
+
+def test_record_hash_depends_on_content():
+    item = make_item(random.Random(0), 1) | {"title": "A title"}
+    [row] = parse_record_rows([item])
+    [same] = parse_record_rows([dict(item)])
+    [changed] = parse_record_rows([item | {"title": "Another title"}])
+    assert record_hash(row) == record_hash(same)
+    assert record_hash(row) != record_hash(changed)
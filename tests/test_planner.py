@@ -0,0 +1,140 @@
+import json
+import asyncio
+
+import httpx
+import pytest
+
+from chaoxing.api.search import SearchParams
+from chaoxing.planner import (
+    CEILING_YEAR, FLOOR_YEAR, YEAR_SORT_FIELD, PageLimits, Partition, PartitionPlanner, split_year_range
+)
+
+
+def test_split_open_range_at_ceiling():
+    assert split_year_range(None, None) == ((None, CEILING_YEAR), (CEILING_YEAR + 1, None))
+
+
+def test_split_open_start_at_floor():
+    assert split_year_range(None, 2000) == ((None, FLOOR_YEAR - 1), (FLOOR_YEAR, 2000))
+
+
+def test_split_open_start_below_floor_widens():
+    to_year = FLOOR_YEAR - 50
+    assert split_year_range(None, to_year) == ((None, to_year - 50), (to_year - 49, to_year))
+
+
+def test_split_open_end_at_ceiling():
+    assert split_year_range(2000, None) == ((2000, CEILING_YEAR), (CEILING_YEAR + 1, None))
+
+
+def test_split_open_end_above_ceiling_widens():
+    from_year = CEILING_YEAR + 4
+    assert split_year_range(from_year, None) == ((from_year, from_year + 3), (from_year + 4, None))
+
+
+def test_split_bounded_range_in_half():
+    assert split_year_range(1900, 2000) == ((1900, 1950), (1951, 2000))
+    assert split_year_range(1999, 2000) == ((1999, 1999), (2000, 2000))
+
+
+def test_single_year_cannot_be_split():
+    assert split_year_range(2000, 2000) is None
+
+
+@pytest.mark.parametrize("from_year, to_year", [(1850, 2025), (1, 9999), (2000, 2001)])
+def test_bounded_splits_cover_range_exactly(from_year, to_year):
+    years = []
+    pending = [(from_year, to_year)]
+    while pending:
+        low, high = pending.pop()
+        halves = split_year_range(low, high)
+        if halves is None:
+            years.append(low)
+        else:
+            pending.extend(halves)
+    assert sorted(years) == list(range(from_year, to_year + 1))
+
+
+def plan(
+    years: list[int | None], limits: PageLimits, undated_first: str | None = "asc"
+) -> tuple[list[Partition], PartitionPlanner]:
+    """
+        Plan a catalog of records with the given publication years against counted probes.
+
+        Records without a year sort first in the `undated_first` clause of the year sort,
+        or in neither when it is None.
+    """
+
+    def matches(year: int | None, params: SearchParams) -> bool:
+        if params.from_year is None and params.to_year is None:
+            return True
+        if year is None:
+            return False
+        above = params.from_year is None or year >= params.from_year
+        below = params.to_year is None or year <= params.to_year
+        return above and below
+
+    async def count(params: SearchParams) -> int:
+        return sum(matches(year, params) for year in years)
+
+    def search(request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content)
+        dated = sorted(year for year in years if year is not None)
+        first = dated[0] if payload["sortClause"] == "asc" else dated[-1]
+        if payload["sortClause"] == undated_first and None in years:
+            first = None
+        data = {"numFound": len(years), "searchResult": [{"publishYear": first}], "facetResult": {}}
+        return httpx.Response(200, json={"success": True, "data": data})
+
+    partitions: list[Partition] = []
+
+    async def on_partition(partition: Partition) -> None:
+        partitions.append(partition)
+
+    async def run() -> PartitionPlanner:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(search)) as client:
+            planner = PartitionPlanner(client, limits, concurrency=4, on_partition=on_partition)
+            planner._count = count
+            base = SearchParams(institution_abbrv="test", institution_id=1)
+            await planner.plan(base, {"doc_codes": {"book": len(years)}})
+            return planner
+
+    return partitions, asyncio.run(run())
+
+
+def test_planned_year_slices_cover_dated_records_once():
+    years = [1850 + index % 200 for index in range(5_000)]
+    partitions, planner = plan(years, PageLimits(max_rows=10, max_pages=10))
+
+    assert all(partition.count <= 100 for partition in partitions)
+    assert sum(partition.count for partition in partitions) == len(years)
+    assert not planner.overflow
+
+
+@pytest.mark.parametrize("undated_first", ["asc", "desc"])
+def test_records_without_year_are_planned_from_the_end_of_year_sort_they_are_at(undated_first):
+    years = [1900 + index % 100 for index in range(1_000)] + [None] * 30
+    partitions, planner = plan(years, PageLimits(max_rows=10, max_pages=10), undated_first)
+
+    undated = [partition for partition in partitions if partition.params.sort_field == YEAR_SORT_FIELD]
+    assert [partition.params.sort_clause for partition in undated] == [undated_first]
+    assert all(partition.count == 30 for partition in undated)
+    assert all(partition.params.from_year is None and partition.params.to_year is None for partition in undated)
+    dated = [partition for partition in partitions if partition not in undated]
+    assert sum(partition.count for partition in dated) == 1_000
+    assert not planner.overflow
+
+
+def test_too_many_records_without_year_overflow():
+    years = [2000] * 50 + [None] * 500
+    partitions, planner = plan(years, PageLimits(max_rows=10, max_pages=10))
+
+    assert [partition.count for partition in planner.overflow] == [500]
+
+
+def test_records_without_year_found_at_neither_end_are_planned_from_both():
+    years = [1900 + index % 100 for index in range(1_000)] + [None] * 30
+    partitions, planner = plan(years, PageLimits(max_rows=10, max_pages=10), undated_first=None)
+
+    undated = [partition for partition in partitions if partition.params.sort_field == YEAR_SORT_FIELD]
+    assert sorted(partition.params.sort_clause for partition in undated) == ["asc", "desc"]
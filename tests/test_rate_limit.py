@@ -0,0 +1,67 @@
+import asyncio
+import multiprocessing as mp
+import time
+import zlib
+
+from tusk.rate_limit import SharedRateLimiter
+
+
+def test_without_rates_never_waits():
+    limiter = SharedRateLimiter()
+    assert all(limiter._reserve("a") == 0 for _ in range(100))
+
+
+def test_burst_is_served_then_requests_wait():
+    limiter = SharedRateLimiter(rate=10, burst=1.0)
+    assert all(limiter._reserve("a") == 0 for _ in range(10))
+    delay = limiter._reserve("a")
+    assert 0 < delay <= 0.1
+
+
+def test_hosts_have_separate_budgets():
+    limiter = SharedRateLimiter(host_rate=2, burst=1.0)
+    assert limiter._reserve("a") == 0 and limiter._reserve("a") == 0
+    assert limiter._reserve("a") > 0
+    assert limiter._reserve("b") == 0
+
+
+def test_global_rate_caps_all_hosts():
+    limiter = SharedRateLimiter(rate=2, host_rate=100, burst=1.0)
+    assert limiter._reserve("a") == 0 and limiter._reserve("b") == 0
+    assert limiter._reserve("c") > 0
+
+
+def test_waiting_request_takes_no_tokens():
+    limiter = SharedRateLimiter(rate=1, host_rate=100, burst=1.0)
+    assert limiter._reserve("a") == 0
+    assert limiter._reserve("a") > 0
+    # The host bucket was not charged for the refused request.
+    host_slot = 1 + zlib.crc32(b"a") % limiter.host_slots
+    assert limiter._buckets[2 * host_slot] >= 98
+
+
+def test_acquire_paces_requests():
+    limiter = SharedRateLimiter(rate=50, burst=0.0)
+
+    async def run() -> float:
+        started = time.monotonic()
+        for _ in range(6):
+            await limiter.acquire("a")
+        return time.monotonic() - started
+
+    # One token of burst, then one request every 20ms.
+    assert asyncio.run(run()) >= 0.09
+
+
+def drain(limiter: SharedRateLimiter, count: int) -> None:
+    for _ in range(count):
+        limiter._reserve("a")
+
+
+def test_budget_is_shared_with_child_processes():
+    limiter = SharedRateLimiter(rate=5, burst=1.0)
+    process = mp.get_context("fork").Process(target=drain, args=(limiter, 5))
+    process.start()
+    process.join()
+    assert process.exitcode == 0
+    assert limiter._reserve("a") > 0
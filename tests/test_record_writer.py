@@ -0,0 +1,36 @@
+import asyncio
+
+import pytest
+
+from chaoxing.services.record_service import RECORD_COLUMNS, RecordWriter, WriteError
+
+
+def row(record_id: int) -> tuple:
+    return (record_id, *[None] * (len(RECORD_COLUMNS) - 1))
+
+
+class BrokenSession:
+    async def __aenter__(self) -> "BrokenSession":
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        pass
+
+    async def connection(self) -> None:
+        raise ConnectionError("database is down")
+
+    async def close(self) -> None:
+        pass
+
+
+def test_failed_batches_are_raised_on_close():
+    writer = RecordWriter(BrokenSession, batch_size=2)
+
+    async def run():
+        async with writer:
+            await writer.add([row(1), row(2)], ("ecnu", "all", 1))
+            await writer.add([row(3)], ("ecnu", "all", 2))
+
+    with pytest.raises(WriteError, match="2 record batches"):
+        asyncio.run(run())
+    assert writer.failed == 2
@@ -0,0 +1,109 @@
+import asyncio
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+
+from chaoxing.api.resilience import CircuitOpenError, HostResilience, parse_retry_after
+
+
+REQUEST = httpx.Request("GET", "https://example.edu/find/api")
+
+
+class FakeHost:
+    """Serve a scripted sequence of status codes or exceptions, counting the calls."""
+
+    def __init__(self, *outcomes: int | Exception) -> None:
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    async def __call__(self) -> httpx.Response:
+        outcome = self.outcomes[min(self.calls, len(self.outcomes) - 1)]
+        self.calls += 1
+        if isinstance(outcome, Exception):
+            raise outcome
+        return httpx.Response(outcome, request=REQUEST)
+
+
+def resilience(**kwargs) -> HostResilience:
+    kwargs.setdefault("base_delay", 0.001)
+    return HostResilience(**kwargs)
+
+
+def test_retryable_responses_are_retried_until_success():
+    host = FakeHost(503, 429, 200)
+    response = asyncio.run(resilience().send("a", "search", host))
+    assert response.status_code == 200 and host.calls == 3
+
+
+def test_client_errors_fail_without_retries():
+    host = FakeHost(404)
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(resilience().send("a", "search", host))
+    assert host.calls == 1
+
+
+def test_gives_up_after_max_attempts():
+    host = FakeHost(httpx.ConnectError("refused"))
+    with pytest.raises(httpx.ConnectError):
+        asyncio.run(resilience(max_attempts=3).send("a", "search", host))
+    assert host.calls == 3
+
+
+def test_retries_stop_when_the_budget_is_spent():
+    layer = resilience(budget_ratio=0.0, budget_cap=1.0)
+    host = FakeHost(503)
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(layer.send("a", "search", host))
+    assert host.calls == 2 and layer.state("a").budget == 0
+
+
+def test_circuit_opens_after_consecutive_failures():
+    layer = resilience(max_attempts=1, failure_threshold=2, open_seconds=60.0, max_wait=0.0)
+    host = FakeHost(503)
+
+    async def run():
+        for _ in range(2):
+            with pytest.raises(httpx.HTTPStatusError):
+                await layer.send("a", "search", host)
+        with pytest.raises(CircuitOpenError):
+            await layer.send("a", "search", host)
+        # Other hosts are not affected.
+        await layer.send("b", "search", FakeHost(200))
+
+    asyncio.run(run())
+    assert host.calls == 2
+
+
+def test_failed_probe_reopens_the_circuit_for_longer():
+    layer = resilience(max_attempts=1, failure_threshold=1, open_seconds=0.01)
+    host = FakeHost(503, 503, 200)
+
+    async def run():
+        with pytest.raises(httpx.HTTPStatusError):
+            await layer.send("a", "search", host)
+        assert layer.state("a").open_seconds == 0.01
+
+        await asyncio.sleep(0.01)
+        with pytest.raises(httpx.HTTPStatusError):
+            await layer.send("a", "search", host)
+        assert layer.state("a").open_seconds == 0.02
+
+        await asyncio.sleep(0.02)
+        await layer.send("a", "search", host)
+
+    asyncio.run(run())
+    state = layer.state("a")
+    assert state.open_until is None and state.failures == 0 and host.calls == 3
+
+
+def test_retry_after_is_read_as_seconds_or_a_date():
+    def response(value: str) -> httpx.Response:
+        return httpx.Response(429, headers={"Retry-After": value}, request=REQUEST)
+
+    assert parse_retry_after(response("7")) == 7.0
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=60)
+    assert 50 < parse_retry_after(response(format_datetime(retry_at, usegmt=True))) <= 60
+    assert parse_retry_after(response("soon")) is None
+    assert parse_retry_after(httpx.Response(429, request=REQUEST)) is None
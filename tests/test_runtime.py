@@ -0,0 +1,78 @@
+import asyncio
+
+import httpx
+import pytest
+
+from tusk.adaptive import AdaptiveLimit
+from chaoxing.runtime import LATENCY_CLASS, AdaptiveTransport
+
+
+def send(
+    status_code: int | None,
+    adaptive: AdaptiveLimit,
+    host: str = "example.libsp.cn",
+    extensions: dict | None = None,
+) -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        if status_code is None:
+            raise httpx.ConnectError("refused", request=request)
+        return httpx.Response(status_code)
+
+    async def run() -> None:
+        transport = AdaptiveTransport(httpx.MockTransport(handler), {"example.libsp.cn": adaptive})
+        async with httpx.AsyncClient(transport=transport) as client:
+            try:
+                await client.get(f"https://{host}/find/api", extensions=extensions)
+            except httpx.ConnectError:
+                pass
+
+    asyncio.run(run())
+
+
+class RecordingLimit(AdaptiveLimit):
+    def __init__(self) -> None:
+        super().__init__(initial=10)
+        self.outcomes: list[object] = []
+
+    def record_success(self, latency: float, latency_class: str = "") -> None:
+        self.outcomes.append((latency, latency_class))
+
+    def record_error(self) -> None:
+        self.outcomes.append("error")
+
+    def record_overload(self) -> None:
+        self.outcomes.append("overload")
+
+
+def test_success_is_reported_with_request_latency():
+    adaptive = RecordingLimit()
+    send(200, adaptive)
+    [(latency, latency_class)] = adaptive.outcomes
+    assert 0 <= latency < 1
+    assert latency_class == "/find/api"
+
+
+def test_success_is_reported_with_its_latency_class():
+    adaptive = RecordingLimit()
+    send(200, adaptive, extensions={LATENCY_CLASS: "count:0"})
+    [(_, latency_class)] = adaptive.outcomes
+    assert latency_class == "count:0"
+
+
+@pytest.mark.parametrize("status_code", [429, 500, 503])
+def test_overload_statuses_are_reported(status_code):
+    adaptive = RecordingLimit()
+    send(status_code, adaptive)
+    assert adaptive.outcomes == ["overload"]
+
+
+def test_transport_errors_are_reported():
+    adaptive = RecordingLimit()
+    send(None, adaptive)
+    assert adaptive.outcomes == ["error"]
+
+
+def test_other_hosts_are_not_reported():
+    adaptive = RecordingLimit()
+    send(503, adaptive, host="other.libsp.cn")
+    assert adaptive.outcomes == []
@@ -0,0 +1,40 @@
+import asyncio
+
+import httpx
+
+from chaoxing.api.cache import ResponseCache, install_response_cache
+from scraper import fetch_search_filters
+
+
+def catalog(doc_codes: dict[str, int]) -> httpx.MockTransport:
+    def handler(request: httpx.Request) -> httpx.Response:
+        data = {"numFound": sum(doc_codes.values()), "searchResult": [], "facetResult": {"docCode": doc_codes}}
+        return httpx.Response(200, json={"success": True, "data": data})
+
+    return httpx.MockTransport(handler)
+
+
+def test_changed_facets_drop_cached_counts(tmp_path):
+    cache = ResponseCache(tmp_path / "cache.sqlite3", {"facets": 3600, "count": 3600})
+
+    async def fetch(doc_codes: dict[str, int]) -> dict:
+        async with httpx.AsyncClient(transport=catalog(doc_codes)) as client:
+            return await fetch_search_filters(client, 1, "ecnu")
+
+    async def run() -> list:
+        counts = []
+        await fetch({"1": 10})
+        await cache.set("count", "partition", 10, scope="ecnu")
+
+        assert await fetch({"1": 10}) == {"doc_codes": {"1": 10}}
+        counts.append(await cache.get("count", "partition"))
+        assert await fetch({"1": 12}) == {"doc_codes": {"1": 12}}
+        counts.append(await cache.get("count", "partition"))
+        return counts
+
+    install_response_cache(cache)
+    try:
+        assert asyncio.run(run()) == [10, None]
+    finally:
+        install_response_cache(None)
+        asyncio.run(cache.close())
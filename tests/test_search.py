@@ -0,0 +1,32 @@
+import asyncio
+import json
+
+import httpx
+
+from chaoxing.api.search import SearchParams, search_libsp
+
+
+def sent_payload(params: SearchParams) -> dict:
+    payloads = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        payloads.append(json.loads(request.content))
+        data = {"numFound": 0, "searchResult": [], "facetResult": {}}
+        return httpx.Response(200, json={"success": True, "data": data})
+
+    async def run() -> None:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            await search_libsp(client, params)
+
+    asyncio.run(run())
+    return payloads[0]
+
+
+def test_open_year_bounds_are_left_out():
+    payload = sent_payload(SearchParams(institution_abbrv="ecnu", institution_id=1))
+    assert "publishBegin" not in payload and "publishEnd" not in payload
+
+
+def test_year_bounds_are_sent_when_set():
+    payload = sent_payload(SearchParams(institution_abbrv="ecnu", institution_id=1, to_year=1849))
+    assert "publishBegin" not in payload and payload["publishEnd"] == 1849
@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from chaoxing.services.record_service import RECORD_COLUMNS
+from chaoxing.spool import ISBNS_INDEX, SEGMENT_SUFFIX, TAGS_INDEX, SpoolWriter, read_segment, upgrade_row
+
+
+def run_writer(writer: SpoolWriter, entries: int) -> None:
+    async def run():
+        async with writer:
+            for page in range(entries):
+                await writer.add([(page, "title")], ("ecnu", "all", page), institution_id=1)
+
+    asyncio.run(run())
+
+
+def test_entries_are_sealed_into_segments_on_close(tmp_path):
+    run_writer(SpoolWriter(tmp_path, upsert=True), 3)
+
+    [segment] = tmp_path.glob(f"segment-*{SEGMENT_SUFFIX}")
+    header, *entries = read_segment(segment)
+    assert header == {"upsert": True}
+    assert [entry["checkpoint"] for entry in entries] == [["ecnu", "all", page] for page in range(3)]
+    assert not list(tmp_path.glob("*.open"))
+
+
+def test_full_segments_are_sealed_while_writing(tmp_path):
+    run_writer(SpoolWriter(tmp_path, segment_size=1), 3)
+
+    segments = sorted(tmp_path.glob(f"segment-*{SEGMENT_SUFFIX}"))
+    assert [len(list(read_segment(path))) for path in segments] == [2, 2, 2]
+
+
+def test_write_failures_are_raised_on_close(tmp_path):
+    writer = SpoolWriter(tmp_path / "spool")
+
+    async def run():
+        async with writer:
+            writer.directory.rmdir()
+            await writer.add([(1, "title")])
+
+    with pytest.raises(FileNotFoundError):
+        asyncio.run(run())
+
+
+def test_rows_spooled_before_array_columns_are_upgraded():
+    row = [None] * len(RECORD_COLUMNS)
+    row[ISBNS_INDEX] = "7-02-000220-X, 9787020002207; 978-7-5327-4525-4"
+    row[TAGS_INDEX] = "History, Fiction"
+
+    upgraded = upgrade_row(row)
+    assert upgraded[ISBNS_INDEX] == ["9787020002207", "9787532745254"]
+    assert upgraded[TAGS_INDEX] == ["History", "Fiction"]
+
+
+def test_rows_with_array_columns_are_kept():
+    row = [None] * len(RECORD_COLUMNS)
+    row[ISBNS_INDEX] = ["9787020002207"]
+    row[TAGS_INDEX] = ["History"]
+    assert upgrade_row(list(row)) == tuple(row)
+    row[TAGS_INDEX] = ""
+    assert upgrade_row(row)[TAGS_INDEX] is None
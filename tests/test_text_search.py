@@ -0,0 +1,46 @@
+from chaoxing.models.record_model import RECORD_FIELDS
+from chaoxing.text_search import build_search_query, build_search_vector, tokenize
+
+
+def record(**values) -> tuple:
+    return tuple(values.get(name) for name in RECORD_FIELDS)
+
+
+def test_words_are_normalized_and_lowercased():
+    assert list(tokenize("Ｐｙｔｈｏｎ 3 Cookbook, 2nd_ed.")) == ["python", "3", "cookbook", "2nd", "ed"]
+
+
+def test_cjk_runs_become_bigrams():
+    assert list(tokenize("中国历史")) == ["中国", "国历", "历史"]
+    assert list(tokenize("书 and 中国")) == ["书", "and", "中国"]
+
+
+def test_cjk_unigrams_are_added_on_request():
+    assert list(tokenize("图书", unigrams=True)) == ["图", "图书", "书"]
+
+
+def test_vectors_weight_fields_and_index_cjk_characters():
+    vector = build_search_vector(record(title="图书馆学", author="Smith", tags=["classic"]))
+    lexemes = dict(entry.split(":") for entry in vector.split(" "))
+    assert lexemes["'图书'"] == "2A"
+    assert lexemes["'馆'"] == "5A"
+    assert lexemes["'smith'"] == "8B"
+    assert lexemes["'classic'"] == "9C"
+
+
+def test_records_without_text_have_no_vector():
+    assert build_search_vector(record(id=1)) is None
+
+
+def test_queries_require_every_token():
+    assert build_search_query("中国 History history") == "'中国' & 'history'"
+    assert build_search_query("  ,. ") is None
+
+
+def test_single_cjk_characters_match_their_unigram():
+    assert build_search_query("书") == "'书'"
+
+
+def test_apostrophes_split_words():
+    assert build_search_query("o'brien") == "'o' & 'brien'"
+    assert build_search_vector(record(title="it's")) == "'it':1A 's':2A"
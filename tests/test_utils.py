@@ -0,0 +1,48 @@
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+from chaoxing.utils import ISBN_DIGITS, ISBN_PREFIX, ISBN_SEPARATORS, ISBN_STRIP, normalize_isbn, normalize_isbns
+
+
+MIGRATION = Path(__file__).parent.parent / "migrations" / "versions" / "0009_array_columns.py"
+
+
+@pytest.mark.parametrize(("value", "expected"), [
+    ("9787532745254", "9787532745254"),
+    ("978-7-5327-4525-4", "9787532745254"),
+    ("ISBN 978 7 5327 4525 4", "9787532745254"),
+    ("ISBN13:9787532745254", "9787532745254"),
+    ("7-02-000220-X", "9787020002207"),
+    ("isbn10: 7-02-000220-x (pbk.)", "9787020002207"),
+    ("0-306-40615-2", "9780306406157"),
+    ("9787532745254 (hardcover)", "9787532745254"),
+    # Invalid check digits and other values are kept with separators stripped.
+    ("7020002208", "7020002208"),
+    ("unknown-isbn", "UNKNOWNISBN"),
+    (" - ", None),
+    ("", None),
+])
+def test_normalize_isbn(value, expected):
+    assert normalize_isbn(value) == expected
+
+
+def test_normalize_isbns_splits_and_deduplicates():
+    assert normalize_isbns("7-02-000220-X; 9787020002207, 0-306-40615-2, ") == ["9787020002207", "9780306406157"]
+    assert normalize_isbns(["0-306-40615-2", "9780306406157"]) == ["9780306406157"]
+    assert normalize_isbns(" , ") is None
+    assert normalize_isbns(None) is None
+
+
+def test_migration_uses_the_same_patterns():
+    # Postgres is not available to run the migration's SQL copy, so at least check
+    # that it matches the same separators, label and digits as the Python code.
+    spec = importlib.util.spec_from_file_location("array_columns", MIGRATION)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+
+    assert f"'{ISBN_STRIP.pattern}'" in migration.NORMALIZE_ISBN
+    assert f"'^{ISBN_PREFIX.pattern.replace('(?:', '(')}'" in migration.NORMALIZE_ISBN
+    assert f"'^{ISBN_DIGITS.pattern}'" in migration.NORMALIZE_ISBN
+    assert f"'{ISBN_SEPARATORS.pattern}'" in migration.NORMALIZE_ISBNS
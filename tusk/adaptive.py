@@ -0,0 +1,133 @@
+import asyncio
+import time
+from collections import deque
+
+
+class AdaptiveLimit:
+    """
+        Concurrency limit tuned at runtime with additive increase, multiplicative decrease.
+
+        Outcomes are reported by the owner of the limited work, ideally timing just the
+        operation that loads the shared resource. Every success grows the limit by
+        `increase / limit`, which adds roughly `increase` slots per round of `limit`
+        successes. The limit is multiplied by `decrease` when an overload is reported,
+        when the error rate over the last `window` outcomes exceeds `error_threshold`, or
+        when a success takes longer than `latency_tolerance` times its baseline (or
+        `latency_target` when given). Successes are reported with a latency class, and
+        each class has its own baseline, the fastest of its last `latency_window`
+        latencies, so cheap and expensive operations are not compared against each other
+        and a baseline from a quiet period expires. Decreases are spaced at least
+        `cooldown` seconds apart so a single burst of failures only counts once.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        min_limit: int = 1,
+        max_limit: int | None = None,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        window: int = 50,
+        error_threshold: float = 0.1,
+        latency_target: float | None = None,
+        latency_tolerance: float = 3.0,
+        latency_window: int = 100,
+        cooldown: float = 1.0,
+    ) -> None:
+        if not 0 < decrease < 1:
+            raise ValueError("decrease must be between 0 and 1.")
+
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease = decrease
+        self.error_threshold = error_threshold
+        self.latency_target = latency_target
+        self.latency_tolerance = latency_tolerance
+        self.latency_window = latency_window
+        self.cooldown = cooldown
+
+        self._limit = float(max(self.min_limit, initial))
+        self._in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._outcomes: deque[bool] = deque(maxlen=window)
+        self._latencies: dict[str, deque[float]] = {}
+        self._last_decrease = 0.0
+
+    @property
+    def limit(self) -> int:
+        return max(self.min_limit, int(self._limit))
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    async def acquire(self) -> None:
+        while self._in_flight >= self.limit:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                elif not waiter.cancelled():
+                    # The slot this waiter was woken for goes to the next one in line.
+                    self._wake()
+                raise
+        self._in_flight += 1
+
+    def release(self) -> None:
+        self._in_flight -= 1
+        self._wake()
+
+    def record_success(self, latency: float, latency_class: str = "") -> None:
+        self._outcomes.append(True)
+
+        latencies = self._latencies.get(latency_class)
+        if latencies is None:
+            latencies = self._latencies[latency_class] = deque(maxlen=self.latency_window)
+        latencies.append(latency)
+
+        threshold = self.latency_target or min(latencies) * self.latency_tolerance
+        if latency > threshold:
+            self._decrease()
+            return
+
+        self._limit += self.increase / self._limit
+        if self.max_limit is not None:
+            self._limit = min(self._limit, self.max_limit)
+        self._wake()
+
+    def record_error(self) -> None:
+        self._outcomes.append(False)
+
+        # Wait for a meaningful sample before judging the error rate.
+        if len(self._outcomes) < min(10, self._outcomes.maxlen):
+            return
+
+        errors = self._outcomes.count(False)
+        if errors / len(self._outcomes) > self.error_threshold:
+            self._decrease()
+
+    def record_overload(self) -> None:
+        """Report an explicit overload signal, such as an HTTP 429 or 5xx response."""
+        self._outcomes.append(False)
+        self._decrease()
+
+    def _decrease(self) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+
+        self._last_decrease = now
+        self._limit = max(self.min_limit, self._limit * self.decrease)
+        self._outcomes.clear()
+
+    def _wake(self) -> None:
+        free = self.limit - self._in_flight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
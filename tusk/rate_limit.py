@@ -0,0 +1,75 @@
+import asyncio
+import time
+import zlib
+import multiprocessing as mp
+
+
+class SharedRateLimiter:
+    """
+        Token bucket rate limiter shared by every process it is handed to.
+
+        Bucket state lives in shared memory guarded by a process lock, so the limiter
+        must be passed to child processes when they start (for example through a
+        `ProcessPoolExecutor` initializer). `rate` caps the total requests per second
+        across all processes and `host_rate` caps each host separately. Hosts are hashed
+        into `host_slots` buckets, so two hosts sharing a slot also share its budget.
+        Each bucket holds up to `burst` seconds worth of tokens.
+    """
+
+    def __init__(
+        self,
+        rate: float | None = None,
+        host_rate: float | None = None,
+        burst: float = 1.0,
+        host_slots: int = 1024,
+    ) -> None:
+        self.rate = rate
+        self.host_rate = host_rate
+        self.burst = burst
+        self.host_slots = host_slots
+
+        # Each bucket is a (tokens, last refill) pair: slot 0 is global, the rest are hosts.
+        self._lock = mp.Lock()
+        self._buckets = mp.RawArray("d", 2 * (1 + host_slots))
+        for slot in range(1 + host_slots):
+            self._buckets[2 * slot] = self._capacity(rate if slot == 0 else host_rate)
+
+    async def acquire(self, host: str) -> None:
+        while (delay := self._reserve(host)) > 0:
+            await asyncio.sleep(delay)
+
+    def _reserve(self, host: str) -> float:
+        """Take a token from every applicable bucket, or return how long to wait for one."""
+
+        buckets = []
+        if self.rate:
+            buckets.append((0, self.rate))
+        if self.host_rate:
+            buckets.append((1 + zlib.crc32(host.encode("utf-8")) % self.host_slots, self.host_rate))
+
+        if not buckets:
+            return 0.0
+
+        with self._lock:
+            now = time.monotonic()
+            delay = 0.0
+            for slot, rate in buckets:
+                tokens = self._refill(slot, rate, now)
+                if tokens < 1:
+                    delay = max(delay, (1 - tokens) / rate)
+
+            if delay == 0.0:
+                for slot, _ in buckets:
+                    self._buckets[2 * slot] -= 1
+
+            return delay
+
+    def _refill(self, slot: int, rate: float, now: float) -> float:
+        tokens, updated_at = self._buckets[2 * slot], self._buckets[2 * slot + 1]
+        tokens = min(self._capacity(rate), tokens + (now - updated_at) * rate)
+        self._buckets[2 * slot] = tokens
+        self._buckets[2 * slot + 1] = now
+        return tokens
+
+    def _capacity(self, rate: float | None) -> float:
+        return max(1.0, (rate or 0.0) * self.burst)
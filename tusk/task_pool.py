@@ -2,20 +2,39 @@ import asyncio
 from collections.abc import Callable, Coroutine
 from typing import Any, Optional
 
+from tusk.adaptive import AdaptiveLimit
+
 
 AsyncFunc = Callable[..., Coroutine[Any, Any, Any]]
 ProgressCallback = Callable[[], None]
 
 
 class TaskPool:
-    def __init__(self, pool_size: int, progress_callback: Optional[ProgressCallback] = None) -> None:
+    def __init__(
+        self,
+        pool_size: int,
+        progress_callback: Optional[ProgressCallback] = None,
+        adaptive: Optional[AdaptiveLimit] = None,
+    ) -> None:
         self.progress_callback = progress_callback
+        self.pool_size = pool_size
+        self.adaptive = adaptive
 
-        self._semaphore = asyncio.BoundedSemaphore(pool_size)
+        # An adaptive limit replaces the fixed semaphore; its owner reports the outcomes
+        # it is tuned by, since a task's duration includes more than the work it limits.
+        self._semaphore = adaptive or asyncio.BoundedSemaphore(pool_size)
         self._tasks: set[asyncio.Task] = set()
 
         self._closed = False
 
+    @property
+    def limit(self) -> int:
+        return self.adaptive.limit if self.adaptive else self.pool_size
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._tasks)
+
     async def __aenter__(self) -> "TaskPool":
         return self
 